@@ -0,0 +1,220 @@
+"""
+Benchmark the autopay tip suggestion pipeline against a synthetic catalog.
+
+Replaces multicall with an in-memory fake autopay contract holding N query ids,
+M feeds per query id and K historical reports per query id, then measures
+multicall/call counts, wall time and peak memory of get_combined_tips.
+
+Usage:
+    python scripts/bench_autopay.py -n 1000 -m 2 -k 20 --latency 0.05
+"""
+import asyncio
+import bisect
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from types import SimpleNamespace
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import click
+from web3 import Web3
+
+from telliot_feeds.datafeed import DataFeed
+from telliot_feeds.datasource import RandomSource
+from telliot_feeds.feeds import CATALOG_FEEDS
+from telliot_feeds.queries import SpotPrice
+from telliot_feeds.reporters import reporter_autopay_utils
+from telliot_feeds.reporters.reporter_autopay_utils import get_combined_tips
+
+
+@dataclass
+class FakeAutopay:
+    """In-memory autopay & oracle state"""
+
+    # query id: report timestamps (sorted)
+    reports: Dict[bytes, List[int]] = field(default_factory=dict)
+    # query id: feed ids
+    feeds: Dict[bytes, List[bytes]] = field(default_factory=dict)
+    # feed id: feed details
+    details: Dict[bytes, Tuple[int, ...]] = field(default_factory=dict)
+    # query id: one-time tip
+    tips: Dict[bytes, int] = field(default_factory=dict)
+    # (feed id, query id, timestamp) of claimed rewards
+    claimed: set = field(default_factory=set)  # type: ignore
+
+    def call(self, function: str, args: List[Any]) -> Any:
+        name = function.split("(")[0]
+        if name == "getCurrentFeeds":
+            return (tuple(self.feeds.get(args[0], [])),)
+        if name == "getIndexForDataBefore":
+            query_id, timestamp = args
+            idx = bisect.bisect_right(self.reports.get(query_id, []), timestamp)
+            return True, max(idx - 1, 0)
+        if name == "getTimestampbyQueryIdandIndex":
+            return (self.reports[args[0]][args[1]],)
+        if name == "getDataFeed":
+            return (self.details[args[0]],)
+        if name == "getCurrentValue":
+            reports = self.reports.get(args[0])
+            if not reports:
+                return False, b"", 0
+            return True, Web3.toBytes(int(1000e18)).rjust(32, b"\x00"), reports[-1]
+        if name == "getRewardClaimedStatus":
+            return ((args[0], args[1], args[2]) in self.claimed,)
+        if name == "getCurrentTip":
+            return (self.tips.get(args[0], 0),)
+        raise ValueError(f"Unsupported function: {function}")
+
+
+class CallCounter:
+    """Counts multicalls (RPC round trips) and the calls they batch"""
+
+    def __init__(self) -> None:
+        self.multicalls = 0
+        self.calls: Counter[str] = Counter()
+
+
+def install_fake_multicall(autopay: FakeAutopay, counter: CallCounter, latency: float) -> None:
+    """Replace multicall's Call & Multicall in reporter_autopay_utils with in-memory fakes"""
+
+    class FakeCall:
+        def __init__(self, target: str, function: List[Any], returns: List[Any]) -> None:
+            self.function, *self.args = function
+            self.returns = returns
+
+    class FakeMulticall:
+        def __init__(self, calls: List[FakeCall], **kwargs: Any) -> None:
+            self.calls = calls
+
+        async def coroutine(self) -> Dict[Any, Any]:
+            counter.multicalls += 1
+            await asyncio.sleep(latency)
+            result = {}
+            for c in self.calls:
+                counter.calls[c.function.split("(")[0]] += 1
+                output = autopay.call(c.function, c.args)
+                for (name, handler), value in zip(c.returns, output):
+                    result[name] = handler(value) if handler else value
+            return result
+
+    reporter_autopay_utils.Call = FakeCall  # type: ignore
+    reporter_autopay_utils.Multicall = FakeMulticall  # type: ignore
+
+
+def generate(
+    num_query_ids: int, feeds_per_query: int, reports_per_query: int, threshold_share: float
+) -> Tuple[FakeAutopay, Dict[bytes, str]]:
+    """Generate a fake autopay and a synthetic catalog of query ids"""
+    now = int(time.time())
+    autopay = FakeAutopay()
+    catalog = {}
+    num_threshold = int(num_query_ids * threshold_share)
+
+    for i in range(num_query_ids):
+        tag = f"bench{i}-usd-spot"
+        query_id = Web3.keccak(text=tag)
+        catalog[query_id] = tag
+        # one report every 10 minutes, latest report before the current window
+        autopay.reports[query_id] = [now - 3600 - 600 * k for k in range(reports_per_query)][::-1]
+        autopay.tips[query_id] = int(1e18) if i % 3 == 0 else 0
+
+        # threshold feeds need a live price, so give them a datafeed
+        price_threshold = 100 if i < num_threshold else 0
+        if price_threshold:
+            CATALOG_FEEDS[tag] = DataFeed(query=SpotPrice(asset=f"bench{i}", currency="usd"), source=RandomSource())
+
+        for j in range(feeds_per_query):
+            feed_id = Web3.keccak(text=f"{tag}-feed{j}")
+            autopay.feeds.setdefault(query_id, []).append(feed_id)
+            # reward, balance, startTime, interval, window, priceThreshold, feedsWithFundingIndex
+            autopay.details[feed_id] = (int(1e18), int(100e18), now - 86400, 3600, 1800, price_threshold, j + 1)
+
+    return autopay, catalog
+
+
+@dataclass
+class RoundResult:
+    elapsed: float
+    peak_memory: int
+    counter: CallCounter
+    tips: Dict[str, int]
+
+
+async def bench(
+    num_query_ids: int,
+    feeds_per_query: int,
+    reports_per_query: int,
+    threshold_share: float,
+    latency: float,
+    rounds: int,
+) -> List[RoundResult]:
+    """Run the suggestion pipeline for a number of rounds against a synthetic catalog.
+    The first round is cold, later rounds can use cached feed ids & indices."""
+    autopay, catalog = generate(num_query_ids, feeds_per_query, reports_per_query, threshold_share)
+    fake_contract = SimpleNamespace(
+        address="0x0000000000000000000000000000000000000bee", node=SimpleNamespace(_web3=None, chain_id=80001)
+    )
+    call, multicall = reporter_autopay_utils.Call, reporter_autopay_utils.Multicall
+
+    results = []
+    try:
+        for _ in range(rounds):
+            counter = CallCounter()
+            install_fake_multicall(autopay, counter, latency)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            tips = await get_combined_tips(fake_contract, catalog=catalog)  # type: ignore
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results.append(RoundResult(elapsed, peak, counter, tips))
+    finally:
+        reporter_autopay_utils.Call, reporter_autopay_utils.Multicall = call, multicall  # type: ignore
+        reporter_autopay_utils._AUTOPAY_CACHE.clear()
+        for tag in catalog.values():
+            CATALOG_FEEDS.pop(tag, None)
+
+    return results
+
+
+@click.command()
+@click.option("-n", "num_query_ids", type=int, default=1000, help="number of query ids")
+@click.option("-m", "feeds_per_query", type=int, default=2, help="feeds per query id")
+@click.option("-k", "reports_per_query", type=int, default=20, help="historical reports per query id")
+@click.option("--threshold-share", type=float, default=0.1, help="share of query ids with price threshold feeds")
+@click.option("--latency", type=float, default=0.05, help="simulated seconds per multicall")
+@click.option("--rounds", type=int, default=3, help="number of suggestion rounds")
+def main(
+    num_query_ids: int,
+    feeds_per_query: int,
+    reports_per_query: int,
+    threshold_share: float,
+    latency: float,
+    rounds: int,
+) -> None:
+    """Benchmark autopay tip suggestion with a synthetic catalog."""
+    print(
+        f"query ids: {num_query_ids}, feeds per query id: {feeds_per_query}, "
+        f"reports per query id: {reports_per_query}, simulated RPC latency: {latency}s"
+    )
+    results = asyncio.run(bench(num_query_ids, feeds_per_query, reports_per_query, threshold_share, latency, rounds))
+    for r, result in enumerate(results):
+        label = "cold" if r == 0 else "warm"
+        print(
+            f"round {r + 1} ({label}): {result.elapsed:.3f}s wall, {result.counter.multicalls} multicalls, "
+            f"{sum(result.counter.calls.values())} calls, peak memory {result.peak_memory / 2**20:.1f} MiB, "
+            f"{len(result.tips)} tipped queries"
+        )
+        for function, count in sorted(result.counter.calls.items()):
+            print(f"    {function}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+End-to-end reporter benchmark against a local dev chain.
+
+Deploys the test contracts to brownie's development network (ganache), then
+drives a reporter through report_once for a number of rounds, with every
+price source replaced by replayed prices:
+
+- flex: deploys StakingToken, TellorFlex, Autopay & multicall, stakes the
+  reporter and tips a rotating set of catalog queries, one per round, so each
+  round's opportunity is found through the autopay suggestion pipeline.
+- interval: deploys the TellorX oracle & master mocks and reports a rotating
+  datafeed each round.
+
+Measures submissions per minute, seconds from opportunity (tip mined) to
+inclusion (receipt), and RPC calls per report, counting each multicall as
+one call. Like the tests, needs a local account for the chain (80001 for
+flex, 4 for interval) or the PRIVATE_KEY environment variable.
+
+Usage:
+    python scripts/bench_reporter.py --rounds 50 --price-latency 0.05
+    python scripts/bench_reporter.py --reporter interval --prices kraken_eth_usd_historical_price_source.csv
+"""
+import asyncio
+import csv
+import itertools
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import click
+from brownie import accounts
+from brownie import chain
+from brownie import multicall as brownie_multicall
+from brownie import network
+from brownie import project
+from chained_accounts import ChainedAccount
+from chained_accounts import find_accounts
+from multicall import multicall
+from multicall.constants import MULTICALL2_ADDRESSES
+from multicall.constants import MULTICALL_ADDRESSES
+from multicall.constants import Network
+from telliot_core.apps.core import TelliotCore
+from telliot_core.apps.telliot_config import TelliotConfig
+
+from telliot_feeds.datasource import DataSource
+from telliot_feeds.dtypes.datapoint import datetime_now_utc
+from telliot_feeds.dtypes.datapoint import OptionalDataPoint
+from telliot_feeds.feeds import CATALOG_FEEDS
+from telliot_feeds.feeds.eth_usd_feed import eth_usd_median_feed
+from telliot_feeds.feeds.matic_usd_feed import matic_usd_median_feed
+from telliot_feeds.feeds.trb_usd_feed import trb_usd_median_feed
+from telliot_feeds.reporters.interval import IntervalReporter
+from telliot_feeds.reporters.tellorflex import reporter_lock_expiry
+from telliot_feeds.reporters.tellorflex import TellorFlexReporter
+from telliot_feeds.utils.tracing import configure_tracing
+from telliot_feeds.utils.tracing import InMemoryExporter
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Catalog queries tipped in turn, so consecutive reports don't share a query id
+DEFAULT_TAGS = ("mkr-usd-spot", "sushi-usd-spot", "dai-usd-spot", "idle-usd-spot", "usdc-usd-spot")
+
+
+@dataclass
+class ReplaySource(DataSource[float]):
+    """Replays recorded prices in a loop, after a simulated API latency"""
+
+    prices: List[float] = field(default_factory=list)
+    latency: float = 0.0
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self._prices: Iterator[float] = itertools.cycle(self.prices)
+
+    async def fetch_new_datapoint(self) -> OptionalDataPoint[float]:
+        await asyncio.sleep(self.latency)
+        datapoint = (next(self._prices), datetime_now_utc())
+        self.store_datapoint(datapoint)
+        return datapoint
+
+
+def load_prices(path: Optional[Path], count: int = 1000) -> List[float]:
+    """Prices from a CSV with a price column (see generate_price_history_csv.py),
+    or a seeded random walk"""
+    if path is not None:
+        with path.open() as f:
+            return [float(row["price"]) for row in csv.DictReader(f)]
+    rng = random.Random(0)
+    prices = [100.0]
+    for _ in range(count - 1):
+        prices.append(prices[-1] * (1 + rng.gauss(0, 0.001)))
+    return prices
+
+
+class RPCCounter:
+    """Counts JSON-RPC requests made through a web3 instance"""
+
+    def __init__(self, w3: Any) -> None:
+        self.methods: Counter[str] = Counter()
+
+        def counting_middleware(make_request: Any, w3: Any) -> Any:
+            def middleware(method: str, params: Any) -> Any:
+                self.methods[method] += 1
+                return make_request(method, params)
+
+            return middleware
+
+        # Patching the provider's make_request would miss requests, the
+        # provider caches its middleware chain on the first request
+        w3.middleware_onion.add(counting_middleware, name="rpc_counter")
+
+    def reset(self) -> None:
+        self.methods.clear()
+
+
+@dataclass
+class RoundResult:
+    tag: str
+    ok: bool
+    error: Optional[str]
+    # seconds from opportunity to receipt
+    latency: float
+    rpc_calls: Counter[str]
+    multicalls: int
+
+
+def local_config(chain_id: int) -> TelliotConfig:
+    """Telliot config for the local ganache node, as in the tests' conftest"""
+    cfg = TelliotConfig()
+    cfg.main.chain_id = chain_id
+    cfg.get_endpoint().url = "http://127.0.0.1:8545"
+    if not find_accounts(chain_id=chain_id):
+        key = os.getenv("PRIVATE_KEY", None)
+        if not key:
+            raise click.ClickException(f"Need an account for chain {chain_id}, or PRIVATE_KEY set")
+        ChainedAccount.add(f"bench-{chain_id}-key", chains=chain_id, key=key, password="")
+    return cfg
+
+
+def deploy_multicall(deployer: Any) -> None:
+    """Deploy multicall & register its address for the brownie chain"""
+    address = brownie_multicall.deploy({"from": deployer})
+    Network.Brownie = 1337
+    MULTICALL_ADDRESSES[Network.Brownie] = MULTICALL2_ADDRESSES[Network.Brownie] = address.address
+    multicall.state_override_supported = lambda _: False
+
+
+def replay_prices(tags: Tuple[str, ...], prices: List[float], latency: float) -> List[Tuple[Any, DataSource[Any]]]:
+    """Replace the sources of the reported & profit calculation feeds. Returns the original sources."""
+    feeds = [CATALOG_FEEDS[tag] for tag in tags] + [eth_usd_median_feed, matic_usd_median_feed, trb_usd_median_feed]
+    originals = []
+    replaced = set()
+    for feed in feeds:
+        if id(feed) not in replaced:
+            replaced.add(id(feed))
+            originals.append((feed, feed.source))
+            feed.source = ReplaySource(prices=prices, latency=latency)
+    return originals
+
+
+async def run_rounds(
+    reporter: Any, rounds: int, tags: Tuple[str, ...], rpc: RPCCounter, tip: Any = None
+) -> Tuple[List[RoundResult], float]:
+    """Run report_once rounds. Returns their results & the seconds spent reporting."""
+    exporter = InMemoryExporter()
+    previous_exporter = configure_tracing(exporter)
+    results = []
+    reporting_time = 0.0
+    try:
+        for r in range(rounds):
+            tag = tags[r % len(tags)]
+            if isinstance(reporter, TellorFlexReporter):
+                # Wait out the (short) reporter lock, outside of the measured time
+                staker_info, _ = await reporter.staker_cache.get()
+                if staker_info is not None:
+                    await asyncio.sleep(max(reporter_lock_expiry(staker_info) - time.time() + 1, 0))
+                tip(tag)
+            else:
+                reporter.datafeed = CATALOG_FEEDS[tag]
+
+            rpc.reset()
+            exporter.spans.clear()
+            opportunity = time.perf_counter()
+            tx_receipt, status = await reporter.report_once()
+            latency = time.perf_counter() - opportunity
+            reporting_time += latency
+
+            multicalls = len([s for s in exporter.spans if s.name == "multicall"])
+            ok = tx_receipt is not None and status.ok
+            results.append(RoundResult(tag, ok, status.error, latency, Counter(rpc.methods), multicalls))
+    finally:
+        configure_tracing(previous_exporter)
+    return results, reporting_time
+
+
+async def bench_flex(contracts: Any, rounds: int, tags: Tuple[str, ...], stake: float) -> Any:
+    cfg = local_config(80001)
+    chain.mine(10)
+    token = contracts.StakingToken.deploy({"from": accounts[0]})
+    # Reporting lock is checked by the reporter, so the contract's doesn't matter
+    oracle = contracts.TellorFlex.deploy(token.address, accounts[0], 10e18, 1, {"from": accounts[0]})
+    autopay = contracts.Autopay.deploy(oracle.address, token.address, accounts[0], 20, {"from": accounts[0]})
+    deploy_multicall(accounts[0])
+
+    async with TelliotCore(config=cfg) as core:
+        account = core.get_account()
+        flex = core.get_tellorflex_contracts()
+        flex.oracle.address = oracle.address
+        flex.autopay.address = autopay.address
+        flex.token.address = token.address
+        flex.oracle.connect()
+        flex.token.connect()
+        flex.autopay.connect()
+
+        # A large stake keeps the reporter lock (12 hours / # stakes) under a second
+        token.mint(account.address, int(stake * 1e18), {"from": accounts[0]})
+        accounts[0].transfer(account.address, "10 ether")
+        token.mint(accounts[0], int(rounds * 1e18), {"from": accounts[0]})
+        token.approve(autopay.address, int(rounds * 1e18), {"from": accounts[0]})
+
+        def tip(tag: str) -> None:
+            query = CATALOG_FEEDS[tag].query
+            autopay.tip(query.query_id, int(1e18), query.query_data, {"from": accounts[0]})
+
+        reporter = TellorFlexReporter(
+            oracle=flex.oracle,
+            token=flex.token,
+            autopay=flex.autopay,
+            endpoint=core.endpoint,
+            account=account,
+            chain_id=80001,
+            stake=stake,
+            expected_profit="YOLO",
+            transaction_type=0,
+        )
+        rpc = RPCCounter(core.endpoint._web3)
+        # Stake before the measured rounds
+        _ = await reporter.ensure_staked()
+        return await run_rounds(reporter, rounds, tags, rpc, tip=tip)
+
+
+async def bench_interval(contracts: Any, rounds: int, tags: Tuple[str, ...]) -> Any:
+    cfg = local_config(4)
+    chain.mine(10)
+    master = contracts.TellorXMasterMock.deploy({"from": accounts[0]})
+    oracle = contracts.TellorXOracleMock.deploy({"from": accounts[0]})
+
+    async with TelliotCore(config=cfg) as core:
+        account = core.get_account()
+        tellorx = core.get_tellorx_contracts()
+        tellorx.master.address = master.address
+        tellorx.oracle.address = oracle.address
+        tellorx.master.connect()
+        tellorx.oracle.connect()
+        accounts[0].transfer(account.address, "10 ether")
+
+        reporter = IntervalReporter(
+            endpoint=core.endpoint,
+            account=account,
+            master=tellorx.master,
+            oracle=tellorx.oracle,
+            expected_profit="YOLO",
+            transaction_type=0,
+            chain_id=4,
+        )
+        rpc = RPCCounter(core.endpoint._web3)
+        return await run_rounds(reporter, rounds, tags, rpc)
+
+
+def print_results(results: List[RoundResult], reporting_time: float) -> None:
+    submitted = [r for r in results if r.ok]
+    print(f"rounds: {len(results)}, submitted: {len(submitted)}, reporting time: {reporting_time:.3f}s")
+    if not submitted:
+        errors = Counter(r.error for r in results)
+        print(f"no submissions, errors: {dict(errors)}")
+        return
+
+    latencies = sorted(r.latency for r in submitted)
+    p95 = latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+    rpc_calls = [sum(r.rpc_calls.values()) + r.multicalls for r in submitted]
+    print(f"submissions per minute: {60 * len(submitted) / reporting_time:.1f}")
+    print(
+        f"opportunity to inclusion: median {statistics.median(latencies):.3f}s, "
+        f"p95 {p95:.3f}s, max {latencies[-1]:.3f}s"
+    )
+    print(
+        f"RPC calls per report: mean {statistics.mean(rpc_calls):.1f} "
+        f"(multicalls {statistics.mean(r.multicalls for r in submitted):.1f})"
+    )
+    methods: Counter[str] = Counter()
+    for r in submitted:
+        methods.update(r.rpc_calls)
+    for method, count in methods.most_common():
+        print(f"    {method}: {count / len(submitted):.1f}")
+
+
+@click.command()
+@click.option("--reporter", "reporter_type", type=click.Choice(["flex", "interval"]), default="flex")
+@click.option("--rounds", type=int, default=20, help="number of report_once rounds")
+@click.option("--tags", "tags", multiple=True, default=DEFAULT_TAGS, help="catalog query tags reported in turn")
+@click.option("--prices", type=click.Path(exists=True, dir_okay=False, path_type=Path), help="CSV of replayed prices")
+@click.option("--price-latency", type=float, default=0.0, help="simulated seconds per price source request")
+@click.option("--stake", type=float, default=1e6, help="reporter stake in TRB (flex)")
+def main(
+    reporter_type: str,
+    rounds: int,
+    tags: Tuple[str, ...],
+    prices: Optional[Path],
+    price_latency: float,
+    stake: float,
+) -> None:
+    """Benchmark a reporter end to end against a local dev chain."""
+    contracts = project.load(str(ROOT), name="TelliotFeedsBench")
+    network.connect("development")
+    originals = replay_prices(tags, load_prices(prices), price_latency)
+    try:
+        if reporter_type == "flex":
+            results, reporting_time = asyncio.run(bench_flex(contracts, rounds, tags, stake))
+        else:
+            results, reporting_time = asyncio.run(bench_interval(contracts, rounds, tags))
+    finally:
+        for feed, source in originals:
+            feed.source = source
+        network.disconnect()
+
+    print(f"reporter: {reporter_type}, replayed price latency: {price_latency}s")
+    print_results(results, reporting_time)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import getpass
+from pathlib import Path
 from typing import Any
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 import click
@@ -15,13 +17,23 @@ from telliot_feeds.cli.utils import valid_diva_chain
 from telliot_feeds.datafeed import DataFeed
 from telliot_feeds.feeds import CATALOG_FEEDS
 from telliot_feeds.feeds.tellor_rng_feed import assemble_rng_datafeed
+from telliot_feeds.feeds.tellor_rng_feed import local_source as rng_source
 from telliot_feeds.integrations.diva_protocol.report import DIVAProtocolReporter
 from telliot_feeds.queries.query_catalog import query_catalog
+from telliot_feeds.reporters.autopay_scanner import AutopayScanner
+from telliot_feeds.reporters.autopay_scanner import ScanTable
 from telliot_feeds.reporters.flashbot import FlashbotsReporter
 from telliot_feeds.reporters.interval import IntervalReporter
 from telliot_feeds.reporters.rng_interval import RNGReporter
+from telliot_feeds.reporters.scheduler import ReportScheduler
+from telliot_feeds.reporters.supervisor import ReporterSupervisor
 from telliot_feeds.reporters.tellorflex import TellorFlexReporter
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import serve_metrics
+from telliot_feeds.utils.profiler import profile_reporter
+from telliot_feeds.utils.tracing import configure_tracing
+from telliot_feeds.utils.tracing import FileExporter
+from telliot_feeds.utils.tx_replacer import BumpPolicy
 
 
 logger = get_logger(__name__)
@@ -202,6 +214,77 @@ def reporter() -> None:
     type=int,
     default=7,
 )
+@click.option(
+    "--gas-bump-interval",
+    "-gbi",
+    "gas_bump_interval",
+    help="seconds to wait for a report transaction to be mined before resending it with higher fees",
+    nargs=1,
+    type=float,
+    default=30.0,
+)
+@click.option(
+    "--max-gas-bumps",
+    "-mgb",
+    "max_gas_bumps",
+    help="max times to resend a pending report transaction with higher fees (0 to disable)",
+    nargs=1,
+    type=int,
+    default=3,
+)
+@click.option(
+    "--simulate",
+    "simulate",
+    help="simulate report transactions before sending them, skipping reports that would revert",
+    is_flag=True,
+)
+@click.option(
+    "--bundle-blocks",
+    "bundle_blocks",
+    help="number of consecutive blocks to target with each Flashbots bundle",
+    nargs=1,
+    type=click.IntRange(min=1),
+    default=3,
+)
+@click.option(
+    "--flashbots-relay",
+    "relay_uris",
+    help="Flashbots relay URI to send bundles to (repeatable, defaults to FLASHBOTS_HTTP_PROVIDER_URI)",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--metrics-port",
+    "metrics_port",
+    help="serve Prometheus metrics at http://127.0.0.1:<port>/metrics",
+    nargs=1,
+    type=int,
+    required=False,
+)
+@click.option(
+    "--trace-file",
+    "trace_file",
+    help="append tracing spans of each report attempt to a file, as JSON lines",
+    nargs=1,
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=False,
+)
+@click.option(
+    "--profile",
+    "profile_iterations",
+    help="profile this many report attempts, then exit, writing flamegraph-ready profiles & a summary",
+    nargs=1,
+    type=click.IntRange(min=1),
+    required=False,
+)
+@click.option(
+    "--profile-output",
+    "profile_output",
+    help="path prefix of the profile files",
+    nargs=1,
+    type=str,
+    default="telliot-profile",
+)
 @click.option(
     "--rng-timestamp",
     "-rngts",
@@ -210,6 +293,12 @@ def reporter() -> None:
     nargs=1,
     type=int,
 )
+@click.option(
+    "--rng-eth-block-from-node/--rng-eth-block-from-etherscan",
+    "rng_eth_block_from_node",
+    help="find Tellor RNG's ETH block with a local index of the mainnet node's blocks, or with Etherscan's API",
+    default=True,
+)
 @click.option(
     "--diva-protocol",
     "-dpt",
@@ -217,6 +306,29 @@ def reporter() -> None:
     help="Report & settle DIVA Protocol derivative pools",
     default=False,
 )
+@click.option(
+    "--scan-table",
+    "-st",
+    "scan_table",
+    help="use tip suggestions from a file written by the scan command instead of scanning autopay",
+    nargs=1,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    required=False,
+)
+@click.option(
+    "--worker-account",
+    "-wa",
+    "worker_accounts",
+    help="name of an additional account to report with from this process (repeatable, TellorFlex chains only)",
+    multiple=True,
+    type=str,
+)
+@click.option(
+    "--scheduled",
+    "scheduled",
+    help="report when the reporter lock expires, choosing the most profitable query (TellorFlex chains only)",
+    is_flag=True,
+)
 @click.option("--rng-auto/--rng-auto-off", default=False)
 @click.option("--submit-once/--submit-continuous", default=False)
 @click.option("-pwd", "--password", type=str)
@@ -235,12 +347,25 @@ async def report(
     expected_profit: str,
     submit_once: bool,
     wait_period: int,
+    gas_bump_interval: float,
+    max_gas_bumps: int,
+    simulate: bool,
+    bundle_blocks: int,
+    relay_uris: Tuple[str, ...],
+    metrics_port: Optional[int],
+    trace_file: Optional[Path],
+    profile_iterations: Optional[int],
+    profile_output: str,
     gas_price_speed: str,
     reporting_diva_protocol: bool,
     rng_timestamp: int,
+    rng_eth_block_from_node: bool,
     password: str,
     signature_password: str,
     rng_auto: bool,
+    scan_table: Optional[Path],
+    worker_accounts: Tuple[str, ...],
+    scheduled: bool,
 ) -> None:
     """Report values to Tellor oracle"""
     # Ensure valid user input for expected profit
@@ -250,6 +375,20 @@ async def report(
 
     assert tx_type in (0, 2)
 
+    rng_source.eth_block_from_node = rng_eth_block_from_node
+
+    if worker_accounts and (rng_auto or reporting_diva_protocol or rng_timestamp is not None):
+        click.echo("Worker accounts are only supported for TellorFlex autopay & query tag reporting")
+        return
+
+    if worker_accounts and profile_iterations is not None:
+        click.echo("Profiling is only supported when reporting with one account")
+        return
+
+    if scheduled and (worker_accounts or rng_auto or reporting_diva_protocol or rng_timestamp is not None):
+        click.echo("Scheduled reporting is only supported for single account TellorFlex autopay & query tag reporting")
+        return
+
     name = ctx.obj["ACCOUNT_NAME"]
     sig_acct_name = ctx.obj["SIGNATURE_ACCOUNT_NAME"]
 
@@ -284,6 +423,10 @@ async def report(
 
         cid = core.config.main.chain_id
 
+        if scheduled and cid not in TELLOR_FLEX_CHAINS:
+            click.echo("Scheduled reporting is only supported on TellorFlex chains")
+            return
+
         # If we need to build a datafeed
         if build_feed:
             chosen_feed = build_feed_from_input()
@@ -326,6 +469,12 @@ async def report(
 
         _ = input("Press [ENTER] to confirm settings.")
 
+        if metrics_port is not None:
+            # Runs in the background until the reporter exits
+            _ = await serve_metrics(metrics_port)
+        if trace_file is not None:
+            configure_tracing(FileExporter(trace_file))
+
         common_reporter_kwargs = {
             "endpoint": core.endpoint,
             "account": account,
@@ -337,6 +486,8 @@ async def report(
             "legacy_gas_price": legacy_gas_price,
             "gas_price_speed": gas_price_speed,
             "chain_id": cid,
+            "bump_policy": BumpPolicy(interval=gas_bump_interval, max_bumps=max_gas_bumps),
+            "simulate": simulate,
         }
 
         # Report to Polygon TellorFlex
@@ -368,6 +519,38 @@ async def report(
                     wait_period=wait_period,
                     **common_reporter_kwargs,
                 )  # type: ignore
+            elif worker_accounts:
+                accounts = [account]
+                for worker_name in worker_accounts:
+                    found = find_accounts(name=worker_name, chain_id=cid)
+                    if not found:
+                        click.echo(f"No account named {worker_name} found for chain ID: {cid}")
+                        return
+                    worker_account = found[0]
+                    if not worker_account.is_unlocked:
+                        worker_account.unlock(getpass.getpass(f"Enter password for {worker_name} keyfile: "))
+                    accounts.append(worker_account)
+
+                reporters = [
+                    TellorFlexReporter(
+                        oracle=tellorflex.oracle,
+                        token=tellorflex.token,
+                        autopay=tellorflex.autopay,
+                        stake=stake,
+                        expected_profit=expected_profit,
+                        wait_period=wait_period,
+                        **{**common_reporter_kwargs, "account": acct},
+                    )
+                    for acct in accounts
+                ]
+                # One autopay index shared by all accounts
+                scanner = ScanTable(scan_table) if scan_table else AutopayScanner([tellorflex.autopay])
+                supervisor = ReporterSupervisor(reporters, scanner=scanner)
+                if submit_once:
+                    await supervisor.report_once()
+                else:
+                    await supervisor.run()
+                return
             else:
                 reporter = TellorFlexReporter(
                     oracle=tellorflex.oracle,
@@ -376,6 +559,7 @@ async def report(
                     stake=stake,
                     expected_profit=expected_profit,
                     wait_period=wait_period,
+                    scanner=ScanTable(scan_table) if scan_table else None,
                     **common_reporter_kwargs,
                 )  # type: ignore
         # Report to TellorX
@@ -389,14 +573,24 @@ async def report(
             }
 
             if sig_acct_addr != "":
+                # Bundles aren't resent with higher fees, & are simulated with eth_callBundle instead
+                del tellorx_reporter_kwargs["bump_policy"]
+                del tellorx_reporter_kwargs["simulate"]
                 reporter = FlashbotsReporter(
                     **tellorx_reporter_kwargs,
                     signature_account=sig_account,
+                    target_blocks=bundle_blocks,
+                    relay_uris=relay_uris,
                 )  # type: ignore
             else:
                 reporter = IntervalReporter(**tellorx_reporter_kwargs)  # type: ignore
 
-        if submit_once:
+        if profile_iterations is not None:
+            _ = await profile_reporter(reporter, profile_iterations, profile_output)
+        elif submit_once:
             _, _ = await reporter.report_once()
+        elif scheduled and isinstance(reporter, TellorFlexReporter):
+            scheduler = ReportScheduler(reporter, query_tags=[query_tag] if query_tag else [])
+            await scheduler.run()
         else:
             await reporter.report()
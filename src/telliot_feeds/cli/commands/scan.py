@@ -0,0 +1,83 @@
+from pathlib import Path
+from typing import Optional
+from typing import Tuple
+
+import click
+from telliot_core.apps.telliot_config import TelliotConfig
+from telliot_core.cli.utils import async_run
+from telliot_core.tellor.tellorflex.autopay import TellorFlexAutopayContract
+from telliot_core.utils.home import default_homedir
+
+from telliot_feeds.reporters.autopay_scanner import AutopayScanner
+from telliot_feeds.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+
+@click.command()
+@click.option(
+    "--chain-id",
+    "-cid",
+    "chain_ids",
+    help="chain ID to scan autopay on (repeatable)",
+    type=int,
+    multiple=True,
+    required=True,
+)
+@click.option(
+    "--scan-period",
+    "-sp",
+    "scan_period",
+    help="seconds between scans of each chain",
+    nargs=1,
+    type=int,
+    default=7,
+)
+@click.option(
+    "--gas-limit",
+    "-gl",
+    "gas_limit",
+    help="gas limit used to estimate report costs",
+    nargs=1,
+    type=int,
+    default=350000,
+)
+@click.option(
+    "--output",
+    "-o",
+    "output",
+    help="file to write the ranked tip table to (default: autopay_scan.json in telliot home)",
+    nargs=1,
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=False,
+)
+@async_run
+async def scan(
+    chain_ids: Tuple[int, ...],
+    scan_period: int,
+    gas_limit: int,
+    output: Optional[Path],
+) -> None:
+    """Scan autopay on several chains for tipped queries."""
+    cfg = TelliotConfig()
+
+    autopays = []
+    for chain_id in chain_ids:
+        endpoints = cfg.endpoints.find(chain_id=chain_id)
+        if not endpoints:
+            click.echo(f"No endpoint configured for chain ID: {chain_id}")
+            return
+        endpoint = endpoints[0]
+        if not endpoint.connect():
+            click.echo(f"Unable to connect to endpoint for chain ID: {chain_id}")
+            return
+
+        autopay = TellorFlexAutopayContract(node=endpoint)
+        autopay.connect()
+        autopays.append(autopay)
+
+    output_path = output or default_homedir() / "autopay_scan.json"
+    click.echo(f"Writing ranked tips to: {output_path}")
+
+    scanner = AutopayScanner(autopays, scan_period=scan_period, gas_limit=gas_limit, output_path=output_path)
+    await scanner.run()
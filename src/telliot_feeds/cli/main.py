@@ -11,6 +11,7 @@ from click.core import Context
 from telliot_feeds.cli.commands.catalog import catalog
 from telliot_feeds.cli.commands.query import query
 from telliot_feeds.cli.commands.report import report
+from telliot_feeds.cli.commands.scan import scan
 from telliot_feeds.cli.commands.settle import settle
 
 # from telliot_feeds.cli.commands.tip import tip
@@ -65,6 +66,7 @@ main.add_command(report)
 main.add_command(query)
 main.add_command(catalog)
 main.add_command(settle)
+main.add_command(scan)
 
 if __name__ == "__main__":
     main()
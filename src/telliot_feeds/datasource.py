@@ -60,6 +60,15 @@ class DataSource(Generic[T], Base):
         """Fetch new value and store it for later retrieval"""
         raise NotImplementedError
 
+    async def fetch_fresh_datapoint(self, max_age: float) -> OptionalDataPoint[T]:
+        """Return the latest datapoint if it's less than max_age seconds old,
+        otherwise fetch a new one"""
+        v, t = self.latest
+        if v is not None and t is not None:
+            if (datetime_now_utc() - t).total_seconds() < max_age:
+                return v, t
+        return await self.fetch_new_datapoint()
+
     @property
     def depth(self) -> int:
         return len(self._history)
@@ -4,7 +4,9 @@
 # EIP-1559 subbport by @lekhovitsky
 # https://github.com/lekhovitsky
 # type: ignore
+from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Union
 
 from eth_account.signers.local import LocalAccount
@@ -14,24 +16,31 @@ from web3._utils.module import attach_modules
 
 from .flashbots import Flashbots
 from .middleware import construct_flashbots_middleware
+from .provider import DEFAULT_FLASHBOTS_RELAY  # noqa: F401
 from .provider import FlashbotProvider
 
 
-DEFAULT_FLASHBOTS_RELAY = "https://relay.flashbots.net"
-
-
 def flashbot(
     w3: Web3,
     signature_account: LocalAccount,
-    endpoint_uri: Optional[Union[URI, str]] = None,
-):
+    endpoint_uri: Optional[Union[URI, str, Sequence[Union[URI, str]]]] = None,
+) -> List[FlashbotProvider]:
     """
     Injects the flashbots module and middleware to w3.
-    """
 
-    flashbots_provider = FlashbotProvider(signature_account, endpoint_uri)
-    flash_middleware = construct_flashbots_middleware(flashbots_provider)
+    Given several relay URIs, returns a provider for each, each signing
+    its own requests. The module's requests go to the first relay.
+    """
+    if endpoint_uri is None or isinstance(endpoint_uri, str):
+        endpoint_uris = [endpoint_uri]
+    else:
+        # The providers fall back to the default relays given none
+        endpoint_uris = list(endpoint_uri) or [None]
+
+    flashbots_providers = [FlashbotProvider(signature_account, uri) for uri in endpoint_uris]
+    flash_middleware = construct_flashbots_middleware(flashbots_providers[0])
     w3.middleware_onion.add(flash_middleware)
 
     # attach modules to add the new namespace commands
     attach_modules(w3, {"flashbots": (Flashbots,)})
+    return flashbots_providers
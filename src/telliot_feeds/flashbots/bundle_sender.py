@@ -0,0 +1,194 @@
+"""Multi-block Flashbots bundle submission.
+
+A bundle is only valid for the block it targets, so sending it for the
+next block alone misses whenever that block's builder leaves it out.
+The sender submits one signed bundle for a range of target blocks
+concurrently, then follows new blocks until the bundle's transaction is
+mined. Bundles for the remaining targets can't be included after that,
+since they reuse its nonce, and sends still in flight are cancelled.
+Given several relays, the bundle goes to all of them, so inclusion
+doesn't depend on any one relay being up.
+
+Bundles are simulated with the relay's `eth_callBundle` first, so ones
+that would revert, or cost more than they earn, aren't sent at all.
+Simulations are cached per (bundle hash, block).
+"""
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlparse
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from telliot_feeds.utils.block_watcher import BlockWatcher
+from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import RELAY_BUNDLES_ACCEPTED
+from telliot_feeds.utils.metrics import RELAY_BUNDLES_INCLUDED
+from telliot_feeds.utils.metrics import RELAY_BUNDLES_REJECTED
+from telliot_feeds.utils.metrics import RELAY_REQUEST_SECONDS
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BundleSimulation:
+    """Outcome of a bundle simulated on top of a block."""
+
+    bundle_hash: str
+    block: int
+    gas_used: int
+    # Wei paid to the block's miner
+    coinbase_diff: int
+    # Wei paid by the bundle's senders, in gas fees & direct payments to the miner
+    cost: int
+    # Error of the first failing transaction, None if none fail
+    error: Optional[str] = None
+
+
+def parse_simulation(bundle_hash: str, block: int, result: Any) -> BundleSimulation:
+    """BundleSimulation from an `eth_callBundle` result."""
+    txs = result["results"]
+    error = None
+    for tx in txs:
+        if tx.get("error"):
+            revert = tx.get("revert")
+            error = f"{tx['error']}: {revert}" if revert else str(tx["error"])
+            break
+    return BundleSimulation(
+        bundle_hash=bundle_hash,
+        block=block,
+        gas_used=sum(int(tx["gasUsed"]) for tx in txs),
+        coinbase_diff=int(result["coinbaseDiff"]),
+        cost=sum(int(tx.get("gasFees", 0)) + int(tx.get("ethSentToCoinbase", 0)) for tx in txs),
+        error=error,
+    )
+
+
+def relay_name(relay: Any) -> str:
+    """Metric label of a relay provider."""
+    return urlparse(str(relay.endpoint_uri)).netloc or str(relay.endpoint_uri)
+
+
+class BundleSender:
+    """Sends bundles to relays, through a web3 instance with the flashbots module attached.
+
+    `relays` are the FlashbotProviders returned by `flashbot()`."""
+
+    def __init__(
+        self,
+        w3: Web3,
+        blocks: BlockWatcher,
+        relays: List[Any],
+        target_blocks: int = 3,
+        max_simulations: int = 256,
+    ) -> None:
+        if target_blocks < 1:
+            raise ValueError("target_blocks must be at least 1")
+        if not relays:
+            raise ValueError("at least one relay is required")
+        self.w3 = w3
+        # Module attached by `flashbot()`, unknown to web3's types
+        self.flashbots: Any = getattr(w3, "flashbots")  # noqa: B009
+        self.relays = relays
+        self.blocks = blocks
+        self.target_blocks = target_blocks
+        self.max_simulations = max_simulations
+        # key: (bundle hash, block simulated on top of)
+        self.simulations: "OrderedDict[Tuple[str, int], BundleSimulation]" = OrderedDict()
+
+    def bundle_hash(self, signed_txs: List[HexBytes]) -> str:
+        """Hash of the concatenated transaction hashes, as computed by the relay."""
+        return str(self.w3.keccak(b"".join(self.w3.keccak(tx) for tx in signed_txs)).hex())
+
+    async def simulate(self, signed_txs: List[HexBytes], block: int) -> Optional[BundleSimulation]:
+        """Simulate a bundle in the block after `block`, on top of its state.
+
+        Returns None if the simulation itself fails."""
+        key = (self.bundle_hash(signed_txs), block)
+        if key in self.simulations:
+            self.simulations.move_to_end(key)
+            return self.simulations[key]
+
+        try:
+            timestamp = await asyncio.to_thread(self.flashbots.extrapolate_timestamp, block + 1, block)
+            result = await asyncio.to_thread(
+                self.flashbots.call_bundle, signed_txs, hex(block + 1), hex(block), timestamp
+            )
+            simulation = parse_simulation(key[0], block, result)
+        except Exception as e:
+            logger.warning(f"Unable to simulate bundle: {e}")
+            return None
+
+        self.simulations[key] = simulation
+        if len(self.simulations) > self.max_simulations:
+            self.simulations.popitem(last=False)
+        return simulation
+
+    async def _send(self, relay: Any, signed_txs: List[HexBytes], target_block: int) -> bool:
+        """Send a bundle to a relay for one target block, returning whether the relay accepted it."""
+        name = relay_name(relay)
+        params = self.flashbots.send_raw_bundle_munger(signed_txs, target_block)
+        try:
+            with RELAY_REQUEST_SECONDS.time(name):
+                response = await asyncio.to_thread(relay.make_request, "eth_sendBundle", params)
+            if "error" in response:
+                raise ValueError(response["error"])
+        except Exception as e:
+            RELAY_BUNDLES_REJECTED.inc(name)
+            logger.warning(f"Relay {name} rejected bundle for block {target_block}: {e}")
+            return False
+        RELAY_BUNDLES_ACCEPTED.inc(name)
+        logger.debug(f"Relay {name} accepted bundle for block {target_block}")
+        return True
+
+    async def _receipt(self, tx_hash: HexBytes) -> Optional[Any]:
+        try:
+            return await asyncio.to_thread(self.w3.eth.get_transaction_receipt, tx_hash)
+        except TransactionNotFound:
+            return None
+
+    async def send(self, signed_txs: List[HexBytes], block: int) -> Optional[Any]:
+        """Send a bundle for the `target_blocks` blocks after `block`.
+
+        Returns the receipt of the bundle's first transaction, or None if
+        no target block included it."""
+        tx_hash = self.w3.keccak(signed_txs[0])
+        first_target, last_target = block + 1, block + self.target_blocks
+        # (relay, target block) -> send
+        sends: Dict[Tuple[int, int], "asyncio.Task[bool]"] = {
+            (i, target): asyncio.create_task(self._send(relay, signed_txs, target))
+            for target in range(first_target, last_target + 1)
+            for i, relay in enumerate(self.relays)
+        }
+        logger.info(f"Bundle sent to {len(self.relays)} relay(s) for blocks {first_target} to {last_target}")
+
+        try:
+            latest = block
+            while latest < last_target:
+                latest = await self.blocks.wait_for_block(after=latest)
+                receipt = await self._receipt(tx_hash)
+                if receipt is not None:
+                    included_in = receipt["blockNumber"]
+                    logger.info(f"Bundle included in block {included_in}")
+                    # Credit the relays that accepted the bundle for that block
+                    for i, relay in enumerate(self.relays):
+                        send = sends.get((i, included_in))
+                        if send is not None and send.done() and not send.cancelled() and send.result():
+                            RELAY_BUNDLES_INCLUDED.inc(relay_name(relay))
+                    return receipt
+                if all(s.done() for s in sends.values()) and not any(s.result() for s in sends.values()):
+                    logger.warning("Relays rejected the bundle for all target blocks")
+                    return None
+            logger.info(f"Bundle not included in blocks {first_target} to {last_target}")
+            return None
+        finally:
+            for s in sends.values():
+                s.cancel()
@@ -7,6 +7,7 @@
 import logging
 import os
 from typing import Any
+from typing import List
 from typing import Optional
 from typing import Union
 
@@ -21,11 +22,20 @@ from web3.types import RPCEndpoint
 from web3.types import RPCResponse
 
 
+DEFAULT_FLASHBOTS_RELAY = "https://relay.flashbots.net"
+
+
 def get_default_endpoint() -> URI:
-    return URI(
-        os.environ.get("FLASHBOTS_HTTP_PROVIDER_URI", "https://relay.flashbots.net")
-        # os.environ.get("FLASHBOTS_HTTP_PROVIDER_URI", "https://bundle.miningdao.io/")
-    )
+    return get_default_endpoints()[0]
+
+
+def get_default_endpoints() -> List[URI]:
+    """Relay URIs from FLASHBOTS_HTTP_PROVIDER_URI, comma separated, e.g.
+    "https://relay.flashbots.net,https://bundle.miningdao.io/".
+
+    Falls back to the Flashbots relay if it lists none."""
+    uris = os.environ.get("FLASHBOTS_HTTP_PROVIDER_URI", "")
+    return [URI(uri.strip()) for uri in uris.split(",") if uri.strip()] or [URI(DEFAULT_FLASHBOTS_RELAY)]
 
 
 class FlashbotProvider(HTTPProvider):
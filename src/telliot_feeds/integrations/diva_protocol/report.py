@@ -7,7 +7,6 @@ from typing import Any
 from typing import Optional
 from typing import Tuple
 
-from eth_utils import to_checksum_address
 from telliot_core.tellor.tellorflex.diva import DivaOracleTellorContract
 from telliot_core.utils.key_helpers import lazy_unlock_account
 from telliot_core.utils.response import error_status
@@ -26,6 +25,9 @@ from telliot_feeds.integrations.diva_protocol.utils import update_reported_pools
 from telliot_feeds.queries.diva_protocol import DIVAProtocol
 from telliot_feeds.reporters.tellorflex import TellorFlexReporter
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import timed
+from telliot_feeds.utils.tracing import traced
+from telliot_feeds.utils.tx_template import submit_template
 
 
 logger = get_logger(__name__)
@@ -162,11 +164,15 @@ class DIVAProtocolReporter(TellorFlexReporter):
         update_reported_pools(pools=reported_pools)
         return ResponseStatus()
 
+    @traced("report_once")
     async def report_once(
         self,
     ) -> Tuple[Optional[AttributeDict[Any, Any]], ResponseStatus]:
         """Report query response to a TellorFlex oracle."""
-        staked, status = await self.ensure_staked()
+        # Read contract state at a single block for this report attempt
+        self.reader.pin()
+
+        staked, status = await timed("ensure_staked", self.ensure_staked())
         if not staked or not status.ok:
             logger.warning(status.error)
             return None, status
@@ -176,7 +182,7 @@ class DIVAProtocolReporter(TellorFlexReporter):
         # if not status.ok:
         #     return None, status
 
-        datafeed = await self.fetch_datafeed()
+        datafeed = await timed("fetch_datafeed", self.fetch_datafeed())
         if not datafeed:
             msg = "Unable to fetch DIVA Protocol datafeed."
             return None, error_status(note=msg, log=logger.info)
@@ -185,10 +191,8 @@ class DIVAProtocolReporter(TellorFlexReporter):
 
         status = ResponseStatus()
 
-        address = to_checksum_address(self.account.address)
-
         # Update datafeed value
-        latest_data = await datafeed.source.fetch_new_datapoint()
+        latest_data = await timed("fetch_value", datafeed.source.fetch_new_datapoint())
         if latest_data[0] is None:
             msg = "Unable to retrieve updated datafeed value."
             return None, error_status(msg, log=logger.info)
@@ -196,7 +200,6 @@ class DIVAProtocolReporter(TellorFlexReporter):
         # Get query info & encode value to bytes
         query = datafeed.query
         query_id = query.query_id
-        query_data = query.query_data
         try:
             value = query.value_type.encode(latest_data[0])
         except Exception as e:
@@ -213,72 +216,94 @@ class DIVAProtocolReporter(TellorFlexReporter):
             return None, status
 
         # Start transaction build
-        submit_val_func = self.oracle.contract.get_function_by_name("submitValue")
-        submit_val_tx = submit_val_func(
-            _queryId=query_id,
-            _value=value,
-            _nonce=report_count,
-            _queryData=query_data,
-        )
-        acc_nonce = self.endpoint._web3.eth.get_transaction_count(address)
-
-        # Add transaction type 2 (EIP-1559) data
-        if self.transaction_type == 2:
-            logger.info(f"maxFeePerGas: {self.max_fee}")
-            logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
-
-            built_submit_val_tx = submit_val_tx.buildTransaction(
-                {
-                    "nonce": acc_nonce,
-                    "gas": self.gas_limit,
-                    "maxFeePerGas": Web3.toWei(self.max_fee, "gwei"),  # type: ignore
-                    # TODO: Investigate more why etherscan txs using Flashbots have
-                    # the same maxFeePerGas and maxPriorityFeePerGas. Example:
-                    # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
-                    "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
-                    "chainId": self.chain_id,
-                }
-            )
-        # Add transaction type 0 (legacy) data
-        else:
-            # Fetch legacy gas price if not provided by user
-            if not self.legacy_gas_price:
-                gas_price = await self.fetch_gas_price(self.gas_price_speed)
-                if not gas_price:
-                    note = "Unable to fetch gas price for tx type 0"
-                    return None, error_status(note, log=logger.warning)
+        template = submit_template(self.chain_id, self.oracle, query)
+        acc_nonce = await self.get_account_nonce()
+
+        try:
+            # Add transaction type 2 (EIP-1559) data
+            if self.transaction_type == 2:
+                logger.info(f"maxFeePerGas: {self.max_fee}")
+                logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
+
+                built_submit_val_tx = template.build(
+                    value,
+                    report_count,
+                    {
+                        "nonce": acc_nonce,
+                        "gas": self.gas_limit,
+                        "maxFeePerGas": Web3.toWei(self.max_fee, "gwei"),  # type: ignore
+                        # TODO: Investigate more why etherscan txs using Flashbots have
+                        # the same maxFeePerGas and maxPriorityFeePerGas. Example:
+                        # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
+                        "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
+                        "chainId": self.chain_id,
+                    },
+                )
+            # Add transaction type 0 (legacy) data
             else:
-                gas_price = self.legacy_gas_price
-
-            built_submit_val_tx = submit_val_tx.buildTransaction(
-                {
-                    "nonce": acc_nonce,
-                    "gas": self.gas_limit,
-                    "gasPrice": Web3.toWei(gas_price, "gwei"),
-                    "chainId": self.chain_id,
-                }
-            )
+                # Fetch legacy gas price if not provided by user
+                if not self.legacy_gas_price:
+                    gas_price = await self.fetch_gas_price(self.gas_price_speed)
+                    if not gas_price:
+                        self.nonces.release(acc_nonce)
+                        note = "Unable to fetch gas price for tx type 0"
+                        return None, error_status(note, log=logger.warning)
+                else:
+                    gas_price = self.legacy_gas_price
+
+                built_submit_val_tx = template.build(
+                    value,
+                    report_count,
+                    {
+                        "nonce": acc_nonce,
+                        "gas": self.gas_limit,
+                        "gasPrice": Web3.toWei(gas_price, "gwei"),
+                        "chainId": self.chain_id,
+                    },
+                )
 
-        lazy_unlock_account(self.account)
-        local_account = self.account.local_account
-        tx_signed = local_account.sign_transaction(built_submit_val_tx)
+            sim_status = await self.simulate_report(built_submit_val_tx, query_id, report_count)
+            if not sim_status.ok:
+                self.nonces.release(acc_nonce)
+                return None, sim_status
+
+            lazy_unlock_account(self.account)
+            local_account = self.account.local_account
+            tx_signed = local_account.sign_transaction(built_submit_val_tx)
+        except Exception as e:
+            # Don't leave a gap before the next nonce
+            self.nonces.release(acc_nonce, e)
+            raise
 
         try:
             logger.debug("Sending submitValue transaction")
             tx_hash = self.endpoint._web3.eth.send_raw_transaction(tx_signed.rawTransaction)
         except Exception as e:
+            self.nonces.release(acc_nonce, e)
             note = "Send transaction failed"
             return None, error_status(note, log=logger.error, e=e)
+        self.nonces.sent(acc_nonce, tx_hash.hex())
 
-        # Confirm submitValue transaction
+        # Confirm submitValue transaction, bumping fees while it's pending
         try:
-            tx_receipt = self.endpoint._web3.eth.wait_for_transaction_receipt(tx_hash, timeout=360)
-            tx_url = f"{self.endpoint.explorer}/tx/{tx_hash.hex()}"
+            tx_receipt, cancelled = await self.wait_for_report(
+                local_account, built_submit_val_tx, tx_hash.hex(), query_id, report_count
+            )
+            self.nonces.confirmed(acc_nonce)
+            self.staker_cache.update_from_receipt(tx_receipt)
+            tx_url = f"{self.endpoint.explorer}/tx/{Web3.toHex(tx_receipt['transactionHash'])}"
+
+            if cancelled:
+                msg = f"Report cancelled, another report for the query was included first: {tx_url}"
+                return None, error_status(msg, log=logger.info)
 
             if tx_receipt["status"] == 0:
                 msg = f"Transaction reverted: {tx_url}"
                 return tx_receipt, error_status(msg, log=logger.error)
         except Exception as e:
+            # The report may still be mined, or was dropped leaving a nonce gap
+            self.staker_cache.invalidate()
+            self.nonces.resync()
             note = "Failed to confirm transaction"
             return None, error_status(note, log=logger.error, e=e)
 
@@ -296,6 +321,7 @@ class DIVAProtocolReporter(TellorFlexReporter):
 
     async def report(self) -> None:
         """Report values for pool reference assets & settle pools."""
+        await self.recover_pending_txs()
         while True:
             _, _ = await self.report_once()
             _ = await self.settle_pools()
@@ -6,6 +6,7 @@ from typing import Dict
 import requests
 
 from telliot_feeds.dtypes.datapoint import OptionalDataPoint
+from telliot_feeds.utils.tracing import span
 
 
 class PriceServiceInterface(ABC):
@@ -58,9 +59,11 @@ class WebPriceService(PriceServiceInterface, ABC):
 
         request_url = self.url + url
 
-        with requests.Session() as s:
+        with requests.Session() as s, span("http.get", service=self.name, url=self.url) as http_span:
             try:
                 r = s.get(request_url, timeout=self.timeout)
+                if http_span is not None:
+                    http_span.set_attribute("http.status_code", r.status_code)
                 json_data = r.json()
                 return {"response": json_data}
 
@@ -0,0 +1,210 @@
+"""Multi-chain autopay scanner
+
+Watches Autopay contracts on several chains concurrently, one task per
+chain, each using its own chain's RPC endpoint. Keeps a ranked table of
+tipped queries that reporters can consume instead of rescanning autopay.
+"""
+import asyncio
+import json
+from dataclasses import asdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from telliot_core.tellor.tellorflex.autopay import TellorFlexAutopayContract
+from telliot_core.utils.timestamp import TimeStamp
+
+from telliot_feeds.datafeed import DataFeed
+from telliot_feeds.feeds import CATALOG_FEEDS
+from telliot_feeds.feeds.eth_usd_feed import eth_usd_median_feed
+from telliot_feeds.feeds.matic_usd_feed import matic_usd_median_feed
+from telliot_feeds.feeds.trb_usd_feed import trb_usd_median_feed
+from telliot_feeds.reporters.reporter_autopay_utils import get_combined_tips
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# USD price feeds of each chain's gas token, used to estimate report costs
+GAS_TOKEN_FEEDS: Dict[int, DataFeed[float]] = {
+    1: eth_usd_median_feed,
+    69: eth_usd_median_feed,
+    137: matic_usd_median_feed,
+    80001: matic_usd_median_feed,
+    421611: eth_usd_median_feed,
+}
+
+# Max age (seconds) of token prices reused across chain scans
+PRICE_MAX_AGE = 60
+
+
+@dataclass
+class TipOpportunity:
+    """A tipped query on a chain"""
+
+    chain_id: int
+    query_tag: str
+    tip: int
+    # None if the chain's gas token price or gas price is unavailable
+    profit_usd: Optional[float]
+    timestamp: int
+
+
+class AutopayScanner:
+    """Scans Autopay contracts on several chains for tipped queries."""
+
+    def __init__(
+        self,
+        autopays: Sequence[TellorFlexAutopayContract],
+        scan_period: int = 7,
+        gas_limit: int = 350000,
+        output_path: Optional[Path] = None,
+    ) -> None:
+        self.autopays = {autopay.node.chain_id: autopay for autopay in autopays}
+        self.scan_period = scan_period
+        self.gas_limit = gas_limit
+        self.output_path = output_path
+        self.table: Dict[int, List[TipOpportunity]] = {}
+
+    async def estimate_cost_usd(self, chain_id: int) -> Optional[float]:
+        """Estimate the USD cost of a report on a chain using the node's gas price."""
+        gas_token_feed = GAS_TOKEN_FEEDS.get(chain_id)
+        if gas_token_feed is None:
+            return None
+
+        try:
+            gas_price = await asyncio.to_thread(lambda: self.autopays[chain_id].node._web3.eth.gas_price)
+        except Exception as e:
+            logger.warning(f"Unable to fetch gas price for chain {chain_id}: {e}")
+            return None
+
+        price, _ = await gas_token_feed.source.fetch_fresh_datapoint(PRICE_MAX_AGE)
+        if price is None:
+            logger.warning(f"Unable to fetch gas token price for chain {chain_id}")
+            return None
+
+        return float(self.gas_limit * gas_price / 1e18 * price)
+
+    async def scan_chain(self, chain_id: int) -> List[TipOpportunity]:
+        """Get tipped queries on a chain, ranked by estimated profit."""
+        tips, cost_usd, (price_trb_usd, _) = await asyncio.gather(
+            get_combined_tips(self.autopays[chain_id]),
+            self.estimate_cost_usd(chain_id),
+            trb_usd_median_feed.source.fetch_fresh_datapoint(PRICE_MAX_AGE),
+        )
+
+        timestamp = TimeStamp.now().ts
+        opportunities = []
+        for query_tag, tip in tips.items():
+            if query_tag not in CATALOG_FEEDS:
+                continue
+            profit_usd = None
+            if cost_usd is not None and price_trb_usd is not None:
+                profit_usd = tip / 1e18 * price_trb_usd - cost_usd
+            opportunities.append(TipOpportunity(chain_id, query_tag, tip, profit_usd, timestamp))
+
+        return _rank(opportunities)
+
+    def ranked(self) -> List[TipOpportunity]:
+        """Tipped queries on all chains, ranked by estimated profit."""
+        return _rank([opportunity for chain in self.table.values() for opportunity in chain])
+
+    def best(self, chain_id: Optional[int] = None) -> Optional[TipOpportunity]:
+        """Most profitable tipped query, on a given chain if chain_id is provided."""
+        if chain_id is None:
+            ranked = self.ranked()
+        else:
+            ranked = self.table.get(chain_id, [])
+        return ranked[0] if ranked else None
+
+    def publish(self) -> None:
+        """Log the best opportunity and write the ranked table to the output file, if any."""
+        ranked = self.ranked()
+        if ranked:
+            top = ranked[0]
+            logger.info(f"Best tip: {top.query_tag} on chain {top.chain_id} ({top.tip / 1e18} TRB)")
+
+        if self.output_path is not None:
+            tmp_path = self.output_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps([asdict(opportunity) for opportunity in ranked], indent=2))
+            tmp_path.replace(self.output_path)
+
+    async def watch_chain(self, chain_id: int) -> None:
+        """Rescan a chain every scan period."""
+        while True:
+            try:
+                self.table[chain_id] = await self.scan_chain(chain_id)
+                self.publish()
+            except Exception as e:
+                logger.error(f"Unable to scan autopay on chain {chain_id}: {e}")
+            await asyncio.sleep(self.scan_period)
+
+    async def run(self) -> None:
+        """Scan all chains concurrently."""
+        logger.info(f"Scanning autopay on chains: {list(self.autopays)}")
+        await asyncio.gather(*[self.watch_chain(chain_id) for chain_id in self.autopays])
+
+
+class ScanTable:
+    """Ranked table written by an AutopayScanner in another process.
+
+    Rows older than max_age seconds are ignored, so reporters don't act
+    on a stale table if the scanner stops."""
+
+    def __init__(self, path: Path, max_age: int = 60) -> None:
+        self.path = path
+        self.max_age = max_age
+
+    def ranked(self) -> List[TipOpportunity]:
+        """Fresh tipped queries on all chains, ranked by estimated profit."""
+        try:
+            rows: List[Dict[str, Any]] = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unable to read autopay scan table {self.path}: {e}")
+            return []
+
+        now = TimeStamp.now().ts
+        opportunities = [TipOpportunity(**row) for row in rows]
+        return [o for o in opportunities if now - o.timestamp < self.max_age]
+
+    def best(self, chain_id: Optional[int] = None) -> Optional[TipOpportunity]:
+        """Most profitable tipped query, on a given chain if chain_id is provided."""
+        ranked = [o for o in self.ranked() if chain_id is None or o.chain_id == chain_id]
+        return ranked[0] if ranked else None
+
+
+class ClaimedScanner:
+    """View of a scanner shared by several reporters on one chain.
+
+    Each query is suggested to one reporter at a time: suggesting a
+    query claims it until the reporter's claims are released."""
+
+    def __init__(self, scanner: Union[AutopayScanner, ScanTable], claims: Dict[bytes, str], reporter: str) -> None:
+        self.scanner = scanner
+        self.claims = claims
+        self.reporter = reporter
+
+    def best(self, chain_id: Optional[int] = None) -> Optional[TipOpportunity]:
+        """Most profitable tipped query not claimed by another reporter."""
+        for opportunity in self.scanner.ranked():
+            if chain_id is not None and opportunity.chain_id != chain_id:
+                continue
+            feed: DataFeed[Any] = CATALOG_FEEDS[opportunity.query_tag]  # type: ignore
+            query_id = feed.query.query_id
+            if self.claims.setdefault(query_id, self.reporter) == self.reporter:
+                return opportunity
+        return None
+
+
+def _rank(opportunities: List[TipOpportunity]) -> List[TipOpportunity]:
+    """Sort by estimated profit, then tip. Unknown profits go last."""
+    return sorted(
+        opportunities,
+        key=lambda o: (o.profit_usd is not None, o.profit_usd or 0.0, o.tip),
+        reverse=True,
+    )
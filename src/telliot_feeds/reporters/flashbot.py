@@ -2,8 +2,11 @@
 
 Example of a subclassed Reporter.
 """
+import asyncio
 from typing import Any
+from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import Tuple
 from typing import Union
 
@@ -11,19 +14,31 @@ from chained_accounts import ChainedAccount
 from eth_account.account import Account
 from eth_account.signers.local import LocalAccount
 from eth_utils import to_checksum_address
+from hexbytes import HexBytes
 from telliot_core.contract.contract import Contract
 from telliot_core.model.endpoints import RPCEndpoint
 from telliot_core.utils.response import error_status
 from telliot_core.utils.response import ResponseStatus
 from web3 import Web3
 from web3.datastructures import AttributeDict
-from web3.exceptions import TransactionNotFound
 
 from telliot_feeds.datafeed import DataFeed
 from telliot_feeds.flashbots import flashbot  # type: ignore
-from telliot_feeds.flashbots.provider import get_default_endpoint  # type: ignore
+from telliot_feeds.flashbots.bundle_sender import BundleSender
+from telliot_feeds.flashbots.provider import get_default_endpoints  # type: ignore
 from telliot_feeds.reporters.interval import IntervalReporter
+from telliot_feeds.utils.block_reader import BlockReader
+from telliot_feeds.utils.block_watcher import block_watcher
+from telliot_feeds.utils.fee_estimator import fee_estimator
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import REVERTS
+from telliot_feeds.utils.metrics import SKIPPED_UNPROFITABLE
+from telliot_feeds.utils.metrics import stage
+from telliot_feeds.utils.metrics import SUBMISSIONS
+from telliot_feeds.utils.metrics import timed
+from telliot_feeds.utils.nonce_manager import nonce_manager
+from telliot_feeds.utils.tracing import traced
+from telliot_feeds.utils.tx_template import submit_template
 
 
 logger = get_logger(__name__)
@@ -49,6 +64,8 @@ class FlashbotsReporter(IntervalReporter):
         priority_fee: int = 5,
         legacy_gas_price: Optional[int] = None,
         gas_price_speed: str = "fast",
+        target_blocks: int = 3,
+        relay_uris: Optional[Sequence[str]] = None,
     ) -> None:
 
         self.endpoint = endpoint
@@ -68,14 +85,28 @@ class FlashbotsReporter(IntervalReporter):
         self.priority_fee = priority_fee
         self.legacy_gas_price = legacy_gas_price
         self.gas_price_speed = gas_price_speed
+        self.fee_ceiling: Optional[float] = None
+        self.wait_period = 7
+        self.reader = BlockReader(endpoint)
+        self.nonces = nonce_manager(endpoint, self.acct_addr)
+        self.fees = fee_estimator(endpoint)
+        self.blocks = block_watcher(endpoint)
 
         logger.info(f"Reporting with account: {self.acct_addr}")
         logger.info(f"Signature address: {self.sig_acct_addr}")
 
-        flashbots_uri = get_default_endpoint()
-        logger.info(f"Flashbots provider endpoint: {flashbots_uri}")
-        flashbot(self.endpoint._web3, self.signature_account, flashbots_uri)
+        relay_uris = list(relay_uris) if relay_uris else get_default_endpoints()
+        logger.info(f"Flashbots relay endpoints: {', '.join(relay_uris)}")
+        relays = flashbot(self.endpoint._web3, self.signature_account, relay_uris)
+        self.bundles = BundleSender(self.endpoint._web3, self.blocks, relays, target_blocks)
 
+    async def recover_pending_txs(self) -> None:
+        """Bundles are resent each block instead of being replaced, so
+        there's no replacer to cancel pending transactions with."""
+        if self.nonces.pending:
+            logger.info(f"Not recovering pending transactions, nonces: {sorted(self.nonces.pending)}")
+
+    @traced("report_once")
     async def report_once(
         self,
     ) -> Tuple[Optional[AttributeDict[Any, Any]], ResponseStatus]:
@@ -85,28 +116,31 @@ class FlashbotsReporter(IntervalReporter):
         values to the TellorX oracle, given their staker status
         and last submission time. Also, this method does not
         submit values if doing so won't make a profit."""
-        staked, status = await self.ensure_staked()
+        # Read contract state at a single block for this report attempt
+        self.reader.pin()
+
+        staked, status = await timed("ensure_staked", self.ensure_staked())
         if not staked and status.ok:
             return None, status
 
-        status = await self.check_reporter_lock()
+        status = await timed("check_reporter_lock", self.check_reporter_lock())
         if not status.ok:
             return None, status
 
-        datafeed = await self.fetch_datafeed()
+        datafeed = await timed("fetch_datafeed", self.fetch_datafeed())
         if datafeed is None:
             return None, error_status(note="Unable to fetch datafeed", log=logger.warning)
 
         logger.info(f"Current query: {datafeed.query.descriptor}")
 
-        status = await self.ensure_profitable(datafeed)
+        status = await timed("ensure_profitable", self.ensure_profitable(datafeed))
         if not status.ok:
             return None, status
 
         status = ResponseStatus()
 
         # Update datafeed value
-        await datafeed.source.fetch_new_datapoint()
+        await timed("fetch_value", datafeed.source.fetch_new_datapoint())
         latest_data = datafeed.source.latest
         if latest_data[0] is None:
             msg = "Unable to retrieve updated datafeed value."
@@ -115,7 +149,6 @@ class FlashbotsReporter(IntervalReporter):
         # Get query info & encode value to bytes
         query = datafeed.query
         query_id = query.query_id
-        query_data = query.query_data
         try:
             value = query.value_type.encode(latest_data[0])
         except Exception as e:
@@ -123,7 +156,7 @@ class FlashbotsReporter(IntervalReporter):
             return None, error_status(msg, e=e, log=logger.error)
 
         # Get nonce
-        timestamp_count, read_status = await self.oracle.read(func_name="getTimestampCountById", _queryId=query_id)
+        timestamp_count, read_status = await self.reader.read(self.oracle, "getTimestampCountById", _queryId=query_id)
         if not read_status.ok:
             status.error = "Unable to retrieve timestampCount: " + read_status.error  # error won't be none # noqa: E501
             logger.error(status.error)
@@ -131,13 +164,7 @@ class FlashbotsReporter(IntervalReporter):
             return None, status
 
         # Start transaction build
-        submit_val_func = self.oracle.contract.get_function_by_name("submitValue")
-        submit_val_tx = submit_val_func(
-            _queryId=query_id,
-            _value=value,
-            _nonce=timestamp_count,
-            _queryData=query_data,
-        )
+        template = submit_template(self.chain_id, self.oracle, query)
         acc_nonce = self.endpoint._web3.eth.get_transaction_count(self.acct_addr)
 
         # Add transaction type 2 (EIP-1559) data
@@ -145,7 +172,9 @@ class FlashbotsReporter(IntervalReporter):
             logger.info(f"maxFeePerGas: {self.max_fee}")
             logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
 
-            built_submit_val_tx = submit_val_tx.buildTransaction(
+            built_submit_val_tx = template.build(
+                value,
+                timestamp_count,
                 {
                     "nonce": acc_nonce,
                     "gas": self.gas_limit,
@@ -155,50 +184,41 @@ class FlashbotsReporter(IntervalReporter):
                     # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
                     "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
                     "chainId": self.chain_id,
-                }
+                },
             )
         # Add transaction type 0 (legacy) data
         else:
-            built_submit_val_tx = submit_val_tx.buildTransaction(
+            built_submit_val_tx = template.build(
+                value,
+                timestamp_count,
                 {
                     "nonce": acc_nonce,
                     "gas": self.gas_limit,
                     "gasPrice": Web3.toWei(self.legacy_gas_price, "gwei"),  # type: ignore
                     "chainId": self.chain_id,
-                }
+                },
             )
 
         submit_val_tx_signed = self.account.sign_transaction(built_submit_val_tx)  # type: ignore
 
-        # Create bundle of one pre-signed, EIP-1559 (type 2) transaction
-        bundle = [
-            {"signed_transaction": submit_val_tx_signed.rawTransaction},
-        ]
-
-        # Send bundle to be executed in the next block
-        block = self.endpoint._web3.eth.block_number
-        # results = []
-        # for target_block in [block + k for k in [1, 2, 3, 4, 5]]:
-        #     results.append(
-        #         self.endpoint._web3.flashbots.send_bundle(
-        #             bundle, target_block_number=target_block
-        #         )
-        #     )
-        # result = results[-1]
-        result = self.endpoint._web3.flashbots.send_bundle(bundle, target_block_number=block + 1)
-        logger.info(f"Bundle sent to miners in block {block}")
-
-        # Wait for transaction confirmation
-        result.wait()
-        try:
-            tx_receipt = result.receipts()[0]
-            print(f"Bundle was executed in block {tx_receipt.blockNumber}")
-        except TransactionNotFound as e:
-            status.error = "Bundle was not executed: " + str(e)
-            logger.error(status.error)
-            status.e = e
+        # Bundle of the one pre-signed transaction
+        signed_txs = [submit_val_tx_signed.rawTransaction]
+        block = await asyncio.to_thread(lambda: self.endpoint._web3.eth.block_number)
+
+        status = await timed("simulate_bundle", self.check_bundle(signed_txs, block))
+        if not status.ok:
             return None, status
 
+        # Send the bundle for the next few blocks
+        with stage("confirm_tx"):
+            tx_receipt = await self.bundles.send(signed_txs, block)
+        if tx_receipt is None:
+            msg = f"Bundle was not executed in blocks {block + 1} to {block + self.bundles.target_blocks}"
+            return None, error_status(msg, log=logger.error)
+        print(f"Bundle was executed in block {tx_receipt.blockNumber}")
+        counter = SUBMISSIONS if tx_receipt["status"] == 1 else REVERTS
+        counter.inc(self.acct_addr)
+
         status = ResponseStatus()
         if status.ok and not status.error:
             # Reset previous submission timestamp
@@ -210,3 +230,25 @@ class FlashbotsReporter(IntervalReporter):
             logger.error(status)
 
         return tx_receipt, status
+
+    async def check_bundle(self, signed_txs: List[HexBytes], block: int) -> ResponseStatus:
+        """Simulate a bundle, checking it won't revert & is still profitable.
+
+        Bundles aren't skipped if the simulation itself fails."""
+        simulation = await self.bundles.simulate(signed_txs, block)
+        if simulation is None:
+            return ResponseStatus()
+
+        logger.info(
+            f"Simulated bundle {simulation.bundle_hash}: gas used: {simulation.gas_used}, "
+            f"coinbase payment: {simulation.coinbase_diff / 1e18} ETH, cost: {simulation.cost / 1e18} ETH"
+        )
+        if simulation.error is not None:
+            return error_status(f"Bundle would revert: {simulation.error}", log=logger.warning)
+
+        # Profitability was estimated for the gas limit at the chosen fees
+        if self.fee_ceiling is not None and simulation.cost > Web3.toWei(self.fee_ceiling, "gwei") * self.gas_limit:
+            SKIPPED_UNPROFITABLE.inc(self.acct_addr)
+            return error_status("Simulated bundle cost above profitability threshold.", log=logger.info)
+
+        return ResponseStatus()
@@ -2,16 +2,18 @@
 Example of a subclassed Reporter.
 """
 import asyncio
+import math
 import time
 from typing import Any
+from typing import Dict
 from typing import Optional
 from typing import Tuple
 from typing import Union
 
 from chained_accounts import ChainedAccount
+from eth_account.signers.local import LocalAccount
 from eth_utils import to_checksum_address
 from telliot_core.contract.contract import Contract
-from telliot_core.gas.legacy_gas import ethgasstation
 from telliot_core.model.endpoints import RPCEndpoint
 from telliot_core.utils.key_helpers import lazy_unlock_account
 from telliot_core.utils.response import error_status
@@ -23,14 +25,44 @@ from telliot_feeds.datafeed import DataFeed
 from telliot_feeds.feeds import CATALOG_FEEDS
 from telliot_feeds.feeds.eth_usd_feed import eth_usd_median_feed
 from telliot_feeds.feeds.trb_usd_feed import trb_usd_median_feed
-from telliot_feeds.sources.etherscan_gas import EtherscanGasPriceSource
+from telliot_feeds.utils.block_reader import BlockReader
+from telliot_feeds.utils.block_watcher import block_watcher
+from telliot_feeds.utils.fee_estimator import fee_estimator
+from telliot_feeds.utils.fee_estimator import FeeEstimate
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import LAST_TIP
+from telliot_feeds.utils.metrics import REPORTER_LOCK_REMAINING
+from telliot_feeds.utils.metrics import REVERTS
+from telliot_feeds.utils.metrics import SKIPPED_UNPROFITABLE
+from telliot_feeds.utils.metrics import stage
+from telliot_feeds.utils.metrics import SUBMISSIONS
+from telliot_feeds.utils.metrics import timed
+from telliot_feeds.utils.nonce_manager import nonce_manager
+from telliot_feeds.utils.reporter_utils import cancel_tasks
 from telliot_feeds.utils.reporter_utils import tellor_suggested_report
+from telliot_feeds.utils.tracing import traced
+from telliot_feeds.utils.tx_replacer import BumpPolicy
+from telliot_feeds.utils.tx_replacer import TxReplacer
+from telliot_feeds.utils.tx_simulator import tx_simulator
+from telliot_feeds.utils.tx_template import submit_template
+from telliot_feeds.utils.tx_tracker import tx_tracker
 
 
 logger = get_logger(__name__)
 
 
+def max_profitable_fee(
+    revenue_usd: float, gas_token_price_usd: float, gas_limit: int, expected_profit: Union[str, float]
+) -> Optional[float]:
+    """Highest fee per gas (gwei) at which a report still makes the expected percent profit.
+
+    None if any fee is acceptable."""
+    if expected_profit == "YOLO" or 1 + float(expected_profit) / 100 <= 0:
+        return None
+    max_costs_usd = revenue_usd / (1 + float(expected_profit) / 100)
+    return max_costs_usd / gas_token_price_usd * 1e9 / gas_limit
+
+
 class IntervalReporter:
     """Reports values from given datafeeds to a TellorX Oracle
     every 7 seconds."""
@@ -50,6 +82,8 @@ class IntervalReporter:
         priority_fee: int = 5,
         legacy_gas_price: Optional[int] = None,
         gas_price_speed: str = "fast",
+        bump_policy: Optional[BumpPolicy] = None,
+        simulate: bool = False,
     ) -> None:
 
         self.endpoint = endpoint
@@ -69,6 +103,23 @@ class IntervalReporter:
         self.gas_price_speed = gas_price_speed
         self.trb_usd_median_feed = trb_usd_median_feed
         self.eth_usd_median_feed = eth_usd_median_feed
+        # Reuse datafeed values fetched less than this many seconds ago
+        self.value_max_age: float = 0
+        # Max seconds between report attempts outside of reporter lock
+        self.wait_period = 7
+        self.reader = BlockReader(endpoint)
+        # Never pinned, for reads at the chain head while a report is pending
+        self.latest_reader = BlockReader(endpoint)
+        self.nonces = nonce_manager(endpoint, self.acct_addr)
+        self.txs = tx_tracker(endpoint)
+        self.fees = fee_estimator(endpoint)
+        self.blocks = block_watcher(endpoint)
+        self.replacer = TxReplacer(endpoint, self.nonces, self.txs, bump_policy)
+        # Highest profitable fee per gas (gwei) of the current report, None if unbounded
+        self.fee_ceiling: Optional[float] = None
+        # Simulate report transactions before sending them
+        self.simulate = simulate
+        self.simulator = tx_simulator(endpoint)
 
         logger.info(f"Reporting with account: {self.acct_addr}")
 
@@ -81,7 +132,9 @@ class IntervalReporter:
 
         # Save last submission timestamp to reduce web3 calls
         if self.last_submission_timestamp == 0:
-            last_timestamp, read_status = await self.oracle.read("getReporterLastTimestamp", _reporter=self.acct_addr)
+            last_timestamp, read_status = await self.reader.read(
+                self.oracle, "getReporterLastTimestamp", _reporter=self.acct_addr
+            )
 
             # Log web3 errors
             if (not read_status.ok) or (last_timestamp is None):
@@ -94,6 +147,7 @@ class IntervalReporter:
             self.last_submission_timestamp = last_timestamp
             logger.info(f"Last submission timestamp: {self.last_submission_timestamp}")
 
+        REPORTER_LOCK_REMAINING.set(self.acct_addr, value=max(self.last_submission_timestamp + 43200 - time.time(), 0))
         if time.time() < self.last_submission_timestamp + 43200:  # 12 hours in seconds
             status.ok = False
             status.error = "Current address is in reporter lock."
@@ -103,8 +157,8 @@ class IntervalReporter:
         return status
 
     async def fetch_gas_price(self, speed: str = "average") -> Optional[int]:
-        """Fetch gas price from ethgasstation in gwei."""
-        return await ethgasstation(speed)  # type: ignore
+        """Estimate gas price in gwei from the connected node."""
+        return await self.fees.gas_price(speed)
 
     async def ensure_staked(self) -> Tuple[bool, ResponseStatus]:
         """Make sure the current user is staked
@@ -118,7 +172,7 @@ class IntervalReporter:
             note = "Unable to fetch gas price during during ensure_staked()"
             return False, error_status(note=note, log=logger.warning)
 
-        staker_info, read_status = await self.master.read(func_name="getStakerInfo", _staker=self.acct_addr)
+        staker_info, read_status = await self.reader.read(self.master, "getStakerInfo", _staker=self.acct_addr)
 
         if (not read_status.ok) or (staker_info is None):
             msg = "Unable to read reporters staker status: " + read_status.error  # error won't be none # noqa: E501
@@ -136,13 +190,18 @@ class IntervalReporter:
         elif staker_info[0] == 0:
             logger.info("Address not yet staked. Depositing stake.")
 
+            acc_nonce = await self.get_account_nonce()
             _, write_status = await self.master.write(
                 func_name="depositStake",
                 gas_limit=350000,
                 legacy_gas_price=gas_price_gwei,
+                acc_nonce=acc_nonce,
             )
+            self.nonces.settle(acc_nonce, write_status)
 
             if write_status.ok:
+                # Read staker state after the deposit
+                self.reader.pin()
                 return True, status
             else:
                 msg = (
@@ -173,7 +232,7 @@ class IntervalReporter:
         status = ResponseStatus()
 
         # Get current tips and time-based reward for given queryID
-        rewards, read_status = await self.oracle.read("getCurrentReward", _queryId=datafeed.query.query_id)
+        rewards, read_status = await self.reader.read(self.oracle, "getCurrentReward", _queryId=datafeed.query.query_id)
 
         # Log web3 errors
         if (not read_status.ok) or (rewards is None):
@@ -202,21 +261,20 @@ class IntervalReporter:
         # Using transaction type 2 (EIP-1559)
         if self.transaction_type == 2:
             fee_info = await self.get_fee_info()
-            base_fee = fee_info[0].suggestBaseFee
+            if fee_info is None or fee_info.base_fee is None:
+                note = "Unable to estimate EIP-1559 fees"
+                return error_status(note, log=logger.warning)
+            base_fee = fee_info.base_fee
 
             # No miner tip provided by user
             if self.priority_fee is None:
-                # From etherscan docs:
-                # "Safe/Proposed/Fast gas price recommendations are now modeled as Priority Fees."  # noqa: E501
-                # Source: https://docs.etherscan.io/api-endpoints/gas-tracker
-                priority_fee = fee_info[0].SafeGasPrice
-                self.priority_fee = priority_fee
+                self.priority_fee = fee_info.priority_fees["safeLow"]
 
             if self.max_fee is None:
                 # From Alchemy docs:
                 # "maxFeePerGas = baseFeePerGas + maxPriorityFeePerGas"
                 # Source: https://docs.alchemy.com/alchemy/guides/eip-1559/maxpriorityfeepergas-vs-maxfeepergas  # noqa: E501
-                self.max_fee = self.priority_fee + base_fee
+                self.max_fee = math.ceil(self.priority_fee + base_fee)
 
             logger.info(
                 f"""
@@ -254,8 +312,10 @@ class IntervalReporter:
 
         # Calculate profit
         revenue = tb_reward + tips
+        LAST_TIP.set(self.acct_addr, value=revenue / 1e18)
         rev_usd = revenue / 1e18 * price_trb_usd
         costs_usd = costs / 1e9 * price_eth_usd
+        self.fee_ceiling = max_profitable_fee(rev_usd, price_eth_usd, self.gas_limit, self.expected_profit)
         profit_usd = rev_usd - costs_usd
         logger.info(f"Estimated profit: ${round(profit_usd, 2)}")
 
@@ -263,6 +323,7 @@ class IntervalReporter:
         logger.info(f"Estimated percent profit: {round(percent_profit, 2)}%")
 
         if (self.expected_profit != "YOLO") and (percent_profit < self.expected_profit):
+            SKIPPED_UNPROFITABLE.inc(self.acct_addr)
             status.ok = False
             status.error = "Estimated profitability below threshold."
             logger.info(status.error)
@@ -270,12 +331,9 @@ class IntervalReporter:
 
         return status
 
-    async def get_fee_info(self) -> Any:
-        """Fetch fee into from Etherscan API.
-        Source: https://etherscan.io/apis"""
-        c = EtherscanGasPriceSource()
-        result = await c.fetch_new_datapoint()
-        return result
+    async def get_fee_info(self) -> Optional[FeeEstimate]:
+        """Estimate EIP-1559 fees from the connected node's fee history."""
+        return await self.fees.estimate()
 
     async def fetch_datafeed(self) -> Optional[DataFeed[Any]]:
         if self.datafeed is None:
@@ -287,10 +345,26 @@ class IntervalReporter:
 
         return self.datafeed
 
-    async def get_num_reports_by_id(self, query_id: bytes) -> Tuple[int, ResponseStatus]:
-        count, read_status = await self.oracle.read(func_name="getTimestampCountById", _queryId=query_id)
+    async def get_num_reports_by_id(self, query_id: bytes, latest: bool = False) -> Tuple[int, ResponseStatus]:
+        """Report count of a query at the pinned block, or the latest block if `latest`."""
+        reader = self.latest_reader if latest else self.reader
+        count, read_status = await reader.read(self.oracle, "getTimestampCountById", _queryId=query_id)
         return count, read_status
 
+    async def get_account_nonce(self) -> int:
+        """Reserve the reporter account's next transaction nonce."""
+        return await self.nonces.next_nonce()
+
+    async def ensure_can_report(self) -> ResponseStatus:
+        """Check the reporter is staked & not in reporter lock."""
+        staked, status = await timed("ensure_staked", self.ensure_staked())
+        if not staked or not status.ok:
+            logger.warning(status.error)
+            return status
+
+        return await timed("check_reporter_lock", self.check_reporter_lock())
+
+    @traced("report_once")
     async def report_once(
         self,
     ) -> Tuple[Optional[AttributeDict[Any, Any]], ResponseStatus]:
@@ -298,109 +372,132 @@ class IntervalReporter:
         This method checks to see if a user is able to submit
         values to the TellorX oracle, given their staker status
         and last submission time. Also, this method does not
-        submit values if doing so won't make a profit."""
-        # Check staker status
-        staked, status = await self.ensure_staked()
-        if not staked or not status.ok:
-            logger.warning(status.error)
-            return None, status
+        submit values if doing so won't make a profit.
+
+        Independent stages run concurrently: the datafeed is fetched
+        while staking & reporter lock are checked, and the value &
+        report count are fetched while profitability is estimated. Pending stages are cancelled when a check fails."""
+        # Read contract state at a single block for this report attempt
+        self.reader.pin()
 
-        status = await self.check_reporter_lock()
+        # Fetch the datafeed while checking the reporter can report
+        datafeed_task = asyncio.create_task(timed("fetch_datafeed", self.fetch_datafeed()))
+        status = await self.ensure_can_report()
         if not status.ok:
+            await cancel_tasks(datafeed_task)
             return None, status
 
         # Get suggested datafeed if none provided
-        datafeed = await self.fetch_datafeed()
+        datafeed = await datafeed_task
         if not datafeed:
             msg = "Unable to suggest datafeed"
             return None, error_status(note=msg, log=logger.info)
 
         logger.info(f"Current query: {datafeed.query.descriptor}")
 
-        status = await self.ensure_profitable(datafeed)
-        if not status.ok:
-            return None, status
-
-        status = ResponseStatus()
-
-        address = to_checksum_address(self.account.address)
-
-        # Update datafeed value
-        await datafeed.source.fetch_new_datapoint()
-        latest_data = datafeed.source.latest
-        if latest_data[0] is None:
-            msg = "Unable to retrieve updated datafeed value."
-            return None, error_status(msg, log=logger.info)
-
-        # Get query info & encode value to bytes
+        # Get query info
         query = datafeed.query
         query_id = query.query_id
-        query_data = query.query_data
-        try:
-            value = query.value_type.encode(latest_data[0])
-        except Exception as e:
-            msg = f"Error encoding response value {latest_data[0]}"
-            return None, error_status(msg, e=e, log=logger.error)
 
-        # Get nonce
-        report_count, read_status = await self.get_num_reports_by_id(query_id)
+        # Speculatively fetch the value & report count while profitability is estimated
+        value_task = asyncio.create_task(
+            timed("fetch_value", datafeed.source.fetch_fresh_datapoint(self.value_max_age))
+        )
+        count_task = asyncio.create_task(self.get_num_reports_by_id(query_id))
 
-        if not read_status.ok:
-            status.error = "Unable to retrieve report count: " + read_status.error  # error won't be none # noqa: E501
-            logger.error(status.error)
-            status.e = read_status.e
-            return None, status
+        try:
+            status = await timed("ensure_profitable", self.ensure_profitable(datafeed))
+            if not status.ok:
+                return None, status
+
+            status = ResponseStatus()
+
+            # Update datafeed value
+            await value_task
+            latest_data = datafeed.source.latest
+            if latest_data[0] is None:
+                msg = "Unable to retrieve updated datafeed value."
+                return None, error_status(msg, log=logger.info)
+
+            # Encode value to bytes
+            try:
+                value = query.value_type.encode(latest_data[0])
+            except Exception as e:
+                msg = f"Error encoding response value {latest_data[0]}"
+                return None, error_status(msg, e=e, log=logger.error)
+
+            # Get nonce
+            report_count, read_status = await count_task
+
+            if not read_status.ok:
+                # error won't be none
+                status.error = "Unable to retrieve report count: " + read_status.error
+                logger.error(status.error)
+                status.e = read_status.e
+                return None, status
+        finally:
+            # Stop speculative work if a stage failed
+            await cancel_tasks(value_task, count_task)
 
         # Start transaction build
-        submit_val_func = self.oracle.contract.get_function_by_name("submitValue")
-        submit_val_tx = submit_val_func(
-            _queryId=query_id,
-            _value=value,
-            _nonce=report_count,
-            _queryData=query_data,
-        )
-        acc_nonce = self.endpoint._web3.eth.get_transaction_count(address)
+        template = submit_template(self.chain_id, self.oracle, query)
+        acc_nonce = await self.get_account_nonce()
 
-        # Add transaction type 2 (EIP-1559) data
-        if self.transaction_type == 2:
-            logger.info(f"maxFeePerGas: {self.max_fee}")
-            logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
-
-            built_submit_val_tx = submit_val_tx.buildTransaction(
-                {
-                    "nonce": acc_nonce,
-                    "gas": self.gas_limit,
-                    "maxFeePerGas": Web3.toWei(self.max_fee, "gwei"),  # type: ignore
-                    # TODO: Investigate more why etherscan txs using Flashbots have
-                    # the same maxFeePerGas and maxPriorityFeePerGas. Example:
-                    # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
-                    "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
-                    "chainId": self.chain_id,
-                }
-            )
-        # Add transaction type 0 (legacy) data
-        else:
-            # Fetch legacy gas price if not provided by user
-            if not self.legacy_gas_price:
-                gas_price = await self.fetch_gas_price(self.gas_price_speed)
-                if not gas_price:
-                    note = "Unable to fetch gas price for tx type 0"
-                    return None, error_status(note, log=logger.warning)
+        try:
+            # Add transaction type 2 (EIP-1559) data
+            if self.transaction_type == 2:
+                logger.info(f"maxFeePerGas: {self.max_fee}")
+                logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
+
+                built_submit_val_tx = template.build(
+                    value,
+                    report_count,
+                    {
+                        "nonce": acc_nonce,
+                        "gas": self.gas_limit,
+                        "maxFeePerGas": Web3.toWei(self.max_fee, "gwei"),  # type: ignore
+                        # TODO: Investigate more why etherscan txs using Flashbots have
+                        # the same maxFeePerGas and maxPriorityFeePerGas. Example:
+                        # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
+                        "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
+                        "chainId": self.chain_id,
+                    },
+                )
+            # Add transaction type 0 (legacy) data
             else:
-                gas_price = self.legacy_gas_price
-
-            built_submit_val_tx = submit_val_tx.buildTransaction(
-                {
-                    "nonce": acc_nonce,
-                    "gas": self.gas_limit,
-                    "gasPrice": Web3.toWei(gas_price, "gwei"),
-                    "chainId": self.chain_id,
-                }
-            )
-
-        lazy_unlock_account(self.account)
-        local_account = self.account.local_account
-        tx_signed = local_account.sign_transaction(built_submit_val_tx)
+                # Fetch legacy gas price if not provided by user
+                if not self.legacy_gas_price:
+                    gas_price = await self.fetch_gas_price(self.gas_price_speed)
+                    if not gas_price:
+                        self.nonces.release(acc_nonce)
+                        note = "Unable to fetch gas price for tx type 0"
+                        return None, error_status(note, log=logger.warning)
+                else:
+                    gas_price = self.legacy_gas_price
+
+                built_submit_val_tx = template.build(
+                    value,
+                    report_count,
+                    {
+                        "nonce": acc_nonce,
+                        "gas": self.gas_limit,
+                        "gasPrice": Web3.toWei(gas_price, "gwei"),
+                        "chainId": self.chain_id,
+                    },
+                )
+
+            sim_status = await self.simulate_report(built_submit_val_tx, query_id, report_count)
+            if not sim_status.ok:
+                self.nonces.release(acc_nonce)
+                return None, sim_status
+
+            lazy_unlock_account(self.account)
+            local_account = self.account.local_account
+            tx_signed = local_account.sign_transaction(built_submit_val_tx)
+        except Exception as e:
+            # Don't leave a gap before the next nonce
+            self.nonces.release(acc_nonce, e)
+            raise
 
         # Ensure reporter lock is checked again after attempting to submit val
         self.last_submission_timestamp = 0
@@ -409,20 +506,31 @@ class IntervalReporter:
             logger.debug("Sending submitValue transaction")
             tx_hash = self.endpoint._web3.eth.send_raw_transaction(tx_signed.rawTransaction)
         except Exception as e:
+            self.nonces.release(acc_nonce, e)
             note = "Send transaction failed"
             return None, error_status(note, log=logger.error, e=e)
+        self.nonces.sent(acc_nonce, tx_hash.hex())
 
         try:
-            # Confirm transaction
-            tx_receipt = self.endpoint._web3.eth.wait_for_transaction_receipt(tx_hash, timeout=360)
+            # Confirm transaction, bumping fees while it's pending
+            tx_receipt, cancelled = await self.wait_for_report(
+                local_account, built_submit_val_tx, tx_hash.hex(), query_id, report_count
+            )
+            self.nonces.confirmed(acc_nonce)
+
+            tx_url = f"{self.endpoint.explorer}/tx/{Web3.toHex(tx_receipt['transactionHash'])}"
 
-            tx_url = f"{self.endpoint.explorer}/tx/{tx_hash.hex()}"
+            if cancelled:
+                msg = f"Report cancelled, another report for the query was included first. ({tx_url})"
+                return None, error_status(msg, log=logger.info)
 
             if tx_receipt["status"] == 0:
                 msg = f"Transaction reverted. ({tx_url})"
                 return tx_receipt, error_status(msg, log=logger.error)
 
         except Exception as e:
+            # The tx may have been dropped, leaving a nonce gap
+            self.nonces.resync()
             note = "Failed to confirm transaction"
             return None, error_status(note, log=logger.error, e=e)
 
@@ -433,9 +541,72 @@ class IntervalReporter:
 
         return tx_receipt, status
 
+    async def simulate_report(self, tx: Dict[str, Any], query_id: bytes, report_count: int) -> ResponseStatus:
+        """Check a submitValue transaction won't revert, if simulation is enabled."""
+        if not self.simulate:
+            return ResponseStatus()
+
+        reason = await self.simulator.check(tx, self.acct_addr, query_id, report_count)
+        if reason is not None:
+            return error_status(f"Report would revert: {reason}", log=logger.warning)
+        return ResponseStatus()
+
+    async def wait_for_report(
+        self,
+        account: LocalAccount,
+        tx: Dict[str, Any],
+        tx_hash: str,
+        query_id: bytes,
+        report_count: int,
+    ) -> Tuple[AttributeDict[Any, Any], bool]:
+        """Wait for a submitValue transaction, bumping its fees up to the
+        profitable fee ceiling while it's pending.
+
+        Returns the receipt & whether the report was cancelled. Mined
+        reports are counted as submissions or reverts."""
+
+        async def is_obsolete() -> bool:
+            # Another report for the query was included first, so the
+            # tip is gone & the report nonce no longer matches
+            count, read_status = await self.get_num_reports_by_id(query_id, latest=True)
+            return bool(read_status.ok and count != report_count)
+
+        fee_ceiling = None if self.fee_ceiling is None else Web3.toWei(self.fee_ceiling, "gwei")
+        with stage("confirm_tx"):
+            tx_receipt, cancelled = await self.replacer.wait(
+                account, tx, tx_hash, fee_ceiling=fee_ceiling, is_obsolete=is_obsolete, timeout=360
+            )
+
+        if not cancelled:
+            counter = SUBMISSIONS if tx_receipt["status"] == 1 else REVERTS
+            counter.inc(self.acct_addr)
+        return tx_receipt, cancelled
+
+    async def next_wakeup(self) -> float:
+        """Timestamp of the next report attempt that could succeed."""
+        lock_expiry = self.last_submission_timestamp + 43200  # 12 hours in seconds
+        return max(lock_expiry, time.time() + self.wait_period)
+
+    async def wait_for_next_report(self) -> None:
+        """Sleep until the next meaningful report attempt, then wait
+        for a block newer than the last attempt's."""
+        delay = await self.next_wakeup() - time.time()
+        if delay > 0:
+            logger.info(f"Next report attempt in {round(delay)} seconds")
+            await asyncio.sleep(delay)
+        _ = await self.blocks.wait_for_block(after=self.reader.block_number)
+
+    async def recover_pending_txs(self) -> None:
+        """Cancel report transactions a previous run left pending."""
+        if not self.nonces.pending:
+            return
+        lazy_unlock_account(self.account)
+        await self.replacer.recover(self.account.local_account)
+
     async def report(self) -> None:
         """Submit latest values to the TellorX oracle every 12 hours."""
 
+        await self.recover_pending_txs()
         while True:
             _, _ = await self.report_once()
-            await asyncio.sleep(7)
+            await self.wait_for_next_report()
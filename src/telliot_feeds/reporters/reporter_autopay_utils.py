@@ -29,6 +29,8 @@ from web3.main import Web3
 from telliot_feeds.feeds import CATALOG_FEEDS
 from telliot_feeds.queries.query_catalog import query_catalog
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.tracing import span
+from telliot_feeds.utils.tracing import traced
 
 logger = get_logger(__name__)
 
@@ -60,6 +62,9 @@ async def run_in_subprocess(coro: Any, *args: Any, **kwargs: Any) -> Any:
 # switching to use ThreadPoolExecutor instead seems to fix that
 multicall.run_in_subprocess = run_in_subprocess
 
+# Max age (seconds) of a source's latest value to reuse it for a price threshold check
+PRICE_THRESHOLD_MAX_AGE = 60
+
 # Mapping of queryId to query tag for supported queries
 CATALOG_QUERY_IDS = {query_catalog._entries[tag].query.query_id: tag for tag in query_catalog._entries}
 
@@ -83,11 +88,31 @@ class FeedDetails:
     feedsWithFundingIndex: int
 
 
+@dataclass
+class _AutopayCache:
+    """Last multicall responses used to speculatively issue dependent multicalls"""
+
+    current_feeds: Any = None
+    feed_details: Any = None
+
+
+# Keyed by (autopay address, catalog query ids)
+_AUTOPAY_CACHE: Dict[Tuple[str, Tuple[bytes, ...]], _AutopayCache] = {}
+
+
 class AutopayCalls:
-    def __init__(self, autopay: TellorFlexAutopayContract, catalog: Dict[bytes, str] = CATALOG_QUERY_IDS):
+    def __init__(
+        self,
+        autopay: TellorFlexAutopayContract,
+        catalog: Dict[bytes, str] = CATALOG_QUERY_IDS,
+        block_id: Optional[int] = None,
+    ):
         self.autopay = autopay
         self.w3: Web3 = autopay.node._web3
         self.catalog = catalog
+        self.query_ids = {tag: query_id for query_id, tag in catalog.items()}
+        # block number to read at, latest block if None
+        self.block_id = block_id
 
     async def get_current_feeds(self, require_success: bool = True) -> Any:
         """
@@ -130,8 +155,7 @@ class AutopayCalls:
                         [["disregard_boolean", None], [(tag, "three_mos_ago"), None]],
                     )
                 )
-        multi_call = Multicall(calls=calls, _w3=self.w3, require_success=require_success)
-        data = await multi_call.coroutine()
+        data = await self._multicall("get_current_feeds", calls, require_success)
         # remove status boolean thats useless here
         try:
             data.pop("disregard_boolean")
@@ -140,6 +164,35 @@ class AutopayCalls:
             logger.warning(msg)
         return data
 
+    async def get_current_values(self, require_success: bool = True) -> Any:
+        """
+        Getter for current values from oracle for every queryId in catalog (used to determine
+        can submit now in eligible window)
+
+        Independent of get_current_feeds, so both are requested concurrently.
+
+        Return:
+        - {('current_values', 'tag'): True, ('current_values', 'tag', 'current_price'): float(price),
+        ('current_values', 'tag', 'timestamp'): 1655137179}
+        """
+        calls = [
+            Call(
+                self.autopay.address,
+                ["getCurrentValue(bytes32)(bool,bytes,uint256)", query_id],
+                [
+                    [("current_values", tag), None],
+                    [("current_values", tag, "current_price"), self._current_price],
+                    [("current_values", tag, "timestamp"), None],
+                ],
+            )
+            for query_id, tag in self.catalog.items()
+            if "legacy" in tag or "spot" in tag
+        ]
+        if not calls:
+            return {}
+        return await self._multicall("get_current_values", calls, require_success)
+
+    @traced("autopay.get_feed_details")
     async def get_feed_details(self, require_success: bool = True) -> Any:
         """
         Getter for:
@@ -148,18 +201,57 @@ class AutopayCalls:
         - current values from oracle for every queryId in catalog (used to determine
         can submit now in eligible window)
 
+        Current feeds and current values are requested concurrently. If the feed ids and
+        indices from the previous call are cached, the dependent feed details multicall
+        is issued speculatively in the same round and only re-requested if they changed.
+
         Return:
         - {('current_feeds', 'tag', 'feed_id'): [feed_details], ('current_values', 'tag'): True,
         ('current_values', 'tag', 'current_price'): float(price),
         ('current_values', 'tag', 'timestamp'): 1655137179}
         """
+        cache = self._cache()
+        cached_feeds = cache.current_feeds
 
-        current_feeds = await self.get_current_feeds()
+        current_feeds_task = asyncio.create_task(self.get_current_feeds())
+        current_values_task = asyncio.create_task(self.get_current_values(require_success=require_success))
+        speculative_task = None
+        if cached_feeds:
+            speculative_task = asyncio.create_task(self._get_feed_details(cached_feeds, require_success))
+
+        try:
+            current_feeds = await current_feeds_task
+        except Exception:
+            _cancel(current_values_task, speculative_task)
+            raise
 
         if not current_feeds:
+            _cancel(current_values_task, speculative_task)
             logger.info("No available feeds")
             return None
 
+        cache.current_feeds = current_feeds
+        try:
+            if speculative_task is not None and current_feeds == cached_feeds:
+                feed_details = await speculative_task
+            else:
+                _cancel(speculative_task)
+                feed_details = await self._get_feed_details(current_feeds, require_success)
+        except Exception:
+            _cancel(current_values_task)
+            raise
+
+        current_values = await current_values_task
+        tags_with_feeds = {key[1] for key in feed_details if "current_feeds" in key}
+        feed_details.update({key: val for key, val in current_values.items() if key[1] in tags_with_feeds})
+
+        cache.feed_details = feed_details
+        return feed_details
+
+    async def _get_feed_details(self, current_feeds: Any, require_success: bool = True) -> Any:
+        """
+        Feed details and report timestamps for the feed ids and indices returned by get_current_feeds
+        """
         # separate items from current feeds
         # create dict of tag and feed_id in current_feeds
         tags_with_feed_ids = {
@@ -184,7 +276,7 @@ class AutopayCalls:
                 self.autopay.address,
                 [
                     "getTimestampbyQueryIdandIndex(bytes32,uint256)(uint256)",
-                    query_catalog._entries[tag].query.query_id,
+                    self.query_ids[tag],
                     idx,
                 ],
                 [[(tag, idx), None]],
@@ -206,35 +298,37 @@ class AutopayCalls:
             for tag, feed_ids in merged_query_idx
             for feed_id in feed_ids
         ]
-        get_current_values_call = [
-            Call(
-                self.autopay.address,
-                ["getCurrentValue(bytes32)(bool,bytes,uint256)", query_catalog._entries[tag].query.query_id],
-                [
-                    [("current_values", tag), None],
-                    [("current_values", tag, "current_price"), self._current_price],
-                    [("current_values", tag, "timestamp"), None],
-                ],
-            )
-            for tag, _ in merged_query_idx
-        ]
-        calls = get_data_feed_call + get_current_values_call + get_timestampby_query_id_n_idx_call
-        multi_call = Multicall(calls=calls, _w3=self.w3, require_success=require_success)
-        feed_details = await multi_call.coroutine()
+        calls = get_data_feed_call + get_timestampby_query_id_n_idx_call
+        feed_details = await self._multicall("_get_feed_details", calls, require_success)
 
         return feed_details
 
+    @traced("autopay.reward_claim_status")
     async def reward_claim_status(self, require_success: bool = True) -> Any:
         """
         Getter that checks if a timestamp's tip has been claimed
+
+        Which timestamps need checking only depends on feed schedules and report timestamps,
+        so if feed details from the previous call are cached the claim status multicall is
+        issued speculatively alongside get_feed_details and kept if the checked timestamps match.
         """
-        feed_details_before_check = await self.get_feed_details()
+        cached_details = self._cache().feed_details
+        speculative_args = None
+        speculative_task = None
+        if cached_details:
+            speculative_args = _reward_claim_args(cached_details)
+            speculative_task = asyncio.create_task(self._get_reward_claimed_status(speculative_args, require_success))
+
+        try:
+            feed_details_before_check = await self.get_feed_details()
+        except Exception:
+            _cancel(speculative_task)
+            raise
+
         if not feed_details_before_check:
+            _cancel(speculative_task)
             logger.info("No feeds balance to check")
             return None
-        # create a key to use for the first timestamp since it doesn't have a before value that needs to be checked
-        feed_details_before_check[(0, 0)] = 0
-        timestamp_before_key = (0, 0)
 
         feeds = {}
         current_values = {}
@@ -244,39 +338,51 @@ class AutopayCalls:
             elif "current_values" in i:
                 current_values[i] = j
 
-        reward_claimed_status_call = []
-        for _, tag, feed_id in feeds:
-            details = FeedDetails(*feeds[(_, tag, feed_id)])
-            for keys in list(feed_details_before_check):
-                if "current_feeds" not in keys and "current_values" not in keys:
-                    if tag in keys:
-                        is_first = _is_timestamp_first_in_window(
-                            feed_details_before_check[timestamp_before_key],
-                            feed_details_before_check[keys],
-                            details.startTime,
-                            details.window,
-                            details.interval,
-                        )
-                        timestamp_before_key = keys
-                        if is_first:
-                            reward_claimed_status_call.append(
-                                Call(
-                                    self.autopay.address,
-                                    [
-                                        "getRewardClaimedStatus(bytes32,bytes32,uint256)(bool)",
-                                        bytes.fromhex(feed_id),
-                                        query_catalog._entries[tag].query.query_id,
-                                        feed_details_before_check[keys],
-                                    ],
-                                    [[(tag, feed_id, feed_details_before_check[keys]), None]],
-                                )
-                            )
-
-        multi_call = Multicall(calls=reward_claimed_status_call, _w3=self.w3, require_success=require_success)
-        data = await multi_call.coroutine()
+        claim_args = _reward_claim_args(feed_details_before_check)
+        if speculative_task is not None and claim_args == speculative_args:
+            data = await speculative_task
+        else:
+            _cancel(speculative_task)
+            data = await self._get_reward_claimed_status(claim_args, require_success)
 
         return feeds, current_values, data
 
+    async def _get_reward_claimed_status(
+        self, claim_args: List[Tuple[str, str, int]], require_success: bool = True
+    ) -> Any:
+        """
+        Multicall getRewardClaimedStatus for every (tag, feed id, timestamp)
+        """
+        reward_claimed_status_call = [
+            Call(
+                self.autopay.address,
+                [
+                    "getRewardClaimedStatus(bytes32,bytes32,uint256)(bool)",
+                    bytes.fromhex(feed_id),
+                    self.query_ids[tag],
+                    timestamp,
+                ],
+                [[(tag, feed_id, timestamp), None]],
+            )
+            for tag, feed_id, timestamp in claim_args
+        ]
+        data = await self._multicall("_get_reward_claimed_status", reward_claimed_status_call, require_success)
+
+        return data
+
+    async def _multicall(self, name: str, calls: List[Call], require_success: bool) -> Any:
+        """Run a multicall at the block to read at, traced as a span"""
+        multi_call = Multicall(calls=calls, _w3=self.w3, require_success=require_success, block_id=self.block_id)
+        with span("multicall", function=name, calls=len(calls), block=str(self.block_id)):
+            return await multi_call.coroutine()
+
+    def _cache(self) -> "_AutopayCache":
+        """Cached responses for this autopay contract and catalog"""
+        key = (self.autopay.address, tuple(self.catalog))
+        if key not in _AUTOPAY_CACHE:
+            _AUTOPAY_CACHE[key] = _AutopayCache()
+        return _AUTOPAY_CACHE[key]
+
     async def get_current_tip(self, require_success: bool = False) -> Any:
         """
         Return response from autopay getCurrenTip call.
@@ -287,8 +393,7 @@ class AutopayCalls:
             Call(self.autopay.address, ["getCurrentTip(bytes32)(uint256)", query_id], [[self.catalog[query_id], None]])
             for query_id in self.catalog
         ]
-        multi_call = Multicall(calls=calls, _w3=self.w3, require_success=require_success)
-        data = await multi_call.coroutine()
+        data = await self._multicall("get_current_tip", calls, require_success)
 
         return data
 
@@ -303,7 +408,9 @@ class AutopayCalls:
         return Web3.toInt(hexstr=val[0].hex()) / 1e18 if val[0] != b"" else val[0]
 
 
-async def get_feed_tip(query: bytes, autopay: TellorFlexAutopayContract) -> Optional[int]:
+async def get_feed_tip(
+    query: bytes, autopay: TellorFlexAutopayContract, block_id: Optional[int] = None
+) -> Optional[int]:
     """
     Get total tips for a query id with funded feeds
 
@@ -334,7 +441,7 @@ async def get_feed_tip(query: bytes, autopay: TellorFlexAutopayContract) -> Opti
             CATALOG_QUERY_IDS[query_id] = query_id.hex()
             single_query = {query_id: CATALOG_QUERY_IDS[query_id]}
 
-    autopay_calls = AutopayCalls(autopay, catalog=single_query)
+    autopay_calls = AutopayCalls(autopay, catalog=single_query, block_id=block_id)
     feed_tips = await get_continuous_tips(autopay, autopay_calls)
     if feed_tips is None:
         tips = 0
@@ -352,20 +459,27 @@ async def get_feed_tip(query: bytes, autopay: TellorFlexAutopayContract) -> Opti
 
 async def get_one_time_tips(
     autopay: TellorFlexAutopayContract,
+    block_id: Optional[int] = None,
+    catalog: Dict[bytes, str] = CATALOG_QUERY_IDS,
 ) -> Any:
     """
     Check query ids in catalog for one-time-tips and return query id with the most tips
     """
-    one_time_tips = AutopayCalls(autopay=autopay, catalog=CATALOG_QUERY_IDS)
+    one_time_tips = AutopayCalls(autopay=autopay, catalog=catalog, block_id=block_id)
     return await one_time_tips.get_current_tip()
 
 
-async def get_continuous_tips(autopay: TellorFlexAutopayContract, tipping_feeds: Any = None) -> Any:
+async def get_continuous_tips(
+    autopay: TellorFlexAutopayContract,
+    tipping_feeds: Any = None,
+    block_id: Optional[int] = None,
+    catalog: Dict[bytes, str] = CATALOG_QUERY_IDS,
+) -> Any:
     """
     Check query ids in catalog for funded feeds, combine tips, and return query id with most tips
     """
     if tipping_feeds is None:
-        tipping_feeds = AutopayCalls(autopay=autopay, catalog=CATALOG_QUERY_IDS)
+        tipping_feeds = AutopayCalls(autopay=autopay, catalog=catalog, block_id=block_id)
     response = await tipping_feeds.reward_claim_status()
     if not response:
         logger.info("No feeds to check")
@@ -385,36 +499,54 @@ async def get_continuous_tips(autopay: TellorFlexAutopayContract, tipping_feeds:
     return await _get_feed_suggestion(current_feeds, values_filtered)
 
 
+async def get_combined_tips(
+    autopay: TellorFlexAutopayContract,
+    block_id: Optional[int] = None,
+    catalog: Dict[bytes, str] = CATALOG_QUERY_IDS,
+) -> Dict[str, int]:
+    """
+    Gets one-time tips and continuous tips and adds them up per query tag
+
+    Return: a dict tag:tip amount for every query tag with tips
+    """
+    # get query_ids with one time tips and query_ids with active feeds concurrently
+    singletip_dict, datafeed_dict = await asyncio.gather(
+        get_one_time_tips(autopay, block_id=block_id, catalog=catalog),
+        get_continuous_tips(autopay, block_id=block_id, catalog=catalog),
+    )
+
+    # remove none type from dict
+    single_tip_suggestion = {}
+    if singletip_dict is not None:
+        single_tip_suggestion = {i: j for i, j in singletip_dict.items() if j}
+
+    datafeed_suggestion = {}
+    if datafeed_dict is not None:
+        datafeed_suggestion = {i: j for i, j in datafeed_dict.items() if j}
+
+    # combine feed dicts and add tips for duplicate query ids
+    combined_dict = {
+        key: _add_values(single_tip_suggestion.get(key), datafeed_suggestion.get(key))
+        for key in single_tip_suggestion | datafeed_suggestion
+    }
+    return combined_dict  # type: ignore
+
+
 async def autopay_suggested_report(
     autopay: TellorFlexAutopayContract,
+    block_id: Optional[int] = None,
 ) -> Tuple[Optional[str], Any]:
     """
     Gets one-time tips and continuous tips then extracts query id with the most tips for a report suggestion
 
+    - block_id: block number to read autopay at, latest block if None
+
     Return: query id, tip amount
     """
     chain = autopay.node.chain_id
     if chain in (137, 80001, 69, 1666600000, 1666700000, 421611):
         assert isinstance(autopay, TellorFlexAutopayContract)
-        # get query_ids with one time tips
-        singletip_dict = await get_one_time_tips(autopay)
-        # get query_ids with active feeds
-        datafeed_dict = await get_continuous_tips(autopay)
-
-        # remove none type from dict
-        single_tip_suggestion = {}
-        if singletip_dict is not None:
-            single_tip_suggestion = {i: j for i, j in singletip_dict.items() if j}
-
-        datafeed_suggestion = {}
-        if datafeed_dict is not None:
-            datafeed_suggestion = {i: j for i, j in datafeed_dict.items() if j}
-
-        # combine feed dicts and add tips for duplicate query ids
-        combined_dict = {
-            key: _add_values(single_tip_suggestion.get(key), datafeed_suggestion.get(key))
-            for key in single_tip_suggestion | datafeed_suggestion
-        }
+        combined_dict = await get_combined_tips(autopay, block_id=block_id)
         # get feed with most tips
         tips_sorted = sorted(combined_dict.items(), key=lambda item: item[1], reverse=True)  # type: ignore
         if tips_sorted:
@@ -426,26 +558,70 @@ async def autopay_suggested_report(
         return None, None
 
 
+def next_window_start(feed_details: FeedDetails, current_time: int) -> int:
+    """Start time of a feed's first submission window after current_time"""
+    if current_time < feed_details.startTime:
+        return feed_details.startTime
+    num_intervals = math.floor((current_time - feed_details.startTime) / feed_details.interval)
+    return feed_details.startTime + (feed_details.interval * (num_intervals + 1))
+
+
+async def get_next_feed_window(
+    autopay: TellorFlexAutopayContract,
+    block_id: Optional[int] = None,
+    catalog: Dict[bytes, str] = CATALOG_QUERY_IDS,
+) -> Optional[int]:
+    """
+    Gets the earliest upcoming submission window start of funded feeds for query ids in catalog
+
+    Return: timestamp, None if there are no funded feeds
+    """
+    feed_details = await AutopayCalls(autopay=autopay, catalog=catalog, block_id=block_id).get_feed_details()
+    if not feed_details:
+        return None
+
+    current_time = TimeStamp.now().ts
+    window_starts = []
+    for key, value in feed_details.items():
+        if key[0] != "current_feeds" or value is None:
+            continue
+        try:
+            details = FeedDetails(*value)
+        except TypeError:
+            continue
+        if details.balance <= 0 or details.interval <= 0:
+            continue
+        window_starts.append(next_window_start(details, current_time))
+
+    return min(window_starts, default=None)
+
+
 async def _get_feed_suggestion(feeds: Any, current_values: Any) -> Any:
     """
     Calculates tips and checks if a submission is in an eligible window for a feed submission
     for a given query_id and feed_ids
 
+    Feeds with a price threshold need a live price, so they're collected first and
+    their prices fetched concurrently before all threshold rules are evaluated.
+
     Return: a dict tag:tip amount
     """
     current_time = TimeStamp.now().ts
-    query_id_with_tips = {}
+    query_id_with_tips: Dict[str, int] = {}
+    # (query_tag, feed_details, value_before_now) for eligible feeds with a price threshold
+    threshold_feeds = []
 
     for query_tag, feed_id in feeds:  # i is (query_id,feed_id)
-        if feeds[(query_tag, feed_id)] is not None:  # feed_detail[i] is (details)
-            try:
-                feed_details = FeedDetails(*feeds[(query_tag, feed_id)])
-            except TypeError:
-                msg = "couldn't decode feed details from contract"
-                continue
-            except Exception as e:
-                msg = f"unknown error decoding feed details from contract: {e}"
-                continue
+        if feeds[(query_tag, feed_id)] is None:  # feed_detail[i] is (details)
+            continue
+        try:
+            feed_details = FeedDetails(*feeds[(query_tag, feed_id)])
+        except TypeError:
+            msg = "couldn't decode feed details from contract"
+            continue
+        except Exception as e:
+            msg = f"unknown error decoding feed details from contract: {e}"
+            continue
 
         if feed_details.balance <= 0:
             continue
@@ -470,42 +646,112 @@ async def _get_feed_suggestion(feeds: Any, current_values: Any) -> Any:
             continue
 
         if feed_details.priceThreshold == 0:
-            if query_tag not in query_id_with_tips:
-                query_id_with_tips[query_tag] = feed_details.reward
-            else:
-                query_id_with_tips[query_tag] += feed_details.reward
+            _add_tip(query_id_with_tips, query_tag, feed_details.reward)
         else:
-            datafeed = CATALOG_FEEDS[query_tag]
-            value_now = await datafeed.source.fetch_new_datapoint()  # type: ignore
-            if not value_now:
-                note = f"Unable to fetch {datafeed} price for tip calculation"
-                error_status(note=note, log=logger.warning)
-                continue
-            value_now = value_now[0]
+            threshold_feeds.append((query_tag, feed_details, value_before_now))
 
-            if value_before_now == 0:
-                price_change = 10000
+    if not threshold_feeds:
+        return query_id_with_tips
 
-            elif value_now >= value_before_now:
-                price_change = (10000 * (value_now - value_before_now)) / value_before_now
+    # fetch a live price once per query tag
+    tags = list(dict.fromkeys(query_tag for query_tag, _, _ in threshold_feeds))
+    prices = await asyncio.gather(*[_fetch_threshold_price(query_tag) for query_tag in tags])
+    values_now = dict(zip(tags, prices))
 
-            else:
-                price_change = (10000 * (value_before_now - value_now)) / value_before_now
+    for query_tag, feed_details, value_before_now in threshold_feeds:
+        value_now = values_now[query_tag]
+        if value_now is None:
+            continue
 
-            if price_change > feed_details.priceThreshold:
-                if query_tag not in query_id_with_tips:
-                    query_id_with_tips[query_tag] = feed_details.reward
-                else:
-                    query_id_with_tips[query_tag] += feed_details.reward
+        if value_before_now == 0:
+            price_change = 10000
+
+        elif value_now >= value_before_now:
+            price_change = (10000 * (value_now - value_before_now)) / value_before_now
+
+        else:
+            price_change = (10000 * (value_before_now - value_now)) / value_before_now
+
+        if price_change > feed_details.priceThreshold:
+            _add_tip(query_id_with_tips, query_tag, feed_details.reward)
 
     return query_id_with_tips
 
 
+async def _fetch_threshold_price(query_tag: str) -> Optional[float]:
+    """
+    Fetch a catalog feed's current price for a price threshold check,
+    reusing the source's latest value if it's fresher than PRICE_THRESHOLD_MAX_AGE
+    """
+    datafeed = CATALOG_FEEDS[query_tag]
+    try:
+        value_now = await datafeed.source.fetch_fresh_datapoint(PRICE_THRESHOLD_MAX_AGE)  # type: ignore
+    except Exception as e:
+        note = f"Unable to fetch {datafeed} price for tip calculation: {e}"
+        error_status(note=note, log=logger.warning)
+        return None
+    if not value_now or value_now[0] is None:
+        note = f"Unable to fetch {datafeed} price for tip calculation"
+        error_status(note=note, log=logger.warning)
+        return None
+    return value_now[0]  # type: ignore
+
+
+def _add_tip(query_id_with_tips: Dict[str, int], query_tag: str, reward: int) -> None:
+    """Helper function to add a feed's reward to a query tag's tips"""
+    if query_tag not in query_id_with_tips:
+        query_id_with_tips[query_tag] = reward
+    else:
+        query_id_with_tips[query_tag] += reward
+
+
 def _add_values(x: Optional[int], y: Optional[int]) -> Optional[int]:
     """Helper function to add values when combining dicts with same key"""
     return sum((num for num in (x, y) if num is not None))
 
 
+def _cancel(*tasks: Optional["asyncio.Task[Any]"]) -> None:
+    """Helper function to cancel speculative tasks whose result won't be used"""
+    for task in tasks:
+        if task is None:
+            continue
+        if task.done() and not task.cancelled():
+            # Retrieve a failed task's exception, so it isn't logged as never retrieved
+            _ = task.exception()
+        task.cancel()
+
+
+def _reward_claim_args(feed_details: Any) -> List[Tuple[str, str, int]]:
+    """
+    Gets (tag, feed id, timestamp) for every report timestamp that is first in a feed's window,
+    i.e. every timestamp whose reward claim status needs checking
+    """
+    # copy since a key is added for the first timestamp
+    feed_details = dict(feed_details)
+    # create a key to use for the first timestamp since it doesn't have a before value that needs to be checked
+    feed_details[(0, 0)] = 0
+    timestamp_before_key = (0, 0)
+
+    claim_args = []
+    for key in [k for k in feed_details if "current_feeds" in k]:
+        _, tag, feed_id = key
+        details = FeedDetails(*feed_details[key])
+        for keys in list(feed_details):
+            if "current_feeds" not in keys and "current_values" not in keys:
+                if tag in keys:
+                    is_first = _is_timestamp_first_in_window(
+                        feed_details[timestamp_before_key],
+                        feed_details[keys],
+                        details.startTime,
+                        details.window,
+                        details.interval,
+                    )
+                    timestamp_before_key = keys
+                    if is_first:
+                        claim_args.append((tag, feed_id, feed_details[keys]))
+    return claim_args
+
+
 def _is_timestamp_first_in_window(
     timestamp_before: int, timestamp_to_check: int, feed_start_timestamp: int, feed_window: int, feed_interval: int
 ) -> bool:
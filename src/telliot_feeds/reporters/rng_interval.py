@@ -3,12 +3,12 @@ submits TellorRNG values at a fixed time interval
 """
 import asyncio
 import calendar
+import math
 import time
 from typing import Any
 from typing import Optional
 from typing import Tuple
 
-from eth_utils import to_checksum_address
 from telliot_core.utils.key_helpers import lazy_unlock_account
 from telliot_core.utils.response import error_status
 from telliot_core.utils.response import ResponseStatus
@@ -20,9 +20,15 @@ from telliot_feeds.feeds.matic_usd_feed import matic_usd_median_feed
 from telliot_feeds.feeds.tellor_rng_feed import assemble_rng_datafeed
 from telliot_feeds.feeds.trb_usd_feed import trb_usd_median_feed
 from telliot_feeds.queries.tellor_rng import TellorRNG
+from telliot_feeds.reporters.interval import max_profitable_fee
 from telliot_feeds.reporters.reporter_autopay_utils import get_feed_tip
 from telliot_feeds.reporters.tellorflex import TellorFlexReporter
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import LAST_TIP
+from telliot_feeds.utils.metrics import SKIPPED_UNPROFITABLE
+from telliot_feeds.utils.metrics import timed
+from telliot_feeds.utils.tracing import traced
+from telliot_feeds.utils.tx_template import submit_template
 
 
 logger = get_logger(__name__)
@@ -69,15 +75,15 @@ class RNGReporter(TellorFlexReporter):
         self.datafeed = datafeed
         tip = 0
 
-        single_tip, status = await self.autopay.get_current_tip(datafeed.query.query_id)
-        if not status.ok:
+        single_tip, _ = await self.reader.get_current_tip(self.autopay, datafeed.query.query_id)
+        if single_tip is None:
             msg = "Unable to fetch single tip"
             error_status(msg, log=logger.warning)
             return None
         tip += single_tip
 
         feed_tip = await get_feed_tip(
-            datafeed.query.query_data, self.autopay
+            datafeed.query.query_data, self.autopay, block_id=self.reader.block_number
         )  # input query data instead of query id to use tip listener
         if feed_tip is None:
             msg = "Unable to fetch feed tip"
@@ -98,21 +104,21 @@ class RNGReporter(TellorFlexReporter):
         # Using transaction type 2 (EIP-1559)
         if self.transaction_type == 2:
             fee_info = await self.get_fee_info()
-            base_fee = fee_info[0].suggestBaseFee
+            if fee_info is None or fee_info.base_fee is None:
+                note = "Unable to estimate EIP-1559 fees"
+                error_status(note, log=logger.warning)
+                return None
+            base_fee = fee_info.base_fee
 
             # No miner tip provided by user
             if self.priority_fee is None:
-                # From etherscan docs:
-                # "Safe/Proposed/Fast gas price recommendations are now modeled as Priority Fees."  # noqa: E501
-                # Source: https://docs.etherscan.io/api-endpoints/gas-tracker
-                priority_fee = fee_info[0].SafeGasPrice
-                self.priority_fee = priority_fee
+                self.priority_fee = fee_info.priority_fees["safeLow"]
 
             if self.max_fee is None:
                 # From Alchemy docs:
                 # "maxFeePerGas = baseFeePerGas + maxPriorityFeePerGas"
                 # Source: https://docs.alchemy.com/alchemy/guides/eip-1559/maxpriorityfeepergas-vs-maxfeepergas  # noqa: E501
-                self.max_fee = self.priority_fee + base_fee
+                self.max_fee = math.ceil(self.priority_fee + base_fee)
 
             logger.info(
                 f"""
@@ -147,8 +153,10 @@ class RNGReporter(TellorFlexReporter):
             costs = self.gas_limit * self.legacy_gas_price
 
         # Calculate profit
+        LAST_TIP.set(self.acct_addr, value=tip / 1e18)
         rev_usd = tip / 1e18 * price_trb_usd
         costs_usd = costs / 1e9 * price_matic_usd
+        self.fee_ceiling = max_profitable_fee(rev_usd, price_matic_usd, self.gas_limit, self.expected_profit)
         profit_usd = rev_usd - costs_usd
         logger.info(f"Estimated profit: ${round(profit_usd, 2)}")
         logger.info(f"tip price: {round(rev_usd, 2)}, gas costs: {costs_usd}")
@@ -158,6 +166,7 @@ class RNGReporter(TellorFlexReporter):
         if (self.expected_profit != "YOLO") and (
             isinstance(self.expected_profit, float) and percent_profit < self.expected_profit
         ):
+            SKIPPED_UNPROFITABLE.inc(self.acct_addr)
             status.ok = False
             status.error = "Estimated profitability below threshold."
             logger.info(status.error)
@@ -165,6 +174,7 @@ class RNGReporter(TellorFlexReporter):
 
         return datafeed
 
+    @traced("report_once")
     async def report_once(
         self,
     ) -> Tuple[Optional[AttributeDict[Any, Any]], ResponseStatus]:
@@ -173,34 +183,35 @@ class RNGReporter(TellorFlexReporter):
         values to the Tellor oracle, given their staker status
         and last submission time. Also, this method does not
         submit values if doing so won't make a profit."""
+        # Read contract state at a single block for this report attempt
+        self.reader.pin()
+
         # Check staker status
-        staked, status = await self.ensure_staked()
+        staked, status = await timed("ensure_staked", self.ensure_staked())
         if not staked or not status.ok:
             logger.warning(status.error)
             return None, status
 
-        status = await self.check_reporter_lock()
+        status = await timed("check_reporter_lock", self.check_reporter_lock())
         if not status.ok:
             return None, status
 
         # Get suggested datafeed if none provided
-        datafeed = await self.fetch_datafeed()
+        datafeed = await timed("fetch_datafeed", self.fetch_datafeed())
         if not datafeed:
             msg = "no datafeed suggestions available"
             return None, error_status(note=msg, log=logger.info)
 
         logger.info(f"Current query: {datafeed.query.descriptor}")
 
-        status = await self.ensure_profitable(datafeed)
+        status = await timed("ensure_profitable", self.ensure_profitable(datafeed))
         if not status.ok:
             return None, status
 
         status = ResponseStatus()
 
-        address = to_checksum_address(self.account.address)
-
         # Update datafeed value
-        latest_data = await datafeed.source.fetch_new_datapoint()
+        latest_data = await timed("fetch_value", datafeed.source.fetch_new_datapoint())
         # latest_data = datafeed.source.latest
         if latest_data[0] is None:
             msg = "Unable to retrieve updated datafeed value."
@@ -209,7 +220,6 @@ class RNGReporter(TellorFlexReporter):
         # Get query info & encode value to bytes
         query = datafeed.query
         query_id = query.query_id
-        query_data = query.query_data
         try:
             value = query.value_type.encode(latest_data[0])
         except Exception as e:
@@ -226,74 +236,96 @@ class RNGReporter(TellorFlexReporter):
             return None, status
 
         # Start transaction build
-        submit_val_func = self.oracle.contract.get_function_by_name("submitValue")
-        submit_val_tx = submit_val_func(
-            _queryId=query_id,
-            _value=value,
-            _nonce=report_count,
-            _queryData=query_data,
-        )
-        acc_nonce = self.endpoint._web3.eth.get_transaction_count(address)
-
-        # Add transaction type 2 (EIP-1559) data
-        if self.transaction_type == 2:
-            logger.info(f"maxFeePerGas: {self.max_fee}")
-            logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
-
-            built_submit_val_tx = submit_val_tx.buildTransaction(
-                {
-                    "nonce": acc_nonce,
-                    "gas": self.gas_limit,
-                    "maxFeePerGas": Web3.toWei(self.max_fee, "gwei"),  # type: ignore
-                    # TODO: Investigate more why etherscan txs using Flashbots have
-                    # the same maxFeePerGas and maxPriorityFeePerGas. Example:
-                    # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
-                    "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
-                    "chainId": self.chain_id,
-                }
-            )
-        # Add transaction type 0 (legacy) data
-        else:
-            # Fetch legacy gas price if not provided by user
-            if not self.legacy_gas_price:
-                gas_price = await self.fetch_gas_price(self.gas_price_speed)
-                if not gas_price:
-                    note = "Unable to fetch gas price for tx type 0"
-                    return None, error_status(note, log=logger.warning)
-            else:
-                gas_price = self.legacy_gas_price
-
-            built_submit_val_tx = submit_val_tx.buildTransaction(
-                {
-                    "nonce": acc_nonce,
-                    "gas": self.gas_limit,
-                    "gasPrice": Web3.toWei(gas_price, "gwei"),
-                    "chainId": self.chain_id,
-                }
-            )
+        template = submit_template(self.chain_id, self.oracle, query)
+        acc_nonce = await self.get_account_nonce()
 
-        lazy_unlock_account(self.account)
-        local_account = self.account.local_account
-        tx_signed = local_account.sign_transaction(built_submit_val_tx)
+        try:
+            # Add transaction type 2 (EIP-1559) data
+            if self.transaction_type == 2:
+                logger.info(f"maxFeePerGas: {self.max_fee}")
+                logger.info(f"maxPriorityFeePerGas: {self.priority_fee}")
+
+                built_submit_val_tx = template.build(
+                    value,
+                    report_count,
+                    {
+                        "nonce": acc_nonce,
+                        "gas": self.gas_limit,
+                        "maxFeePerGas": Web3.toWei(self.max_fee, "gwei"),  # type: ignore
+                        # TODO: Investigate more why etherscan txs using Flashbots have
+                        # the same maxFeePerGas and maxPriorityFeePerGas. Example:
+                        # https://etherscan.io/tx/0x0bd2c8b986be4f183c0a2667ef48ab1d8863c59510f3226ef056e46658541288 # noqa: E501
+                        "maxPriorityFeePerGas": Web3.toWei(self.priority_fee, "gwei"),  # noqa: E501
+                        "chainId": self.chain_id,
+                    },
+                )
+            # Add transaction type 0 (legacy) data
+            else:
+                # Fetch legacy gas price if not provided by user
+                if not self.legacy_gas_price:
+                    gas_price = await self.fetch_gas_price(self.gas_price_speed)
+                    if not gas_price:
+                        self.nonces.release(acc_nonce)
+                        note = "Unable to fetch gas price for tx type 0"
+                        return None, error_status(note, log=logger.warning)
+                else:
+                    gas_price = self.legacy_gas_price
+
+                built_submit_val_tx = template.build(
+                    value,
+                    report_count,
+                    {
+                        "nonce": acc_nonce,
+                        "gas": self.gas_limit,
+                        "gasPrice": Web3.toWei(gas_price, "gwei"),
+                        "chainId": self.chain_id,
+                    },
+                )
+
+            sim_status = await self.simulate_report(built_submit_val_tx, query_id, report_count)
+            if not sim_status.ok:
+                self.nonces.release(acc_nonce)
+                return None, sim_status
+
+            lazy_unlock_account(self.account)
+            local_account = self.account.local_account
+            tx_signed = local_account.sign_transaction(built_submit_val_tx)
+        except Exception as e:
+            # Don't leave a gap before the next nonce
+            self.nonces.release(acc_nonce, e)
+            raise
 
         try:
             logger.debug("Sending submitValue transaction")
             tx_hash = self.endpoint._web3.eth.send_raw_transaction(tx_signed.rawTransaction)
         except Exception as e:
+            self.nonces.release(acc_nonce, e)
             note = "Send transaction failed"
             return None, error_status(note, log=logger.error, e=e)
+        self.nonces.sent(acc_nonce, tx_hash.hex())
 
         try:
-            # Confirm transaction
-            tx_receipt = self.endpoint._web3.eth.wait_for_transaction_receipt(tx_hash, timeout=360)
+            # Confirm transaction, bumping fees while it's pending
+            tx_receipt, cancelled = await self.wait_for_report(
+                local_account, built_submit_val_tx, tx_hash.hex(), query_id, report_count
+            )
+            self.nonces.confirmed(acc_nonce)
+            self.staker_cache.update_from_receipt(tx_receipt)
 
-            tx_url = f"{self.endpoint.explorer}/tx/{tx_hash.hex()}"
+            tx_url = f"{self.endpoint.explorer}/tx/{Web3.toHex(tx_receipt['transactionHash'])}"
+
+            if cancelled:
+                msg = f"Report cancelled, another report for the query was included first. ({tx_url})"
+                return None, error_status(msg, log=logger.info)
 
             if tx_receipt["status"] == 0:
                 msg = f"Transaction reverted. ({tx_url})"
                 return tx_receipt, error_status(msg, log=logger.error)
 
         except Exception as e:
+            # The report may still be mined, or was dropped leaving a nonce gap
+            self.staker_cache.invalidate()
+            self.nonces.resync()
             note = "Failed to confirm transaction"
             return None, error_status(note, log=logger.error, e=e)
 
@@ -307,10 +339,14 @@ class RNGReporter(TellorFlexReporter):
 
         return tx_receipt, status
 
+    async def next_feed_window(self) -> Optional[int]:
+        """Start of the next RNG interval"""
+        return get_next_timestamp() + INTERVAL
+
     async def report(self) -> None:
         """Submit latest values to the TellorFlex oracle."""
         logger.info(f"RNG reporting interval: {INTERVAL} seconds")
+        await self.recover_pending_txs()
         while True:
             _, _ = await self.report_once()
-            logger.info(f"Sleeping for {self.wait_period} seconds")
-            await asyncio.sleep(self.wait_period)
+            await self.wait_for_next_report()
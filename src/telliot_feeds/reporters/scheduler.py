@@ -0,0 +1,136 @@
+"""Lock-aware report scheduling
+
+Instead of polling `report_once` every wait period, the scheduler works
+out when the reporter lock expires from the cached staker info. Shortly
+before then it ranks candidate queries by expected profit, prefetches
+the top candidates' values concurrently and, once the lock expires,
+reports the best candidate, falling back to the next if it's not
+profitable.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+from telliot_core.utils.response import ResponseStatus
+from telliot_core.utils.timestamp import TimeStamp
+from web3.datastructures import AttributeDict
+
+from telliot_feeds.datafeed import DataFeed
+from telliot_feeds.feeds import CATALOG_FEEDS
+from telliot_feeds.reporters.autopay_scanner import AutopayScanner
+from telliot_feeds.reporters.autopay_scanner import TipOpportunity
+from telliot_feeds.reporters.tellorflex import reporter_lock_expiry
+from telliot_feeds.reporters.tellorflex import TellorFlexReporter
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# A priority queue entry, most profitable first
+Candidate = Tuple[Tuple[bool, float, int], int, TipOpportunity]
+
+
+class ReportScheduler:
+    """Schedules a TellorFlex reporter's reports for when its reporter lock expires."""
+
+    def __init__(
+        self,
+        reporter: TellorFlexReporter,
+        query_tags: Sequence[str] = (),
+        prefetch_lead: float = 5.0,
+        prefetch_count: int = 3,
+        max_attempts: int = 3,
+    ) -> None:
+        self.reporter = reporter
+        # Catalog queries to consider even without tips
+        self.query_tags = query_tags
+        self.prefetch_lead = prefetch_lead
+        self.prefetch_count = prefetch_count
+        self.max_attempts = max_attempts
+        self.scanner = AutopayScanner([reporter.autopay], gas_limit=reporter.gas_limit)
+        self.queue: List[Candidate] = []
+        # Tie breaker for equal priorities
+        self._counter = itertools.count()
+        # Values prefetched before the lock expires are still fresh when reporting
+        reporter.value_max_age = prefetch_lead + 5
+
+    async def lock_expiry(self) -> float:
+        """Timestamp when the reporter can report next."""
+        staker_info, _ = await self.reporter.staker_cache.get()
+        if staker_info is None or staker_info.staker_balance < 10 * 1e18:
+            # Let report_once handle staking & errors now
+            return time.time()
+        return reporter_lock_expiry(staker_info)
+
+    async def refresh(self) -> None:
+        """Rank candidate queries & prefetch the top candidates' values."""
+        chain_id = self.reporter.chain_id
+        opportunities = await self.scanner.scan_chain(chain_id)
+
+        tipped = {o.query_tag for o in opportunities}
+        now = TimeStamp.now().ts
+        for tag in self.query_tags:
+            if tag not in tipped and tag in CATALOG_FEEDS:
+                opportunities.append(TipOpportunity(chain_id, tag, 0, None, now))
+
+        self.queue = []
+        for o in opportunities:
+            self.push(o)
+
+        top = [o for _, _, o in heapq.nsmallest(self.prefetch_count, self.queue)]
+        logger.info(f"Report candidates: {[o.query_tag for o in top]}")
+        feeds: List[DataFeed[Any]] = [CATALOG_FEEDS[o.query_tag] for o in top]
+        _ = await asyncio.gather(*[feed.source.fetch_new_datapoint() for feed in feeds], return_exceptions=True)
+
+    def push(self, opportunity: TipOpportunity) -> None:
+        """Add a candidate query. Unknown profits go last."""
+        priority = (opportunity.profit_usd is None, -(opportunity.profit_usd or 0.0), -opportunity.tip)
+        heapq.heappush(self.queue, (priority, next(self._counter), opportunity))
+
+    async def dispatch(self) -> Tuple[Optional[AttributeDict[Any, Any]], ResponseStatus]:
+        """Report the best candidate, trying the next ones if a candidate isn't profitable."""
+        tx_receipt, status = None, ResponseStatus(ok=False, error="No report candidates")
+        for _ in range(self.max_attempts):
+            if self.queue:
+                _, _, candidate = heapq.heappop(self.queue)
+                feed: DataFeed[Any] = CATALOG_FEEDS[candidate.query_tag]  # type: ignore
+                self.reporter.datafeed = feed
+            else:
+                # Use the reporter's own suggestion
+                self.reporter.datafeed = None
+
+            tx_receipt, status = await self.reporter.report_once()
+            if status.ok or status.error != "Estimated profitability below threshold." or not self.queue:
+                break
+
+        self.reporter.datafeed = None
+        return tx_receipt, status
+
+    async def run(self) -> None:
+        """Report each time the reporter lock expires."""
+        await self.reporter.recover_pending_txs()
+        while True:
+            expiry = await self.lock_expiry()
+            wait = expiry - self.prefetch_lead - time.time()
+            if wait > 0:
+                # Staker info may change meanwhile (e.g. disputes), so check again when it expires
+                logger.info(f"Reporter lock expires in {round(expiry - time.time())} seconds")
+                await asyncio.sleep(min(wait, self.reporter.staker_cache.ttl))
+                continue
+
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Unable to rank report candidates: {e}")
+                self.queue = []
+            await asyncio.sleep(max(expiry - time.time(), 0))
+
+            tx_receipt, _ = await self.dispatch()
+            if tx_receipt is None:
+                await asyncio.sleep(self.reporter.wait_period)
@@ -0,0 +1,102 @@
+"""Cached TellorFlex staker state.
+
+Staker info only changes when the reporter stakes or reports (or gets
+slashed), so it's read from the oracle once and then updated from the
+NewStaker & NewReport events in the reporter's own transaction receipts.
+Cached state expires after a TTL, which picks up changes made outside
+the reporter, e.g. disputes.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Optional
+from typing import Tuple
+
+from eth_utils import to_checksum_address
+from telliot_core.contract.contract import Contract
+from telliot_core.utils.response import error_status
+from telliot_core.utils.response import ResponseStatus
+from web3.logs import DISCARD
+
+from telliot_feeds.utils.block_reader import BlockReader
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class StakerInfo:
+    """Output of TellorFlex `getStakerInfo`"""
+
+    start_date: int
+    staker_balance: int
+    locked_balance: int
+    last_report: int
+    num_reports: int
+
+
+class StakerCache:
+    """Staker info of one reporter on a TellorFlex oracle."""
+
+    def __init__(self, reader: BlockReader, oracle: Contract, staker: str, ttl: int = 300) -> None:
+        self.reader = reader
+        self.oracle = oracle
+        self.staker = to_checksum_address(staker)
+        self.ttl = ttl
+        self.info: Optional[StakerInfo] = None
+        self.updated_at = 0.0
+
+    def invalidate(self) -> None:
+        """Read staker info from the oracle on next use."""
+        self.info = None
+
+    async def get(self) -> Tuple[Optional[StakerInfo], ResponseStatus]:
+        """Cached staker info, read from the oracle if missing or expired."""
+        if self.info is not None and time.time() - self.updated_at < self.ttl:
+            return self.info, ResponseStatus()
+
+        staker_info, read_status = await self.reader.read(self.oracle, "getStakerInfo", _staker=self.staker)
+        if (not read_status.ok) or (staker_info is None):
+            msg = "Unable to read reporters staker info"
+            return None, error_status(msg, e=read_status.e, log=logger.info)
+
+        self.info = StakerInfo(*staker_info)
+        self.updated_at = time.time()
+        return self.info, ResponseStatus()
+
+    def update_from_receipt(self, tx_receipt: Any) -> None:
+        """Apply the staker's NewStaker & NewReport events from a transaction receipt."""
+        if self.info is None or not tx_receipt or tx_receipt.get("status") != 1:
+            return
+
+        oracle_address = to_checksum_address(self.oracle.address)
+        logs = [log for log in tx_receipt["logs"] if to_checksum_address(log["address"]) == oracle_address]
+        if not logs:
+            return
+        receipt = dict(tx_receipt, logs=logs)
+        events = self.oracle.contract.events
+
+        try:
+            new_stakers = events.NewStaker().processReceipt(receipt, errors=DISCARD)
+            new_reports = events.NewReport().processReceipt(receipt, errors=DISCARD)
+        except Exception as e:
+            logger.warning(f"Unable to decode oracle events, refreshing staker info: {e}")
+            self.invalidate()
+            return
+
+        for event in new_stakers:
+            if event.args._staker != self.staker:
+                continue
+            # Mirrors depositStake: locked balance is restaked before new tokens
+            amount = event.args._amount
+            self.info.locked_balance = max(self.info.locked_balance - amount, 0)
+            self.info.staker_balance += amount
+            logger.debug(f"Staker info updated from NewStaker event: {self.info}")
+
+        for event in new_reports:
+            if event.args._reporter != self.staker:
+                continue
+            self.info.last_report = event.args._time
+            self.info.num_reports += 1
+            logger.debug(f"Staker info updated from NewReport event: {self.info}")
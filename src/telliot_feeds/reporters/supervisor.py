@@ -0,0 +1,105 @@
+"""Multi-account reporting
+
+Runs several TellorFlex reporters, one per staked account, in a single
+process. Reporters share the endpoint's connection, price feeds, one
+autopay scanner and the per-chain transaction tracker, while each
+account keeps its own nonces & staker state. Queries are claimed by
+one reporter at a time, so accounts don't race to report the same
+query id.
+"""
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from telliot_feeds.datafeed import DataFeed
+from telliot_feeds.reporters.autopay_scanner import AutopayScanner
+from telliot_feeds.reporters.autopay_scanner import ClaimedScanner
+from telliot_feeds.reporters.autopay_scanner import ScanTable
+from telliot_feeds.reporters.tellorflex import TellorFlexReporter
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class ReporterSupervisor:
+    """Drives TellorFlex reporters for several accounts concurrently."""
+
+    def __init__(
+        self,
+        reporters: Sequence[TellorFlexReporter],
+        scanner: Optional[Union[AutopayScanner, ScanTable]] = None,
+    ) -> None:
+        addresses = [r.acct_addr for r in reporters]
+        assert len(set(addresses)) == len(addresses), "Each reporter needs its own account"
+
+        self.reporters = reporters
+        self.scanner = scanner
+        # query id: address of reporter currently reporting it
+        self.claims: Dict[bytes, str] = {}
+        # datafeeds selected by the user, kept when claimed by another reporter
+        self.fixed_datafeeds = {r.acct_addr: r.datafeed for r in reporters}
+
+        for r in reporters:
+            if scanner is not None:
+                r.scanner = ClaimedScanner(scanner, self.claims, r.acct_addr)
+            self._claim_datafeeds(r)
+
+    def claim(self, query_id: bytes, address: str) -> bool:
+        """Claim a query for a reporter. False if claimed by another reporter."""
+        return self.claims.setdefault(query_id, address) == address
+
+    def release(self, address: str) -> None:
+        """Release a reporter's claimed queries."""
+        for query_id in [q for q, owner in self.claims.items() if owner == address]:
+            del self.claims[query_id]
+
+    def _claim_datafeeds(self, reporter: TellorFlexReporter) -> None:
+        """Only report datafeeds the reporter could claim."""
+        fetch_datafeed = reporter.fetch_datafeed
+
+        async def claimed_fetch_datafeed() -> Optional[DataFeed[Any]]:
+            datafeed = await fetch_datafeed()
+            if datafeed is None or self.claim(datafeed.query.query_id, reporter.acct_addr):
+                return datafeed
+
+            logger.info(f"{reporter.acct_addr}: {datafeed.query.descriptor} claimed by another account, skipping")
+            if self.fixed_datafeeds[reporter.acct_addr] is None:
+                # Get a new suggestion next time
+                reporter.datafeed = None
+            return None
+
+        reporter.fetch_datafeed = claimed_fetch_datafeed  # type: ignore
+
+    async def run_reporter(self, reporter: TellorFlexReporter) -> None:
+        """Report with one account until cancelled."""
+        await reporter.recover_pending_txs()
+        while True:
+            try:
+                _, _ = await reporter.report_once()
+            except Exception as e:
+                logger.error(f"{reporter.acct_addr}: report failed: {e}")
+            finally:
+                self.release(reporter.acct_addr)
+            await reporter.wait_for_next_report()
+
+    async def report_once(self) -> None:
+        """Report once with each account."""
+        if isinstance(self.scanner, AutopayScanner):
+            for chain_id in self.scanner.autopays:
+                self.scanner.table[chain_id] = await self.scanner.scan_chain(chain_id)
+        try:
+            _ = await asyncio.gather(*[r.report_once() for r in self.reporters])
+        finally:
+            self.claims.clear()
+
+    async def run(self) -> None:
+        """Run all reporters, and the shared autopay scanner if it's run in this process."""
+        logger.info(f"Reporting with {len(self.reporters)} accounts")
+        tasks = [self.run_reporter(r) for r in self.reporters]
+        if isinstance(self.scanner, AutopayScanner):
+            tasks.append(self.scanner.run())
+        await asyncio.gather(*tasks)
@@ -1,5 +1,6 @@
 """TellorFlex compatible reporters"""
 import asyncio
+import math
 import time
 from datetime import timedelta
 from typing import Any
@@ -7,30 +8,59 @@ from typing import Optional
 from typing import Tuple
 from typing import Union
 
-import requests
 from chained_accounts import ChainedAccount
 from eth_utils import to_checksum_address
 from telliot_core.contract.contract import Contract
 from telliot_core.model.endpoints import RPCEndpoint
 from telliot_core.utils.response import error_status
 from telliot_core.utils.response import ResponseStatus
+from web3.datastructures import AttributeDict
 
 from telliot_feeds.datafeed import DataFeed
 from telliot_feeds.feeds import CATALOG_FEEDS
 from telliot_feeds.feeds.matic_usd_feed import matic_usd_median_feed
 from telliot_feeds.feeds.trb_usd_feed import trb_usd_median_feed
+from telliot_feeds.reporters.autopay_scanner import AutopayScanner
+from telliot_feeds.reporters.autopay_scanner import ClaimedScanner
+from telliot_feeds.reporters.autopay_scanner import ScanTable
 from telliot_feeds.reporters.interval import IntervalReporter
+from telliot_feeds.reporters.interval import max_profitable_fee
 from telliot_feeds.reporters.reporter_autopay_utils import (
     autopay_suggested_report,
 )
 from telliot_feeds.reporters.reporter_autopay_utils import get_feed_tip
+from telliot_feeds.reporters.reporter_autopay_utils import get_next_feed_window
+from telliot_feeds.reporters.staker_cache import StakerCache
+from telliot_feeds.reporters.staker_cache import StakerInfo
+from telliot_feeds.utils.block_reader import BlockReader
+from telliot_feeds.utils.block_watcher import block_watcher
+from telliot_feeds.utils.fee_estimator import fee_estimator
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import LAST_TIP
+from telliot_feeds.utils.metrics import REPORTER_LOCK_REMAINING
+from telliot_feeds.utils.metrics import SKIPPED_UNPROFITABLE
+from telliot_feeds.utils.metrics import STAKE
+from telliot_feeds.utils.nonce_manager import nonce_manager
 from telliot_feeds.utils.reporter_utils import tellor_suggested_report
+from telliot_feeds.utils.tx_replacer import BumpPolicy
+from telliot_feeds.utils.tx_replacer import TxReplacer
+from telliot_feeds.utils.tx_simulator import tx_simulator
+from telliot_feeds.utils.tx_tracker import tx_tracker
 
 
 logger = get_logger(__name__)
 
 
+def reporter_lock_expiry(staker_info: StakerInfo) -> float:
+    """Timestamp when a staker's reporter lock expires.
+
+    reporter_lock = 12hrs / # stakes, one stake is 10 TRB."""
+    trb = staker_info.staker_balance / 1e18
+    num_stakes = (trb - (trb % 10)) / 10
+    reporter_lock = (12 / num_stakes) * 3600
+    return float(staker_info.last_report + reporter_lock)
+
+
 class TellorFlexReporter(IntervalReporter):
     """Reports values from given datafeeds to a TellorFlex."""
 
@@ -52,6 +82,10 @@ class TellorFlexReporter(IntervalReporter):
         legacy_gas_price: Optional[int] = None,
         gas_price_speed: str = "safeLow",
         wait_period: int = 7,
+        scanner: Optional[Union[AutopayScanner, ScanTable, ClaimedScanner]] = None,
+        staker_cache_ttl: int = 300,
+        bump_policy: Optional[BumpPolicy] = None,
+        simulate: bool = False,
     ) -> None:
 
         self.endpoint = endpoint
@@ -72,6 +106,22 @@ class TellorFlexReporter(IntervalReporter):
         self.legacy_gas_price = legacy_gas_price
         self.gas_price_speed = gas_price_speed
         self.autopaytip = 0
+        self.value_max_age: float = 0
+        self.reader = BlockReader(endpoint)
+        # Never pinned, for reads at the chain head while a report is pending
+        self.latest_reader = BlockReader(endpoint)
+        self.nonces = nonce_manager(endpoint, self.acct_addr)
+        self.txs = tx_tracker(endpoint)
+        self.fees = fee_estimator(endpoint)
+        self.blocks = block_watcher(endpoint)
+        self.replacer = TxReplacer(endpoint, self.nonces, self.txs, bump_policy)
+        self.fee_ceiling: Optional[float] = None
+        self.simulate = simulate
+        self.simulator = tx_simulator(endpoint)
+        self.scanner = scanner
+        self.staker_cache = StakerCache(self.reader, oracle, self.acct_addr, ttl=staker_cache_ttl)
+        # Next autopay feed window start & when it was looked up
+        self.feed_window: Tuple[Optional[int], float] = (None, 0.0)
 
         logger.info(f"Reporting with account: {self.acct_addr}")
 
@@ -79,24 +129,8 @@ class TellorFlexReporter(IntervalReporter):
         assert self.acct_addr == to_checksum_address(self.account.address)
 
     async def fetch_gas_price(self, speed: str = "safeLow") -> Optional[int]:
-        """Fetch estimated gas prices for Polygon mainnet."""
-        try:
-            prices = requests.get("https://gasstation-mainnet.matic.network").json()
-        except requests.JSONDecodeError:
-            logger.error("Error decoding JSON response from matic gas station")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching matic gas prices: {e}")
-            return None
-
-        if speed not in prices:
-            logger.error(f"Invalid gas price speed for matic gasstation: {speed}")
-            return None
-
-        if prices[speed] is None:
-            logger.error("Unable to fetch gas price from matic gasstation")
-            return None
-        return int(prices[speed])
+        """Estimate gas price in gwei from the connected node."""
+        return await self.fees.gas_price(speed)
 
     async def ensure_staked(self) -> Tuple[bool, ResponseStatus]:
         """Make sure the current user is staked.
@@ -104,33 +138,25 @@ class TellorFlexReporter(IntervalReporter):
         Returns a bool signifying whether the current address is
         staked. If the address is not initially, it attempts to deposit
         the given stake amount."""
-        staker_info, read_status = await self.oracle.read(func_name="getStakerInfo", _staker=self.acct_addr)
-
-        if (not read_status.ok) or (staker_info is None):
-            msg = "Unable to read reporters staker info"
-            return False, error_status(msg, log=logger.info)
-
-        (
-            staker_startdate,
-            staker_balance,
-            locked_balance,
-            last_report,
-            num_reports,
-        ) = staker_info
+        staker_info, status = await self.staker_cache.get()
+        if staker_info is None:
+            return False, status
 
         logger.info(
             f"""
             STAKER INFO
-            start date:     {staker_startdate}
+            start date:     {staker_info.start_date}
             desired stake:  {self.stake}
-            amount staked:  {staker_balance / 1e18}
-            locked balance: {locked_balance / 1e18}
-            last report:    {last_report}
-            total reports:  {num_reports}
+            amount staked:  {staker_info.staker_balance / 1e18}
+            locked balance: {staker_info.locked_balance / 1e18}
+            last report:    {staker_info.last_report}
+            total reports:  {staker_info.num_reports}
             """
         )
 
-        self.last_submission_timestamp = last_report
+        self.last_submission_timestamp = staker_info.last_report
+        staker_balance = staker_info.staker_balance
+        STAKE.set(self.acct_addr, value=staker_balance / 1e18)
 
         # Attempt to stake
         if staker_balance / 1e18 < self.stake:
@@ -138,26 +164,32 @@ class TellorFlexReporter(IntervalReporter):
 
             gas_price_gwei = await self.fetch_gas_price()
             if gas_price_gwei is None:
-                return False, error_status("Unable to fetch matic gas price for staking", log=logger.info)
+                return False, error_status("Unable to fetch gas price for staking", log=logger.info)
             amount = int(self.stake * 1e18) - staker_balance
 
+            acc_nonce = await self.get_account_nonce()
             _, write_status = await self.token.write(
                 func_name="approve",
                 gas_limit=100000,
                 legacy_gas_price=gas_price_gwei,
+                acc_nonce=acc_nonce,
                 spender=self.oracle.address,
                 amount=amount,
             )
+            self.nonces.settle(acc_nonce, write_status)
             if not write_status.ok:
                 msg = "Unable to approve staking"
                 return False, error_status(msg, log=logger.error)
 
-            _, write_status = await self.oracle.write(
+            acc_nonce = await self.get_account_nonce()
+            tx_receipt, write_status = await self.oracle.write(
                 func_name="depositStake",
                 gas_limit=300000,
                 legacy_gas_price=gas_price_gwei,
+                acc_nonce=acc_nonce,
                 _amount=amount,
             )
+            self.nonces.settle(acc_nonce, write_status)
             if not write_status.ok:
                 msg = (
                     "Unable to stake deposit: "
@@ -167,6 +199,9 @@ class TellorFlexReporter(IntervalReporter):
                 return False, error_status(msg, log=logger.error)
 
             logger.info(f"Staked {amount / 1e18} TRB")
+            # Read contract state after the deposit
+            self.reader.pin()
+            self.staker_cache.update_from_receipt(tx_receipt)
 
         return True, ResponseStatus()
 
@@ -180,25 +215,19 @@ class TellorFlexReporter(IntervalReporter):
 
         Returns bool signifying whether a given address is in a
         reporter lock or not."""
-        staker_info, read_status = await self.oracle.read(func_name="getStakerInfo", _staker=self.acct_addr)
-
-        if (not read_status.ok) or (staker_info is None):
-            msg = "Unable to read reporters staker info"
-            return error_status(msg, log=logger.error)
-
-        _, staker_balance, _, last_report, _ = staker_info
+        staker_info, status = await self.staker_cache.get()
+        if staker_info is None:
+            return status
 
+        staker_balance = staker_info.staker_balance
         if staker_balance < 10 * 1e18:
             return error_status("Staker balance too low.", log=logger.info)
 
-        self.last_submission_timestamp = last_report
+        self.last_submission_timestamp = staker_info.last_report
         logger.info(f"Last submission timestamp: {self.last_submission_timestamp}")
 
-        trb = staker_balance / 1e18
-        num_stakes = (trb - (trb % 10)) / 10
-        reporter_lock = (12 / num_stakes) * 3600
-
-        time_remaining = round(self.last_submission_timestamp + reporter_lock - time.time())
+        time_remaining = round(reporter_lock_expiry(staker_info) - time.time())
+        REPORTER_LOCK_REMAINING.set(self.acct_addr, value=max(time_remaining, 0))
         if time_remaining > 0:
             hr_min_sec = str(timedelta(seconds=time_remaining))
             msg = "Currently in reporter lock. Time left: " + hr_min_sec
@@ -206,8 +235,18 @@ class TellorFlexReporter(IntervalReporter):
 
         return ResponseStatus()
 
-    async def get_num_reports_by_id(self, query_id: bytes) -> Tuple[int, ResponseStatus]:
-        count, read_status = await self.oracle.read(func_name="getNewValueCountbyQueryId", _queryId=query_id)
+    def update_staker_cache(self, tx_receipt: Optional[AttributeDict[Any, Any]]) -> None:
+        """Update cached staker info after a report attempt."""
+        if tx_receipt is not None:
+            self.staker_cache.update_from_receipt(tx_receipt)
+        elif self.last_submission_timestamp == 0:
+            # A submitValue tx may have been sent without a confirmed receipt
+            self.staker_cache.invalidate()
+
+    async def get_num_reports_by_id(self, query_id: bytes, latest: bool = False) -> Tuple[int, ResponseStatus]:
+        """Report count of a query at the pinned block, or the latest block if `latest`."""
+        reader = self.latest_reader if latest else self.reader
+        count, read_status = await reader.read(self.oracle, "getNewValueCountbyQueryId", _queryId=query_id)
         return count, read_status
 
     async def rewards(self) -> int:
@@ -217,13 +256,13 @@ class TellorFlexReporter(IntervalReporter):
         if self.expected_profit == "YOLO":
             return tip
 
-        single_tip, status = await self.autopay.get_current_tip(datafeed.query.query_id)
-        if not status.ok:
+        single_tip, _ = await self.reader.get_current_tip(self.autopay, datafeed.query.query_id)
+        if single_tip is None:
             logger.warning("Unable to fetch single tip")
         else:
             tip += single_tip
 
-        feed_tip = await get_feed_tip(datafeed.query.query_id, self.autopay)
+        feed_tip = await get_feed_tip(datafeed.query.query_id, self.autopay, block_id=self.reader.block_number)
         if feed_tip is None:
             logger.warning("Unable to fetch feed tip")
         else:
@@ -238,7 +277,7 @@ class TellorFlexReporter(IntervalReporter):
             self.autopaytip = await self.rewards()
             return self.datafeed
 
-        suggested_qtag, autopay_tip = await autopay_suggested_report(self.autopay)
+        suggested_qtag, autopay_tip = await self.suggested_report()
         if suggested_qtag:
             self.autopaytip = autopay_tip
             self.datafeed = CATALOG_FEEDS[suggested_qtag]  # type: ignore
@@ -258,6 +297,16 @@ class TellorFlexReporter(IntervalReporter):
                 return self.datafeed
         return None
 
+    async def suggested_report(self) -> Tuple[Optional[str], Any]:
+        """Query tag & tip with the most autopay tips, from the shared scanner if one is provided."""
+        if self.scanner is None:
+            return await autopay_suggested_report(self.autopay, block_id=self.reader.block_number)
+
+        best = self.scanner.best(self.chain_id)
+        if best is None:
+            return None, None
+        return best.query_tag, best.tip
+
     async def ensure_profitable(
         self,
         datafeed: DataFeed[Any],
@@ -276,21 +325,20 @@ class TellorFlexReporter(IntervalReporter):
         # Using transaction type 2 (EIP-1559)
         if self.transaction_type == 2:
             fee_info = await self.get_fee_info()
-            base_fee = fee_info[0].suggestBaseFee
+            if fee_info is None or fee_info.base_fee is None:
+                note = "Unable to estimate EIP-1559 fees"
+                return error_status(note, log=logger.warning)
+            base_fee = fee_info.base_fee
 
             # No miner tip provided by user
             if self.priority_fee is None:
-                # From etherscan docs:
-                # "Safe/Proposed/Fast gas price recommendations are now modeled as Priority Fees."  # noqa: E501
-                # Source: https://docs.etherscan.io/api-endpoints/gas-tracker
-                priority_fee = fee_info[0].SafeGasPrice
-                self.priority_fee = priority_fee
+                self.priority_fee = fee_info.priority_fees["safeLow"]
 
             if self.max_fee is None:
                 # From Alchemy docs:
                 # "maxFeePerGas = baseFeePerGas + maxPriorityFeePerGas"
                 # Source: https://docs.alchemy.com/alchemy/guides/eip-1559/maxpriorityfeepergas-vs-maxfeepergas  # noqa: E501
-                self.max_fee = self.priority_fee + base_fee
+                self.max_fee = math.ceil(self.priority_fee + base_fee)
 
             logger.info(
                 f"""
@@ -325,8 +373,10 @@ class TellorFlexReporter(IntervalReporter):
             costs = self.gas_limit * self.legacy_gas_price
 
         # Calculate profit
+        LAST_TIP.set(self.acct_addr, value=tip / 1e18)
         rev_usd = tip / 1e18 * price_trb_usd
         costs_usd = costs / 1e9 * price_matic_usd
+        self.fee_ceiling = max_profitable_fee(rev_usd, price_matic_usd, self.gas_limit, self.expected_profit)
         profit_usd = rev_usd - costs_usd
         logger.info(f"Estimated profit: ${round(profit_usd, 2)}")
         logger.info(f"tip price: {round(rev_usd, 2)}, gas costs: {costs_usd}")
@@ -336,6 +386,7 @@ class TellorFlexReporter(IntervalReporter):
         if (self.expected_profit != "YOLO") and (
             isinstance(self.expected_profit, float) and percent_profit < self.expected_profit
         ):
+            SKIPPED_UNPROFITABLE.inc(self.acct_addr)
             status.ok = False
             status.error = "Estimated profitability below threshold."
             logger.info(status.error)
@@ -345,9 +396,54 @@ class TellorFlexReporter(IntervalReporter):
 
         return status
 
+    async def report_once(
+        self,
+    ) -> Tuple[Optional[AttributeDict[Any, Any]], ResponseStatus]:
+        """Report query value once, then update cached staker info."""
+        tx_receipt, status = await super().report_once()
+        self.update_staker_cache(tx_receipt)
+        return tx_receipt, status
+
+    async def next_feed_window(self) -> Optional[int]:
+        """Start of the next autopay feed submission window.
+
+        Looked up again once the window opens, or when the staker
+        cache expires, since new feeds may be funded meanwhile."""
+        window, checked_at = self.feed_window
+        now = time.time()
+        if (window is not None and window <= now) or now - checked_at > self.staker_cache.ttl:
+            try:
+                window = await get_next_feed_window(self.autopay)
+            except Exception as e:
+                logger.warning(f"Unable to fetch autopay feed windows: {e}")
+                window = None
+            self.feed_window = (window, now)
+        return window
+
+    async def next_wakeup(self) -> float:
+        """Timestamp of the next report attempt that could succeed.
+
+        That's when the reporter lock expires or, outside of reporter
+        lock, when an autopay feed window opens or the wait period ends,
+        whichever is first."""
+        now = time.time()
+        staker_info, _ = await self.staker_cache.get()
+        if staker_info is not None and staker_info.staker_balance >= 10 * 1e18:
+            lock_expiry = reporter_lock_expiry(staker_info)
+            if lock_expiry > now:
+                # Staker info may change meanwhile (e.g. disputes), so check again when the cache expires
+                return min(lock_expiry, now + self.staker_cache.ttl)
+
+        wakeup = now + self.wait_period
+        feed_window = await self.next_feed_window()
+        if feed_window is not None:
+            wakeup = min(wakeup, feed_window)
+        return wakeup
+
     async def report(self) -> None:
         """Submit latest values to the TellorFlex oracle."""
 
+        await self.recover_pending_txs()
         while True:
             _, _ = await self.report_once()
-            await asyncio.sleep(self.wait_period)
+            await self.wait_for_next_report()
@@ -14,6 +14,7 @@ from web3 import Web3
 
 from telliot_feeds.datasource import DataSource
 from telliot_feeds.dtypes.datapoint import OptionalDataPoint
+from telliot_feeds.utils.block_index import block_index
 from telliot_feeds.utils.cfg import mainnet_config
 from telliot_feeds.utils.log import get_logger
 
@@ -69,26 +70,51 @@ def block_num_from_timestamp(timestamp: int) -> Optional[int]:
         return int(this_block["result"])
 
 
-async def get_eth_hash(timestamp: int) -> Optional[str]:
-    """Fetches next Ethereum blockhash after timestamp from API."""
+async def get_eth_hash(timestamp: int, from_node: bool = False) -> Optional[str]:
+    """Fetches next Ethereum blockhash after timestamp from API.
 
-    try:
-        this_block = w3.eth.get_block("latest")
-    except Exception as e:
-        logger.error(f"Unable to retrieve latest block: {e}")
+    If from_node, the block is found with the local block timestamp
+    index of the connected node instead of with Etherscan's API."""
+
+    async def get_latest_block() -> Any:
+        try:
+            return await asyncio.to_thread(w3.eth.get_block, "latest")
+        except Exception as e:
+            logger.error(f"Unable to retrieve latest block: {e}")
+            return None
+
+    if from_node:
+        this_block = await get_latest_block()
+        block_num = None
+    else:
+        # The Etherscan lookup doesn't need the latest block
+        this_block, block_num = await asyncio.gather(
+            get_latest_block(), asyncio.to_thread(block_num_from_timestamp, timestamp)
+        )
+    if this_block is None:
         return None
 
     if this_block["timestamp"] < timestamp:
         logger.error(f"Timestamp {timestamp} is older than current block timestamp {this_block['timestamp']}")
         return None
 
-    block_num = block_num_from_timestamp(timestamp)
-    if block_num is None:
+    if from_node:
+        index = block_index(cfg.get_endpoint())
+        index.add_block(this_block)
+        try:
+            block_num = await asyncio.to_thread(index.block_at, timestamp)
+        except Exception as e:
+            logger.error(f"Unable to search node for block at timestamp {timestamp}: {e}")
+            return None
+        if block_num is None:
+            logger.warning(f"No block at or before timestamp {timestamp}")
+            return None
+    elif block_num is None:
         logger.warning("Unable to retrieve block number from Etherscan API")
         return None
 
     try:
-        block = w3.eth.get_block(block_num)
+        block = await asyncio.to_thread(w3.eth.get_block, block_num)
     except Exception as e:
         logger.error(f"Unable to retrieve block {block_num}: {e}")
         return None
@@ -104,7 +130,7 @@ async def get_btc_hash(timestamp: int) -> Tuple[Optional[str], Optional[int]]:
         ts = timestamp + 480 * 60
 
         try:
-            rsp = s.get(f" https://blockchain.info/blocks/{ts * 1000}?format=json")
+            rsp = await asyncio.to_thread(s.get, f" https://blockchain.info/blocks/{ts * 1000}?format=json")
         except requests.exceptions.ConnectTimeout:
             logger.error("Connection timeout getting BTC block num from timestamp")
             return None, None
@@ -145,6 +171,8 @@ class TellorRNGManualSource(DataSource[Any]):
     """DataSource for TellorRNG manually-entered timestamp."""
 
     timestamp = 0
+    # Find the ETH block on the connected node instead of with Etherscan's API
+    eth_block_from_node: bool = True
 
     def set_timestamp(self, timestamp: int) -> None:
         self.timestamp = timestamp
@@ -190,7 +218,8 @@ class TellorRNGManualSource(DataSource[Any]):
         if btc_timestamp is None:
             logger.warning("Unable to retrieve Bitcoin timestamp")
             return None, None
-        eth_hash = await get_eth_hash(btc_timestamp)
+        # The ETH block is the last one at or before the BTC block
+        eth_hash = await get_eth_hash(btc_timestamp, from_node=self.eth_block_from_node)
         if eth_hash is None:
             logger.warning("Unable to retrieve Ethereum blockhash")
             return None, None
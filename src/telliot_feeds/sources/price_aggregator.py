@@ -12,6 +12,8 @@ from telliot_feeds.dtypes.datapoint import datetime_now_utc
 from telliot_feeds.dtypes.datapoint import OptionalDataPoint
 from telliot_feeds.pricing.price_source import PriceSource
 from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.metrics import SOURCE_FETCH_SECONDS
+from telliot_feeds.utils.tracing import span
 
 
 logger = get_logger(__name__)
@@ -56,9 +58,14 @@ class PriceAggregator(DataSource[float], ABC):
             to the time-stamped answer for that data source
         """
 
+        async def timed_fetch(source: PriceSource) -> OptionalDataPoint[float]:
+            name = type(source).__name__
+            with span("source.fetch", source=name), SOURCE_FETCH_SECONDS.time(name):
+                return await source.fetch_new_datapoint()
+
         async def gather_inputs() -> List[OptionalDataPoint[float]]:
             sources = self.sources
-            datapoints = await asyncio.gather(*[source.fetch_new_datapoint() for source in sources])
+            datapoints = await asyncio.gather(*[timed_fetch(source) for source in sources])
             return datapoints
 
         inputs = await gather_inputs()
@@ -75,26 +82,29 @@ class PriceAggregator(DataSource[float], ABC):
         Returns:
             Current time-stamped value
         """
-        datapoints = await self.update_sources()
-
-        prices = []
-        for datapoint in datapoints:
-            v, _ = datapoint  # Ignore input timestamps
-            # Check for valid answers
-            if v is not None:
-                prices.append(v)
-
-        if not prices:
-            logger.warning(f"No prices retrieved for {self}.")
-            return None, None
-
-        # Run the algorithm on all valid prices
-        logger.info(f"Running {self.algorithm} on {prices}")
-        result = self._algorithm(prices)
-        datapoint = (result, datetime_now_utc())
-        self.store_datapoint(datapoint)
-
-        logger.info("Feed Price: {} reported at time {}".format(datapoint[0], datapoint[1]))
-        logger.info("Number of Sources used for this report are: {}".format(len(prices)))
-
-        return datapoint
+        with span("aggregate", asset=self.asset, currency=self.currency, algorithm=self.algorithm) as agg_span:
+            datapoints = await self.update_sources()
+
+            prices = []
+            for datapoint in datapoints:
+                v, _ = datapoint  # Ignore input timestamps
+                # Check for valid answers
+                if v is not None:
+                    prices.append(v)
+
+            if not prices:
+                logger.warning(f"No prices retrieved for {self}.")
+                return None, None
+
+            # Run the algorithm on all valid prices
+            logger.info(f"Running {self.algorithm} on {prices}")
+            result = self._algorithm(prices)
+            if agg_span is not None:
+                agg_span.set_attribute("sources_used", len(prices))
+            datapoint = (result, datetime_now_utc())
+            self.store_datapoint(datapoint)
+
+            logger.info("Feed Price: {} reported at time {}".format(datapoint[0], datapoint[1]))
+            logger.info("Number of Sources used for this report are: {}".format(len(prices)))
+
+            return datapoint
@@ -0,0 +1,155 @@
+"""Local block timestamp index.
+
+Finds the last block at or before a timestamp, e.g. for TellorRNG's ETH
+block, without a third party API like Etherscan's `getblocknobytime`.
+The index is a sparse, sorted array of (block number, timestamp) samples
+of one chain. Lookups bisect the samples locally, then narrow the gap
+between the two samples around the timestamp by interpolation search
+over the node, keeping every block fetched as a new sample. The newest
+sample is extended from the latest block when a lookup needs it, so
+lookups near the chain head take a few RPC calls and repeated ones none.
+
+Samples are persisted to the telliot home directory, so the index is
+reused across restarts.
+"""
+import bisect
+import json
+import threading
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from telliot_core.model.endpoints import RPCEndpoint
+from telliot_core.utils.home import default_homedir
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class BlockTimestampIndex:
+    """Sparse (block number, timestamp) samples of one chain."""
+
+    def __init__(self, endpoint: RPCEndpoint, path: Optional[Path] = None, max_samples: int = 100_000) -> None:
+        self.endpoint = endpoint
+        self.path = path
+        self.max_samples = max_samples
+        # Sorted by block number, & so by timestamp
+        self.numbers: List[int] = []
+        self.timestamps: List[int] = []
+        # Lookups run in worker threads
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            samples = json.loads(self.path.read_text())["blocks"]
+            for number, timestamp in samples:
+                self.add(int(number), int(timestamp))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Unable to load block timestamp index from {self.path}: {e}")
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"blocks": list(zip(self.numbers, self.timestamps))}))
+            tmp_path.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Unable to save block timestamp index to {self.path}: {e}")
+
+    def add(self, number: int, timestamp: int) -> None:
+        """Record a block's timestamp."""
+        i = bisect.bisect_left(self.numbers, number)
+        if i < len(self.numbers) and self.numbers[i] == number:
+            return
+        self.numbers.insert(i, number)
+        self.timestamps.insert(i, timestamp)
+        if len(self.numbers) > self.max_samples:
+            # Keep every other sample, & the newest
+            newest = (self.numbers[-1], self.timestamps[-1])
+            self.numbers, self.timestamps = self.numbers[::2], self.timestamps[::2]
+            if self.numbers[-1] != newest[0]:
+                self.numbers.append(newest[0])
+                self.timestamps.append(newest[1])
+
+    def add_block(self, block: Any) -> None:
+        """Record a block fetched elsewhere, e.g. the latest block."""
+        with self._lock:
+            self.add(block["number"], block["timestamp"])
+
+    def _fetch(self, number: Any) -> Tuple[int, int]:
+        block = self.endpoint._web3.eth.get_block(number)
+        self.add(block["number"], block["timestamp"])
+        return block["number"], block["timestamp"]
+
+    def _bracket(self, timestamp: int) -> Tuple[int, int]:
+        """Indexes of the last sample at or before timestamp & the first after it."""
+        i = bisect.bisect_right(self.timestamps, timestamp)
+        return i - 1, i
+
+    def block_at(self, timestamp: int) -> Optional[int]:
+        """Number of the last block at or before timestamp, None if there's none.
+
+        Blocking, fetches blocks from the node as needed."""
+        with self._lock:
+            samples = len(self.numbers)
+            try:
+                return self._search(timestamp)
+            finally:
+                if len(self.numbers) != samples:
+                    self.save()
+
+    def _search(self, timestamp: int) -> Optional[int]:
+        if not self.timestamps or self.timestamps[-1] <= timestamp:
+            # Extend the index to the chain head
+            latest, latest_ts = self._fetch("latest")
+            if latest_ts <= timestamp:
+                return latest
+        if self.timestamps[0] > timestamp:
+            if self.numbers[0] == 0:
+                return None
+            _ = self._fetch(0)
+            if self.timestamps[0] > timestamp:
+                return None
+
+        bisect_next = False
+        while True:
+            lo, hi = self._bracket(timestamp)
+            lo_n, lo_ts = self.numbers[lo], self.timestamps[lo]
+            hi_n, hi_ts = self.numbers[hi], self.timestamps[hi]
+            gap = hi_n - lo_n
+            if gap <= 1:
+                return lo_n
+
+            if bisect_next:
+                guess = lo_n + gap // 2
+            else:
+                # Blocks are roughly evenly spaced in time
+                guess = lo_n + (timestamp - lo_ts) * gap // (hi_ts - lo_ts)
+            guess = min(max(guess, lo_n + 1), hi_n - 1)
+            _ = self._fetch(guess)
+
+            # Bisect after interpolation steps that didn't halve the gap,
+            # so uneven block times can't make the search linear
+            lo, hi = self._bracket(timestamp)
+            bisect_next = not bisect_next and self.numbers[hi] - self.numbers[lo] > gap // 2
+
+
+_BLOCK_INDEXES: Dict[int, BlockTimestampIndex] = {}
+
+
+def block_index(endpoint: RPCEndpoint) -> BlockTimestampIndex:
+    """Shared block timestamp index for the endpoint's chain."""
+    if endpoint.chain_id not in _BLOCK_INDEXES:
+        path = default_homedir() / "block_index" / f"{endpoint.chain_id}.json"
+        _BLOCK_INDEXES[endpoint.chain_id] = BlockTimestampIndex(endpoint, path=path)
+    return _BLOCK_INDEXES[endpoint.chain_id]
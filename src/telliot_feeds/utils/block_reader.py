@@ -0,0 +1,99 @@
+"""Block-pinned contract reads.
+
+Pinning every contract read in a reporter loop iteration to one block
+gives decisions a consistent snapshot of contract state. Results are
+memoized per (contract, function, args, block), so repeated reads in
+the same block don't hit the node.
+"""
+import asyncio
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from telliot_core.contract.contract import Contract
+from telliot_core.model.endpoints import RPCEndpoint
+from telliot_core.utils.response import error_status
+from telliot_core.utils.response import ResponseStatus
+from web3.exceptions import ContractLogicError
+
+from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.tracing import span
+
+
+logger = get_logger(__name__)
+
+
+class BlockReader:
+    """Reads contract functions at a pinned block number.
+
+    Until `pin` is called, reads are made at the latest block
+    and aren't memoized."""
+
+    def __init__(self, endpoint: RPCEndpoint) -> None:
+        self.endpoint = endpoint
+        self.block_number: Optional[int] = None
+        self._results: Dict[Any, Any] = {}
+
+    def pin(self) -> Optional[int]:
+        """Pin subsequent reads to the current block number.
+
+        Memoized results from previous blocks are dropped."""
+        block_number: Optional[int]
+        try:
+            block_number = self.endpoint._web3.eth.block_number
+        except Exception as e:
+            logger.warning(f"Unable to fetch block number, reading at latest block: {e}")
+            block_number = None
+
+        if block_number is None or block_number != self.block_number:
+            self._results = {}
+        self.block_number = block_number
+        return block_number
+
+    async def read(self, contract: Contract, func_name: str, **kwargs: Any) -> Tuple[Any, ResponseStatus]:
+        """Read a contract function at the pinned block.
+
+        Same interface as `Contract.read`."""
+        try:
+            return await self._read(contract, func_name, kwargs), ResponseStatus()
+        except Exception as e:
+            return None, self._read_error(func_name, e)
+
+    async def get_current_tip(self, autopay: Contract, query_id: bytes) -> Tuple[Optional[int], ResponseStatus]:
+        """Read a query's one-time tip at the pinned block.
+
+        Same interface as `TellorFlexAutopayContract.get_current_tip`."""
+        try:
+            return await self._read(autopay, "getCurrentTip", {"_queryId": query_id}), ResponseStatus()
+        except ContractLogicError:
+            # Autopay reverts instead of returning 0 when a query has no tips
+            return 0, ResponseStatus()
+        except Exception as e:
+            return None, self._read_error("getCurrentTip", e)
+
+    def _read_error(self, func_name: str, e: Exception) -> ResponseStatus:
+        block_identifier = "latest" if self.block_number is None else self.block_number
+        return error_status(f"Unable to read {func_name} at block {block_identifier}", e=e, log=logger.error)
+
+    async def _read(self, contract: Contract, func_name: str, kwargs: Dict[str, Any]) -> Any:
+        block_identifier = "latest" if self.block_number is None else self.block_number
+
+        key = None
+        if self.block_number is not None:
+            key = (contract.address, func_name, tuple(sorted(kwargs.items())), self.block_number)
+            try:
+                if key in self._results:
+                    return self._results[key]
+            except TypeError:
+                # unhashable args, don't memoize
+                key = None
+
+        contract_function = contract.contract.get_function_by_name(func_name)
+        # Run the blocking call in a thread so concurrent reads don't block the event loop
+        with span("rpc.read", function=func_name, contract=contract.address, block=str(block_identifier)):
+            output = await asyncio.to_thread(contract_function(**kwargs).call, block_identifier=block_identifier)
+
+        if key is not None:
+            self._results[key] = output
+        return output
@@ -0,0 +1,87 @@
+"""New block notifications.
+
+Reporters wait for a block newer than the one their last attempt read
+at, instead of retrying on a fixed timer, so each attempt sees new chain
+state. One background task per chain polls the node's block number, and
+only while someone is waiting, so idle reporters make no RPC calls.
+"""
+import asyncio
+from typing import Dict
+from typing import Optional
+
+from telliot_core.model.endpoints import RPCEndpoint
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class BlockWatcher:
+    """Notifies waiters of new blocks on one chain."""
+
+    def __init__(self, endpoint: RPCEndpoint, poll_interval: float = 1.0) -> None:
+        self.endpoint = endpoint
+        self.poll_interval = poll_interval
+        # Latest block number seen
+        self.block_number: Optional[int] = None
+        self._waiters = 0
+        self._new_block: Optional[asyncio.Event] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    async def wait_for_block(self, after: Optional[int] = None) -> int:
+        """Wait for a block newer than `after`, the next new block if None.
+
+        Returns the new block number."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._task.get_loop() is not loop:
+            # Events from a previous event loop can't be awaited
+            self._task = None
+            self._new_block = None
+        if self._new_block is None:
+            self._new_block = asyncio.Event()
+
+        if after is None:
+            if self.block_number is None:
+                self.block_number = await self._fetch_block_number()
+            after = self.block_number
+
+        self._waiters += 1
+        try:
+            while self.block_number is None or (after is not None and self.block_number <= after):
+                if self._task is None or self._task.done():
+                    self._task = asyncio.create_task(self._poll())
+                await self._new_block.wait()
+        finally:
+            self._waiters -= 1
+
+        assert self.block_number is not None
+        return self.block_number
+
+    async def _fetch_block_number(self) -> Optional[int]:
+        try:
+            return await asyncio.to_thread(lambda: self.endpoint._web3.eth.block_number)
+        except Exception as e:
+            logger.warning(f"Unable to fetch block number: {e}")
+            return None
+
+    async def _poll(self) -> None:
+        while self._waiters:
+            block_number = await self._fetch_block_number()
+            if block_number is not None and (self.block_number is None or block_number > self.block_number):
+                self.block_number = block_number
+                # Wake current waiters, later ones wait for the next block
+                assert self._new_block is not None
+                self._new_block.set()
+                self._new_block = asyncio.Event()
+            await asyncio.sleep(self.poll_interval)
+
+
+_BLOCK_WATCHERS: Dict[int, BlockWatcher] = {}
+
+
+def block_watcher(endpoint: RPCEndpoint) -> BlockWatcher:
+    """Shared block watcher for the endpoint's chain."""
+    if endpoint.chain_id not in _BLOCK_WATCHERS:
+        _BLOCK_WATCHERS[endpoint.chain_id] = BlockWatcher(endpoint)
+    return _BLOCK_WATCHERS[endpoint.chain_id]
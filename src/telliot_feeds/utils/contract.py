@@ -9,6 +9,8 @@ from telliot_core.utils.response import error_status
 from telliot_core.utils.response import ResponseStatus
 from web3.datastructures import AttributeDict
 
+from telliot_feeds.utils.nonce_manager import nonce_manager
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,7 +68,8 @@ async def write_with_retry(
     try:
         status = ResponseStatus()
         acc = contract.node.web3.eth.account.from_key(contract.private_key)
-        acc_nonce = contract.node.web3.eth.get_transaction_count(acc.address)
+        nonces = nonce_manager(contract.node, acc.address)
+        acc_nonce = await nonces.next_nonce()
 
         # Iterate through retry attempts
         for k in range(retries + 1):
@@ -91,6 +94,7 @@ async def write_with_retry(
 
             # Exit loop if transaction successful
             if status.ok and (tx_receipt is not None) and (tx_receipt["status"] == 1):
+                nonces.confirmed(acc_nonce)
                 return tx_receipt, status
 
             else:
@@ -99,6 +103,7 @@ async def write_with_retry(
                 _ = error_status(msg, log=logger.info)
 
                 if tx_receipt is not None:
+                    nonces.confirmed(acc_nonce)
                     tx_url = f"{contract.node.explorer}/tx/{tx_receipt['transactionHash'].hex()}"  # noqa: E501
 
                     if tx_receipt["status"] == 0:
@@ -123,15 +128,18 @@ async def write_with_retry(
                             max_priority_fee_per_gas += extra_gas_price
                             logger.info(f"Next priority fee: {max_priority_fee_per_gas}")
                     elif "already known" in status.error:
-                        acc_nonce += 1
-                        logger.info(f"Incrementing nonce: {acc_nonce}")
+                        nonces.resync()
+                        acc_nonce = await nonces.next_nonce()
+                        logger.info(f"Resynced nonce: {acc_nonce}")
                     elif "nonce too low" in status.error:
-                        acc_nonce += 1
-                        logger.info(f"Incrementing nonce: {acc_nonce}")
+                        nonces.resync()
+                        acc_nonce = await nonces.next_nonce()
+                        logger.info(f"Resynced nonce: {acc_nonce}")
                     # a different rpc error
                     elif "nonce is too low" in status.error:
-                        acc_nonce += 1
-                        logger.info(f"Incrementing nonce: {acc_nonce}")
+                        nonces.resync()
+                        acc_nonce = await nonces.next_nonce()
+                        logger.info(f"Resynced nonce: {acc_nonce}")
                     elif "not in the chain" in status.error:
                         if legacy_gas_price is not None:
                             legacy_gas_price += extra_gas_price
@@ -145,6 +153,7 @@ async def write_with_retry(
                     else:
                         extra_gas_price = 0
 
+        nonces.resync()
         status.ok = False
         status.error = "ran out of retries, tx unsuccessful"
 
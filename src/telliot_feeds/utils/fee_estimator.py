@@ -0,0 +1,113 @@
+"""Gas fee estimates from the connected node.
+
+Estimates EIP-1559 base & priority fees from `eth_feeHistory` and legacy
+gas prices from `eth_gasPrice`, so reporters don't depend on third-party
+gas APIs. Priority fee percentiles of recent blocks are kept in a rolling
+window, and only blocks mined since the last estimate are fetched.
+"""
+import asyncio
+import math
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from telliot_core.model.endpoints import RPCEndpoint
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# Priority fee percentile of recent blocks' transactions for each gas price speed
+SPEED_PERCENTILES: Dict[str, int] = {"safeLow": 10, "average": 50, "fast": 75, "fastest": 90}
+
+
+@dataclass
+class FeeEstimate:
+    """Fee estimate for the next block, in gwei"""
+
+    block_number: int
+    # None if the chain doesn't support EIP-1559
+    base_fee: Optional[float]
+    # speed: suggested priority fee
+    priority_fees: Dict[str, float]
+    gas_price: float
+
+
+class FeeEstimator:
+    """Estimates gas fees on one chain."""
+
+    def __init__(self, endpoint: RPCEndpoint, block_count: int = 20) -> None:
+        self.endpoint = endpoint
+        self.block_count = block_count
+        # Priority fees (wei) at each speed's percentile, per recent block
+        self.rewards: Deque[List[int]] = deque(maxlen=block_count)
+        self.latest: Optional[FeeEstimate] = None
+        self._lock = asyncio.Lock()
+
+    async def estimate(self) -> Optional[FeeEstimate]:
+        """Fee estimate for the next block, reused until a new block is mined."""
+        async with self._lock:
+            try:
+                return await self._update()
+            except Exception as e:
+                logger.warning(f"Unable to estimate fees: {e}")
+                return None
+
+    async def _update(self) -> FeeEstimate:
+        eth = self.endpoint._web3.eth
+        block_number = await asyncio.to_thread(lambda: eth.block_number)
+        if self.latest is not None and self.latest.block_number == block_number:
+            return self.latest
+
+        new_blocks = self.block_count
+        if self.latest is not None:
+            new_blocks = min(block_number - self.latest.block_number, self.block_count)
+
+        gas_price = await asyncio.to_thread(lambda: eth.gas_price)
+        percentiles = list(SPEED_PERCENTILES.values())
+        try:
+            history = await asyncio.to_thread(eth.fee_history, new_blocks, block_number, percentiles)
+        except Exception as e:
+            logger.debug(f"eth_feeHistory unavailable, using eth_gasPrice: {e}")
+            history = None
+
+        base_fee = None
+        priority_fees: Dict[str, float] = {}
+        if history and history.get("reward"):
+            self.rewards.extend(history["reward"])
+            # Includes the next block's base fee
+            base_fee = history["baseFeePerGas"][-1] / 1e9
+            for i, speed in enumerate(SPEED_PERCENTILES):
+                priority_fees[speed] = statistics.median(block[i] for block in self.rewards) / 1e9
+
+        self.latest = FeeEstimate(block_number, base_fee, priority_fees, gas_price / 1e9)
+        return self.latest
+
+    async def gas_price(self, speed: str = "average") -> Optional[int]:
+        """Legacy gas price (gwei) for a speed: the next base fee plus the speed's
+        priority fee, or the node's gas price if the chain doesn't support EIP-1559."""
+        if speed not in SPEED_PERCENTILES:
+            logger.error(f"Invalid gas price speed: {speed}")
+            return None
+
+        estimate = await self.estimate()
+        if estimate is None:
+            return None
+        if estimate.base_fee is None:
+            return math.ceil(estimate.gas_price)
+        return math.ceil(estimate.base_fee + estimate.priority_fees[speed])
+
+
+_FEE_ESTIMATORS: Dict[int, FeeEstimator] = {}
+
+
+def fee_estimator(endpoint: RPCEndpoint) -> FeeEstimator:
+    """Shared fee estimator for the endpoint's chain."""
+    if endpoint.chain_id not in _FEE_ESTIMATORS:
+        _FEE_ESTIMATORS[endpoint.chain_id] = FeeEstimator(endpoint)
+    return _FEE_ESTIMATORS[endpoint.chain_id]
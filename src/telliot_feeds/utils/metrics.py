@@ -0,0 +1,261 @@
+"""Reporter metrics in the Prometheus text format.
+
+A small, dependency free metrics registry with counters, gauges and
+histograms, served over HTTP at `/metrics` so reporter processes can be
+scraped by Prometheus and alerted on. Metrics are always recorded; the
+server only runs if started, e.g. by `telliot-feeds report --metrics-port`.
+"""
+import asyncio
+import math
+import time
+from contextlib import contextmanager
+from typing import Awaitable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import TypeVar
+
+from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.tracing import span
+
+
+logger = get_logger(__name__)
+
+# Histogram buckets (seconds) for RPC calls, API requests & transaction confirmations
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+LabelValues = Tuple[str, ...]
+T = TypeVar("T")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    """A metric with zero or more labels."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(Metric):
+    """A value that only increases."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.values.items()
+        ]
+
+
+class Gauge(Counter):
+    """A value that can go up & down."""
+
+    type = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[self._key(labels)] = float(value)
+
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. durations."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels: (bucket counts, sum, count)
+        self.values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, *labels: str, value: float) -> None:
+        key = self._key(labels)
+        counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0.0, 0))
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self.values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of a block, including any awaits in it."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - start)
+
+    def count(self, *labels: str) -> int:
+        return self.values.get(self._key(labels), ([], 0.0, 0))[2]
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in self.values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    metric = Counter(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    metric = Gauge(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+    metric = Histogram(name, documentation, labelnames)
+    REGISTRY.register(metric)
+    return metric
+
+
+# Reporter metrics
+STAGE_SECONDS = histogram("telliot_report_stage_seconds", "Duration of report_once stages", ["stage"])
+SOURCE_FETCH_SECONDS = histogram("telliot_source_fetch_seconds", "Duration of price source fetches", ["source"])
+SUBMISSIONS = counter("telliot_submissions_total", "Report transactions mined", ["account"])
+REVERTS = counter("telliot_reverts_total", "Report transactions reverted", ["account"])
+SKIPPED_UNPROFITABLE = counter(
+    "telliot_skipped_unprofitable_total", "Reports skipped for estimated profit below threshold", ["account"]
+)
+STAKE = gauge("telliot_stake_trb", "Staked TRB", ["account"])
+REPORTER_LOCK_REMAINING = gauge(
+    "telliot_reporter_lock_remaining_seconds", "Seconds until reporter lock ends", ["account"]
+)
+LAST_TIP = gauge("telliot_last_tip_trb", "Tip & reward of the last query checked for profitability", ["account"])
+
+# Flashbots relay metrics
+RELAY_REQUEST_SECONDS = histogram("telliot_relay_request_seconds", "Duration of bundle sends to a relay", ["relay"])
+RELAY_BUNDLES_ACCEPTED = counter("telliot_relay_bundles_accepted_total", "Bundles accepted per target block", ["relay"])
+RELAY_BUNDLES_REJECTED = counter("telliot_relay_bundles_rejected_total", "Bundles rejected per target block", ["relay"])
+RELAY_BUNDLES_INCLUDED = counter(
+    "telliot_relay_bundles_included_total", "Bundles included in a block the relay accepted them for", ["relay"]
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Observe a report stage's duration & trace it as a span."""
+    with span(name), STAGE_SECONDS.time(name):
+        yield
+
+
+async def timed(name: str, awaitable: Awaitable[T]) -> T:
+    """Await a report stage, observing its duration."""
+    with stage(name):
+        return await awaitable
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, registry: Registry) -> None:
+    try:
+        request_line = await reader.readline()
+        # Skip headers
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", registry.render().encode()
+        else:
+            status, body = "404 Not Found", b"Not Found\n"
+
+        header = (
+            f"HTTP/1.1 {status}\r\n"
+            "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(header.encode() + body)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        logger.debug(f"Metrics request failed: {e}")
+    finally:
+        writer.close()
+
+
+async def serve_metrics(
+    port: int, host: str = "127.0.0.1", registry: Optional[Registry] = None
+) -> asyncio.AbstractServer:
+    """Serve metrics at http://host:port/metrics in the background."""
+    registry = registry if registry is not None else REGISTRY
+    server = await asyncio.start_server(lambda r, w: _handle(r, w, registry), host, port)
+    logger.info(f"Serving metrics at http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,149 @@
+"""Local account nonce management.
+
+Hands out transaction nonces from a local counter instead of calling
+`eth_getTransactionCount` before every transaction, so several
+transactions from one account can be in flight at once. The counter is
+resynced with the node's pending transaction count on first use, after
+nonce errors and when a handed out nonce goes unused (a gap).
+
+Hashes of sent, unconfirmed transactions are persisted to the telliot
+home directory, so pending transactions are known across restarts, and
+`TxReplacer.recover` can clear the ones left stuck.
+"""
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from eth_utils import to_checksum_address
+from telliot_core.model.endpoints import RPCEndpoint
+from telliot_core.utils.home import default_homedir
+from telliot_core.utils.response import ResponseStatus
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# Node error messages meaning the local nonce is out of sync
+NONCE_ERRORS = ("nonce too low", "nonce is too low", "already known", "replacement transaction underpriced")
+
+
+class NonceManager:
+    """Nonces of one account on one chain."""
+
+    def __init__(self, endpoint: RPCEndpoint, address: str, path: Optional[Path] = None) -> None:
+        self.endpoint = endpoint
+        self.address = to_checksum_address(address)
+        self.path = path
+        # None until synced with the node
+        self.next: Optional[int] = None
+        # nonce: hash of sent, unconfirmed transaction
+        self.pending: Dict[int, str] = {}
+        self._lock = asyncio.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            state = json.loads(self.path.read_text())
+            self.pending = {int(nonce): tx_hash for nonce, tx_hash in state["pending"].items()}
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Unable to load pending transactions from {self.path}: {e}")
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"pending": self.pending}))
+            tmp_path.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Unable to save pending transactions to {self.path}: {e}")
+
+    async def sync(self) -> None:
+        """Set the next nonce to the node's pending transaction count.
+
+        Persisted transactions the node no longer knows about were
+        dropped, so their nonces are reused."""
+        eth = self.endpoint._web3.eth
+        confirmed = await asyncio.to_thread(eth.get_transaction_count, self.address)
+        pending = await asyncio.to_thread(eth.get_transaction_count, self.address, "pending")
+
+        dropped = [nonce for nonce in self.pending if nonce >= pending]
+        if dropped:
+            logger.warning(f"Pending transactions dropped, reusing nonces: {sorted(dropped)}")
+        self.pending = {nonce: tx_hash for nonce, tx_hash in self.pending.items() if confirmed <= nonce < pending}
+        self.next = pending
+        self._save()
+        logger.debug(f"Synced nonce for {self.address}: {self.next}")
+
+    def resync(self) -> None:
+        """Sync with the node before handing out the next nonce."""
+        self.next = None
+
+    async def next_nonce(self) -> int:
+        """Reserve the next nonce."""
+        async with self._lock:
+            if self.next is None:
+                await self.sync()
+            assert self.next is not None
+            nonce = self.next
+            self.next += 1
+            return nonce
+
+    def sent(self, nonce: int, tx_hash: str) -> None:
+        """Record a sent transaction."""
+        self.pending[nonce] = tx_hash
+        self._save()
+
+    def confirmed(self, nonce: int) -> None:
+        """Forget transactions up to a confirmed nonce."""
+        self.pending = {n: tx_hash for n, tx_hash in self.pending.items() if n > nonce}
+        self._save()
+
+    def settle(self, nonce: int, status: ResponseStatus) -> None:
+        """Update after a write that waits for its receipt, like `Contract.write`.
+
+        A failed write may or may not have used its nonce, so resync."""
+        if status.ok:
+            self.confirmed(nonce)
+        else:
+            self.resync()
+
+    def release(self, nonce: int, error: Optional[Exception] = None) -> None:
+        """Return a nonce whose transaction wasn't sent.
+
+        Resyncs if later nonces were handed out meanwhile, since
+        they'd be stuck behind the gap, or if the node rejected
+        the nonce."""
+        if error is not None and is_nonce_error(str(error)):
+            logger.info(f"Nonce {nonce} rejected, resyncing: {error}")
+            self.resync()
+        elif self.next == nonce + 1:
+            self.next = nonce
+        else:
+            self.resync()
+
+
+def is_nonce_error(error: str) -> bool:
+    """Whether a node error means the local nonce is out of sync."""
+    error = error.lower()
+    return any(msg in error for msg in NONCE_ERRORS)
+
+
+_NONCE_MANAGERS: Dict[Tuple[int, str], NonceManager] = {}
+
+
+def nonce_manager(endpoint: RPCEndpoint, address: str) -> NonceManager:
+    """Shared nonce manager for an account on the endpoint's chain."""
+    address = to_checksum_address(address)
+    key = (endpoint.chain_id, address)
+    if key not in _NONCE_MANAGERS:
+        path = default_homedir() / "nonces" / f"{endpoint.chain_id}-{address}.json"
+        _NONCE_MANAGERS[key] = NonceManager(endpoint, address, path=path)
+    return _NONCE_MANAGERS[key]
@@ -0,0 +1,227 @@
+"""Sampling profiler for reporter iterations.
+
+Samples the Python stacks of the process's threads at a fixed interval:
+the event loop thread, and the worker threads that blocking RPC calls
+are run in. Each stack's root frame is its thread's name. Idle thread
+pool workers aren't sampled. Wall clock samples show where time goes,
+including waits on the node & price APIs; CPU samples are weighted by
+the CPU time each thread used, so they show hot code such as value &
+ABI encoding or multicall decoding.
+Profiles are written in the folded stack format read by flamegraph.pl,
+inferno & speedscope. Tracing spans recorded meanwhile are written as
+an asyncio task timeline in the Chrome trace event format (Perfetto,
+chrome://tracing).
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.tracing import configure_tracing
+from telliot_feeds.utils.tracing import InMemoryExporter
+from telliot_feeds.utils.tracing import Span
+
+
+logger = get_logger(__name__)
+
+# Folded stack, root first, frames separated by ";" -> weight (microseconds)
+Stacks = Counter[str]
+
+
+def frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+def fold(frame: Optional[FrameType], thread_name: Optional[str] = None) -> str:
+    """A frame's stack in the folded format, rooted at its thread's name if given."""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    if thread_name is not None:
+        labels.append(f"{thread_name} (thread)".replace(";", ":"))
+    return ";".join(reversed(labels))
+
+
+def is_idle_worker(frame: FrameType) -> bool:
+    """Whether a thread pool worker is waiting for work, blocked in its queue's C `get`."""
+    code = frame.f_code
+    return code.co_name == "_worker" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py"))
+
+
+def _cpu_time(thread_id: int) -> Optional[float]:
+    """CPU time a thread has used, None if unsupported on this platform or the thread exited."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+    except (AttributeError, OSError):
+        return None
+
+
+class SamplingProfiler:
+    """Samples every other thread's stack from a background thread."""
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.wall: Stacks = Counter()
+        self.cpu: Stacks = Counter()
+        self.cpu_supported = _cpu_time(threading.get_ident()) is not None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telliot-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last_wall = time.perf_counter()
+        # thread id -> CPU time at the last sample
+        last_cpu: Dict[int, float] = {}
+
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            # None for idle workers
+            stacks = {
+                thread_id: None if is_idle_worker(frame) else fold(frame, names.get(thread_id, str(thread_id)))
+                for thread_id, frame in frames.items()
+                if thread_id != own_id
+            }
+            del frames
+
+            now = time.perf_counter()
+            for stack in stacks.values():
+                if stack is not None:
+                    self.wall[stack] += int((now - last_wall) * 1e6)
+            last_wall = now
+
+            if not self.cpu_supported:
+                continue
+            cpu: Dict[int, float] = {}
+            for thread_id, stack in stacks.items():
+                cpu_now = _cpu_time(thread_id)
+                if cpu_now is None:
+                    continue
+                cpu[thread_id] = cpu_now
+                cpu_then = last_cpu.get(thread_id)
+                if stack is not None and cpu_then is not None and cpu_now > cpu_then:
+                    self.cpu[stack] += int((cpu_now - cpu_then) * 1e6)
+            # Exited threads are dropped, their ids may be reused
+            last_cpu = cpu
+
+
+def write_folded(stacks: Stacks, path: Path) -> None:
+    path.write_text("".join(f"{stack} {weight}\n" for stack, weight in stacks.most_common() if weight > 0))
+
+
+def top_functions(stacks: Stacks, n: int = 20) -> List[Tuple[str, int, int]]:
+    """(function, self weight, total weight) of the n functions with the most self weight."""
+    self_weight: Stacks = Counter()
+    total_weight: Stacks = Counter()
+    for stack, weight in stacks.items():
+        frames = stack.split(";")
+        self_weight[frames[-1]] += weight
+        # Count recursive functions once per stack
+        for label in set(frames):
+            total_weight[label] += weight
+    return [(label, weight, total_weight[label]) for label, weight in self_weight.most_common(n)]
+
+
+def format_summary(title: str, stacks: Stacks, n: int = 20) -> str:
+    total = sum(stacks.values())
+    if total == 0:
+        return f"{title}: no samples"
+    lines = [f"{title} ({total / 1e6:.3f}s sampled)", f"{'self %':>8} {'total %':>8}  function"]
+    for label, self_weight, total_weight in top_functions(stacks, n):
+        lines.append(f"{100 * self_weight / total:8.1f} {100 * total_weight / total:8.1f}  {label}")
+    return "\n".join(lines)
+
+
+def chrome_trace(spans: List[Span]) -> Dict[str, Any]:
+    """Spans as complete events, one timeline row per asyncio task."""
+    tids: Dict[str, int] = {}
+    events: List[Dict[str, Any]] = []
+    for s in sorted(spans, key=lambda s: s.start_time_unix_nano):
+        task = s.task or "no task"
+        if task not in tids:
+            tids[task] = len(tids) + 1
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tids[task], "args": {"name": task}})
+        events.append(
+            {
+                "name": s.name,
+                "ph": "X",
+                "pid": 1,
+                "tid": tids[task],
+                "ts": s.start_time_unix_nano / 1e3,
+                "dur": (s.end_time_unix_nano - s.start_time_unix_nano) / 1e3,
+                "args": {**s.attributes, "status": s.status},
+            }
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+async def profile_reporter(
+    reporter: Any, iterations: int, output_prefix: str = "telliot-profile", interval: float = 0.005
+) -> Dict[str, Path]:
+    """Profile `iterations` back to back `report_once` calls of a reporter.
+
+    Writes wall & CPU folded stacks, a task timeline & a summary of the
+    hottest functions, and returns their paths."""
+    exporter = InMemoryExporter()
+    previous_exporter = configure_tracing(exporter)
+    profiler = SamplingProfiler(interval=interval)
+    profiler.start()
+    start = time.perf_counter()
+    try:
+        for i in range(iterations):
+            logger.info(f"Profiling report_once iteration {i + 1}/{iterations}")
+            _, status = await reporter.report_once()
+            if not status.ok:
+                logger.info(f"Iteration {i + 1} didn't report: {status.error}")
+    finally:
+        profiler.stop()
+        configure_tracing(previous_exporter)
+    elapsed = time.perf_counter() - start
+
+    paths = {
+        "wall": Path(f"{output_prefix}.wall.folded"),
+        "cpu": Path(f"{output_prefix}.cpu.folded"),
+        "timeline": Path(f"{output_prefix}.timeline.json"),
+        "summary": Path(f"{output_prefix}.summary.txt"),
+    }
+    write_folded(profiler.wall, paths["wall"])
+    if profiler.cpu_supported:
+        write_folded(profiler.cpu, paths["cpu"])
+    else:
+        logger.warning("Per-thread CPU clocks unsupported on this platform, skipping CPU profile")
+        del paths["cpu"]
+    paths["timeline"].write_text(json.dumps(chrome_trace(exporter.spans)))
+
+    sections = [f"{iterations} report_once iterations in {elapsed:.3f}s ({elapsed / iterations:.3f}s each)"]
+    sections.append(format_summary("Wall clock", profiler.wall))
+    if profiler.cpu_supported:
+        sections.append(format_summary("CPU", profiler.cpu))
+    summary = "\n\n".join(sections)
+    paths["summary"].write_text(summary + "\n")
+    logger.info(f"Profile summary:\n{summary}")
+    logger.info(f"Profile written to: {', '.join(str(path) for path in paths.values())}")
+    return paths
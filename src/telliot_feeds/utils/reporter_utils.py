@@ -1,3 +1,5 @@
+import asyncio
+from typing import Any
 from typing import List
 from typing import Optional
 from typing import Union
@@ -43,3 +45,10 @@ async def tellor_suggested_report(
 
     else:
         return None
+
+
+async def cancel_tasks(*tasks: "asyncio.Task[Any]") -> None:
+    """Cancel tasks and wait until they've finished, discarding their results."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,184 @@
+"""Tracing spans for the reporting pipeline.
+
+Spans follow OpenTelemetry's data model: each `report_once` call is a
+trace, with child spans for its stages, contract reads, multicalls,
+price service requests & price aggregation. The current span is kept in
+a context variable, so spans started in tasks spawned by a span are its
+children. Tracing is off until an exporter is configured, e.g. by
+`telliot-feeds report --trace-file`, and spans are no-ops meanwhile.
+"""
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import cast
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import TypeVar
+from typing import Union
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# A coroutine function, so decorating it keeps its signature
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    start_time_unix_nano: int = 0
+    end_time_unix_nano: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    # "OK" or "ERROR"
+    status: str = "OK"
+    # Name of the asyncio task the span was started in
+    task: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "duration_ms": (self.end_time_unix_nano - self.start_time_unix_nano) / 1e6,
+            "attributes": self.attributes,
+            "status": self.status,
+            "task": self.task,
+        }
+
+
+class SpanExporter:
+    """Receives spans as they end."""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class FileExporter(SpanExporter):
+    """Appends spans to a file, one JSON object per line."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        # Spans may end in worker threads
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with self.path.open("a") as f:
+                f.write(line + "\n")
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps ended spans in a list, e.g. to inspect in tests."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+_exporter: Optional[SpanExporter] = None
+_current_span: ContextVar[Optional[Span]] = ContextVar("telliot_current_span", default=None)
+
+
+def configure_tracing(exporter: Optional[SpanExporter]) -> Optional[SpanExporter]:
+    """Export spans to the given exporter, or disable tracing if None.
+
+    Returns the previous exporter."""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    if exporter is not None:
+        logger.info(f"Tracing enabled: {type(exporter).__name__}")
+    return previous
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a span around a block, as a child of the current span.
+
+    Yields None if tracing is disabled."""
+    exporter = _exporter
+    if exporter is None:
+        yield None
+        return
+
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        # No running event loop in this thread
+        task = None
+
+    parent = _current_span.get()
+    new_span = Span(
+        name=name,
+        trace_id=parent.trace_id if parent is not None else os.urandom(16).hex(),
+        span_id=os.urandom(8).hex(),
+        parent_span_id=parent.span_id if parent is not None else None,
+        start_time_unix_nano=time.time_ns(),
+        attributes=attributes,
+        task=task.get_name() if task is not None else None,
+    )
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.status = "ERROR"
+        new_span.set_attribute("exception.type", type(e).__name__)
+        new_span.set_attribute("exception.message", str(e))
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end_time_unix_nano = time.time_ns()
+        try:
+            exporter.export(new_span)
+        except Exception as e:
+            logger.warning(f"Unable to export span {name}: {e}")
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator recording a span around each call of a coroutine function."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name, **{"code.function": func.__qualname__}):
+                return await func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
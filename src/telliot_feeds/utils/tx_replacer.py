@@ -0,0 +1,229 @@
+"""Fee bumping for stuck transactions.
+
+While a sent transaction is pending, it's periodically resent with the
+same nonce and bumped fees, so it replaces the stuck version in the
+mempool. Bumps stop at a fee ceiling, e.g. the highest fee at which a
+report is still profitable. If a pending transaction becomes obsolete
+(e.g. another report for the query was included first, so it would
+revert), it's replaced with a cheap 0 value transfer to self instead.
+All versions are tracked until one of them is mined.
+
+Transactions a previous run left pending, as persisted by the nonce
+manager, are cancelled the same way on startup.
+"""
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from eth_account.signers.local import LocalAccount
+from telliot_core.model.endpoints import RPCEndpoint
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted
+from web3.exceptions import TransactionNotFound
+
+from telliot_feeds.utils.log import get_logger
+from telliot_feeds.utils.nonce_manager import is_nonce_error
+from telliot_feeds.utils.nonce_manager import NonceManager
+from telliot_feeds.utils.tx_tracker import TxTracker
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class BumpPolicy:
+    """When & how much to bump a pending transaction's fees"""
+
+    # Seconds to wait for a version to be mined before bumping
+    interval: float = 30.0
+    # Fee increase per bump, nodes only accept replacements with at least 10% higher fees
+    percent: float = 12.5
+    # 0 disables bumping
+    max_bumps: int = 3
+
+
+def bump_fees(tx: Dict[str, Any], percent: float, fee_ceiling: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Transaction with fees bumped by a percentage.
+
+    Returns None if the bumped max fee (or gas price) per gas, in wei,
+    exceeds the fee ceiling."""
+
+    def bump(fee: int) -> int:
+        # Scale before dividing, so e.g. a 10% bump of 200 is exactly 220
+        return math.ceil(fee * (100 + percent) / 100)
+
+    bumped = dict(tx)
+    if "gasPrice" in tx:
+        bumped["gasPrice"] = bump(tx["gasPrice"])
+        max_fee = bumped["gasPrice"]
+    else:
+        bumped["maxFeePerGas"] = bump(tx["maxFeePerGas"])
+        bumped["maxPriorityFeePerGas"] = bump(tx["maxPriorityFeePerGas"])
+        max_fee = bumped["maxFeePerGas"]
+
+    if fee_ceiling is not None and max_fee > fee_ceiling:
+        return None
+    return bumped
+
+
+def cancel_tx(tx: Dict[str, Any], address: str) -> Dict[str, Any]:
+    """0 value transfer to self, with the same nonce & fees"""
+    fee_keys = ("gasPrice", "maxFeePerGas", "maxPriorityFeePerGas", "nonce", "chainId")
+    return {
+        **{key: tx[key] for key in fee_keys if key in tx},
+        "to": address,
+        "value": 0,
+        "gas": 21000,
+        "data": "0x",
+    }
+
+
+class TxReplacer:
+    """Resends one account's pending transactions with bumped fees."""
+
+    def __init__(
+        self,
+        endpoint: RPCEndpoint,
+        nonces: NonceManager,
+        txs: TxTracker,
+        policy: Optional[BumpPolicy] = None,
+    ) -> None:
+        self.endpoint = endpoint
+        self.nonces = nonces
+        self.txs = txs
+        self.policy = policy if policy is not None else BumpPolicy()
+
+    async def send(self, account: LocalAccount, tx: Dict[str, Any]) -> Optional[str]:
+        """Sign & send a replacement. None if the node rejected it."""
+        signed = account.sign_transaction(tx)  # type: ignore
+        try:
+            tx_hash = await asyncio.to_thread(self.endpoint._web3.eth.send_raw_transaction, signed.rawTransaction)
+        except Exception as e:
+            # Nonce errors mean a previous version was likely mined
+            log = logger.info if is_nonce_error(str(e)) else logger.warning
+            log(f"Replacement for nonce {tx['nonce']} not sent: {e}")
+            return None
+
+        self.nonces.sent(tx["nonce"], tx_hash.hex())
+        return str(tx_hash.hex())
+
+    async def wait(
+        self,
+        account: LocalAccount,
+        tx: Dict[str, Any],
+        tx_hash: str,
+        fee_ceiling: Optional[int] = None,
+        is_obsolete: Optional[Callable[[], Awaitable[bool]]] = None,
+        timeout: float = 360,
+    ) -> Tuple[AttributeDict[Any, Any], bool]:
+        """Wait for a sent transaction, or one of its replacements, to be mined.
+
+        Every bump interval without a receipt, the transaction is resent
+        with bumped fees, up to the fee ceiling (wei per gas) and the
+        policy's max bumps. Once `is_obsolete` returns True it's
+        replaced with a 0 value transfer to self.
+
+        Returns the receipt & whether the transaction was cancelled.
+        Raises `TimeExhausted` if no version is mined in time."""
+        if self.policy.max_bumps == 0:
+            return await self.txs.wait(tx_hash, timeout=timeout), False
+
+        deadline = time.time() + timeout
+        versions: List[Tuple["asyncio.Future[AttributeDict[Any, Any]]", bool]] = [
+            (self.txs.track(tx_hash, timeout=timeout), False)
+        ]
+        bumps = 0
+        cancelled = False
+
+        try:
+            while True:
+                remaining = deadline - time.time()
+                pending = [future for future, _ in versions if not future.done()]
+                if pending and remaining > 0:
+                    _ = await asyncio.wait(
+                        pending, timeout=min(self.policy.interval, remaining), return_when=asyncio.FIRST_COMPLETED
+                    )
+
+                for future, is_cancel in versions:
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        return future.result(), is_cancel
+
+                if time.time() >= deadline or all(future.done() for future, _ in versions):
+                    raise TimeExhausted(f"Transaction {tx_hash} and its replacements not mined in {timeout} seconds")
+
+                if not cancelled and is_obsolete is not None and await is_obsolete():
+                    logger.info(f"Transaction with nonce {tx['nonce']} is obsolete, cancelling")
+                    tx = cancel_tx(tx, account.address)
+                    cancelled = True
+                elif bumps >= self.policy.max_bumps:
+                    continue
+
+                # A cancel costs little gas, so it's not bound by the fee ceiling
+                bumped = bump_fees(tx, self.policy.percent, None if cancelled else fee_ceiling)
+                if bumped is None:
+                    logger.info(f"Not bumping fees for nonce {tx['nonce']}: fee ceiling reached")
+                    bumps = self.policy.max_bumps
+                    continue
+
+                bumps += 1
+                new_hash = await self.send(account, bumped)
+                if new_hash is None:
+                    continue
+                logger.info(f"Resent nonce {tx['nonce']} with bumped fees, bump {bumps}: {new_hash}")
+                tx = bumped
+                versions.append((self.txs.track(new_hash, timeout=deadline - time.time()), cancelled))
+        finally:
+            # Stop tracking versions that weren't mined
+            for future, _ in versions:
+                future.cancel()
+
+    async def recover(self, account: LocalAccount, timeout: float = 360) -> None:
+        """Cancel transactions a previous run left pending.
+
+        Their reports are likely stale by now, and later transactions
+        would be stuck behind them. Each is given a bump interval to be
+        mined, then replaced with a 0 value transfer to self."""
+        # Drops persisted transactions that were mined or dropped meanwhile
+        await self.nonces.sync()
+        stuck = sorted(self.nonces.pending.items())
+        if not stuck:
+            return
+        logger.info(f"Recovering transactions left pending, nonces: {[nonce for nonce, _ in stuck]}")
+        _ = await asyncio.gather(*(self._recover(account, nonce, tx_hash, timeout) for nonce, tx_hash in stuck))
+
+    async def _recover(self, account: LocalAccount, nonce: int, tx_hash: str, timeout: float) -> None:
+        try:
+            sent = await asyncio.to_thread(self.endpoint._web3.eth.get_transaction, tx_hash)
+        except TransactionNotFound:
+            # Replaced by a version that wasn't recorded, the node's count covers it
+            logger.warning(f"Pending transaction {tx_hash} with nonce {nonce} not found")
+            return
+        except Exception as e:
+            logger.warning(f"Unable to fetch pending transaction {tx_hash}: {e}")
+            return
+
+        if "maxFeePerGas" in sent:
+            fees = {"maxFeePerGas": sent["maxFeePerGas"], "maxPriorityFeePerGas": sent["maxPriorityFeePerGas"]}
+        else:
+            fees = {"gasPrice": sent["gasPrice"]}
+        tx = {**fees, "nonce": nonce, "chainId": self.endpoint.chain_id}
+
+        async def is_obsolete() -> bool:
+            return True
+
+        try:
+            _, cancelled = await self.wait(account, tx, tx_hash, is_obsolete=is_obsolete, timeout=timeout)
+        except Exception as e:
+            self.nonces.resync()
+            logger.warning(f"Pending transaction with nonce {nonce} not recovered: {e}")
+            return
+        self.nonces.confirmed(nonce)
+        logger.info(f"Pending transaction with nonce {nonce} {'cancelled' if cancelled else 'mined'}")
@@ -0,0 +1,122 @@
+"""Pre-submit transaction simulation.
+
+Runs a built transaction through `eth_call` against the pending block
+before it's signed & sent, so submissions that would revert (e.g. a
+stale report nonce, or reporter lock) are skipped instead of paying
+for the failed transaction. Revert reasons are cached per report, so a
+known-bad (query id, report nonce) isn't submitted or simulated again.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+from eth_abi import decode_single
+from telliot_core.model.endpoints import RPCEndpoint
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+# Selector of Solidity's Error(string)
+ERROR_SELECTOR = "0x08c379a0"
+
+# Revert reasons meaning the report nonce is stale, for any reporter
+STALE_NONCE_REASONS = ("nonce must match",)
+
+# (query id, report nonce, reporter address or None if the revert applies to any reporter)
+SimulationKey = Tuple[bytes, int, Optional[str]]
+
+
+def revert_reason(error: Exception) -> Optional[str]:
+    """Revert reason of a failed `eth_call`, None if the call didn't revert."""
+    arg = error.args[0] if error.args else None
+    if isinstance(arg, dict):
+        data = arg.get("data")
+        if isinstance(data, str) and data.startswith(ERROR_SELECTOR):
+            try:
+                # Error's args are encoded as a tuple, so the string follows its offset
+                (reason,) = decode_single("(string)", bytes.fromhex(data.removeprefix(ERROR_SELECTOR)))
+                return str(reason)
+            except Exception:
+                pass
+        message = str(arg.get("message", ""))
+    else:
+        message = str(error)
+
+    if "revert" not in message.lower():
+        return None
+    return message.removeprefix("execution reverted: ").removeprefix("execution reverted")
+
+
+class TxSimulator:
+    """Simulates report transactions on one chain & caches their revert reasons."""
+
+    def __init__(self, endpoint: RPCEndpoint, ttl: float = 60, max_entries: int = 1024) -> None:
+        self.endpoint = endpoint
+        # Seconds reporter specific reverts (e.g. reporter lock) are cached
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key: (revert reason, expiry timestamp)
+        self.reverts: "OrderedDict[SimulationKey, Tuple[str, float]]" = OrderedDict()
+
+    def known_revert(self, query_id: bytes, report_count: int, address: str) -> Optional[str]:
+        """Cached revert reason of a report, if any."""
+        for key in ((query_id, report_count, None), (query_id, report_count, address)):
+            if key not in self.reverts:
+                continue
+            reason, expiry = self.reverts[key]
+            if time.time() < expiry:
+                return reason
+            del self.reverts[key]
+        return None
+
+    def _cache(self, query_id: bytes, report_count: int, address: str, reason: str) -> None:
+        if any(msg in reason.lower() for msg in STALE_NONCE_REASONS):
+            # Report counts only increase, so a stale nonce stays stale
+            key: SimulationKey = (query_id, report_count, None)
+            expiry = float("inf")
+        else:
+            key = (query_id, report_count, address)
+            expiry = time.time() + self.ttl
+
+        self.reverts[key] = (reason, expiry)
+        self.reverts.move_to_end(key)
+        if len(self.reverts) > self.max_entries:
+            self.reverts.popitem(last=False)
+
+    async def check(self, tx: Dict[str, Any], address: str, query_id: bytes, report_count: int) -> Optional[str]:
+        """Revert reason if a report transaction would revert, else None.
+
+        Reports aren't skipped if the simulation itself fails."""
+        reason = self.known_revert(query_id, report_count, address)
+        if reason is not None:
+            return reason
+
+        call = {key: val for key, val in tx.items() if key not in ("nonce", "chainId")}
+        call["from"] = address
+        try:
+            _ = await asyncio.to_thread(self.endpoint._web3.eth.call, call, "pending")
+            return None
+        except Exception as e:
+            reason = revert_reason(e)
+            if reason is None:
+                logger.warning(f"Unable to simulate transaction: {e}")
+                return None
+
+        self._cache(query_id, report_count, address, reason)
+        return reason
+
+
+_TX_SIMULATORS: Dict[int, TxSimulator] = {}
+
+
+def tx_simulator(endpoint: RPCEndpoint) -> TxSimulator:
+    """Shared transaction simulator for the endpoint's chain."""
+    if endpoint.chain_id not in _TX_SIMULATORS:
+        _TX_SIMULATORS[endpoint.chain_id] = TxSimulator(endpoint)
+    return _TX_SIMULATORS[endpoint.chain_id]
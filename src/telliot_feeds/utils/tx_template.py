@@ -0,0 +1,84 @@
+"""Precompiled submitValue transactions.
+
+Building a `submitValue` transaction through web3 looks up the function
+ABI, resolves its selector and ABI-encodes every argument on each
+report. A template precomputes the selector and the parts of the call
+data that only depend on the query (its id & query data), so only the
+value, report count, account nonce and fees are filled in per report.
+"""
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Tuple
+
+from eth_utils import function_abi_to_4byte_selector
+from telliot_core.contract.contract import Contract
+from web3 import Web3
+
+from telliot_feeds.queries.query import OracleQuery
+
+
+# submitValue(bytes32 _queryId, bytes _value, uint256 _nonce, bytes _queryData)
+SUBMIT_VALUE_INPUTS = ["bytes32", "bytes", "uint256", "bytes"]
+
+# Number of templates kept, least recently used are dropped first
+MAX_TEMPLATES = 256
+
+
+def _word(n: int) -> bytes:
+    return n.to_bytes(32, "big")
+
+
+def _encode_bytes(data: bytes) -> bytes:
+    """ABI encoding of a dynamic `bytes` argument's tail: length, then right-padded data."""
+    return _word(len(data)) + data + b"\x00" * (-len(data) % 32)
+
+
+class SubmitValueTemplate:
+    """submitValue transactions for one query to one oracle."""
+
+    def __init__(self, oracle_address: str, selector: bytes, query_id: bytes, query_data: bytes) -> None:
+        if len(query_id) != 32:
+            raise ValueError(f"Query id must be 32 bytes, got {len(query_id)}")
+        self.to = Web3.toChecksumAddress(oracle_address)
+        self.selector = selector
+        self.query_id = query_id
+        self.query_data_tail = _encode_bytes(query_data)
+
+    @classmethod
+    def from_contract(cls, oracle: Contract, query: OracleQuery) -> "SubmitValueTemplate":
+        """Template using the oracle contract's submitValue ABI."""
+        func_abi = oracle.contract.get_function_by_name("submitValue").abi
+        inputs = [i["type"] for i in func_abi["inputs"]]
+        if inputs != SUBMIT_VALUE_INPUTS:
+            raise ValueError(f"Unsupported submitValue inputs: {inputs}")
+        selector = function_abi_to_4byte_selector(func_abi)
+        return cls(oracle.address, selector, query.query_id, query.query_data)
+
+    def data(self, value: bytes, report_count: int) -> bytes:
+        """Call data for submitting a value."""
+        value_tail = _encode_bytes(value)
+        # Head: query id, offset of value, report count, offset of query data
+        head = self.query_id + _word(128) + _word(report_count) + _word(128 + len(value_tail))
+        return self.selector + head + value_tail + self.query_data_tail
+
+    def build(self, value: bytes, report_count: int, tx_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Transaction for submitting a value, ready for signing.
+
+        `tx_params` are the account nonce, gas & fee fields and chain id."""
+        return {**tx_params, "to": self.to, "value": 0, "data": Web3.toHex(self.data(value, report_count))}
+
+
+_TEMPLATES: "OrderedDict[Tuple[int, str, bytes], SubmitValueTemplate]" = OrderedDict()
+
+
+def submit_template(chain_id: int, oracle: Contract, query: OracleQuery) -> SubmitValueTemplate:
+    """Shared submitValue template for a query to the oracle on a chain."""
+    key = (chain_id, oracle.address, query.query_id)
+    if key in _TEMPLATES:
+        _TEMPLATES.move_to_end(key)
+    else:
+        _TEMPLATES[key] = SubmitValueTemplate.from_contract(oracle, query)
+        if len(_TEMPLATES) > MAX_TEMPLATES:
+            _TEMPLATES.popitem(last=False)
+    return _TEMPLATES[key]
@@ -0,0 +1,142 @@
+"""Non-blocking transaction confirmation.
+
+Submitted transaction hashes are registered with a tracker, which polls
+for their receipts in a background task, once per new block. Each hash
+gets a future that resolves on confirmation (including reverts) or
+fails with `TimeExhausted` on timeout. The event loop stays free while
+transactions confirm, so reporters can prepare other submissions.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+from hexbytes import HexBytes
+from telliot_core.model.endpoints import RPCEndpoint
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted
+from web3.exceptions import TransactionNotFound
+
+from telliot_feeds.utils.log import get_logger
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class TrackedTx:
+    tx_hash: str
+    timeout: float
+    deadline: float
+    future: "asyncio.Future[AttributeDict[Any, Any]]"
+
+
+class TxTracker:
+    """Waits for transaction receipts from one endpoint in the background."""
+
+    def __init__(self, endpoint: RPCEndpoint, poll_interval: float = 1.0, timeout: float = 360) -> None:
+        self.endpoint = endpoint
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.pending: Dict[str, TrackedTx] = {}
+        self._last_block: Optional[int] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def track(
+        self,
+        tx_hash: Union[HexBytes, str],
+        timeout: Optional[float] = None,
+        callback: Optional[Callable[["asyncio.Future[AttributeDict[Any, Any]]"], None]] = None,
+    ) -> "asyncio.Future[AttributeDict[Any, Any]]":
+        """Register a submitted transaction.
+
+        Returns a future for the transaction receipt. The callback,
+        if any, is called with the future once it's done."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and self._task.get_loop() is not loop:
+            # Futures from a previous event loop can't be awaited
+            self.pending = {}
+            self._task = None
+
+        tx_hash = tx_hash if isinstance(tx_hash, str) else Web3.toHex(tx_hash)
+        if tx_hash not in self.pending:
+            timeout = self.timeout if timeout is None else timeout
+            future = loop.create_future()
+            self.pending[tx_hash] = TrackedTx(tx_hash, timeout, time.time() + timeout, future)
+            # Check new transactions on the next poll, even without a new block
+            self._last_block = None
+
+        future = self.pending[tx_hash].future
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        return future
+
+    async def wait(self, tx_hash: Union[HexBytes, str], timeout: Optional[float] = None) -> AttributeDict[Any, Any]:
+        """Wait for a transaction receipt without blocking the event loop.
+
+        Raises `TimeExhausted` if the transaction isn't mined in time.
+        Cancelling the wait doesn't stop tracking the transaction."""
+        return await asyncio.shield(self.track(tx_hash, timeout=timeout))
+
+    async def _poll(self) -> None:
+        while self.pending:
+            try:
+                block_number = await asyncio.to_thread(lambda: self.endpoint._web3.eth.block_number)
+            except Exception as e:
+                logger.warning(f"Unable to fetch block number: {e}")
+                block_number = None
+
+            # Receipts only change with new blocks
+            if block_number is None or block_number != self._last_block:
+                self._last_block = block_number
+                await asyncio.gather(*[self._check(tx) for tx in list(self.pending.values())])
+
+            self._expire()
+            if self.pending:
+                await asyncio.sleep(self.poll_interval)
+
+    async def _check(self, tx: TrackedTx) -> None:
+        if tx.future.done():
+            # Cancelled by the caller
+            self.pending.pop(tx.tx_hash, None)
+            return
+
+        try:
+            receipt = await asyncio.to_thread(self.endpoint._web3.eth.get_transaction_receipt, tx.tx_hash)
+        except TransactionNotFound:
+            return
+        except Exception as e:
+            logger.debug(f"Unable to fetch receipt for {tx.tx_hash}: {e}")
+            return
+
+        self.pending.pop(tx.tx_hash, None)
+        if not tx.future.done():
+            tx.future.set_result(receipt)
+
+    def _expire(self) -> None:
+        now = time.time()
+        for tx in list(self.pending.values()):
+            if tx.future.done():
+                self.pending.pop(tx.tx_hash, None)
+            elif now >= tx.deadline:
+                self.pending.pop(tx.tx_hash, None)
+                msg = f"Transaction {tx.tx_hash} is not in the chain after {tx.timeout} seconds"
+                tx.future.set_exception(TimeExhausted(msg))
+
+
+_TX_TRACKERS: Dict[int, TxTracker] = {}
+
+
+def tx_tracker(endpoint: RPCEndpoint) -> TxTracker:
+    """Shared transaction tracker for the endpoint's chain."""
+    if endpoint.chain_id not in _TX_TRACKERS:
+        _TX_TRACKERS[endpoint.chain_id] = TxTracker(endpoint)
+    return _TX_TRACKERS[endpoint.chain_id]
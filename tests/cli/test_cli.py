@@ -110,6 +110,15 @@ def test_custom_gas_flag():
     assert expected in result.output
 
 
+def test_scheduled_unsupported_options():
+    """Test scheduled reporting with options it doesn't support."""
+    runner = CliRunner()
+    result = runner.invoke(cli_main, ["report", "--scheduled", "--rng-auto"])
+
+    expected = "Scheduled reporting is only supported for single account TellorFlex autopay & query tag reporting"
+    assert expected in result.output
+
+
 def test_diva_protocol_invalid_chain():
     valid = valid_diva_chain(chain_id=1)
 
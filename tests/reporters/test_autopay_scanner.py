@@ -0,0 +1,51 @@
+import json
+
+from telliot_core.utils.timestamp import TimeStamp
+
+from telliot_feeds.reporters.autopay_scanner import _rank
+from telliot_feeds.reporters.autopay_scanner import AutopayScanner
+from telliot_feeds.reporters.autopay_scanner import ScanTable
+from telliot_feeds.reporters.autopay_scanner import TipOpportunity
+
+
+def test_rank():
+    now = TimeStamp.now().ts
+    unknown = TipOpportunity(1666600000, "eth-usd-legacy", int(50e18), None, now)
+    low = TipOpportunity(137, "btc-usd-legacy", int(10e18), 1.5, now)
+    high = TipOpportunity(80001, "trb-usd-legacy", int(5e18), 20.0, now)
+
+    assert _rank([unknown, low, high]) == [high, low, unknown]
+
+
+def test_best_per_chain():
+    now = TimeStamp.now().ts
+    scanner = AutopayScanner(autopays=[])
+    scanner.table = {
+        137: [TipOpportunity(137, "btc-usd-legacy", int(10e18), 1.5, now)],
+        80001: [TipOpportunity(80001, "trb-usd-legacy", int(5e18), 20.0, now)],
+    }
+
+    assert scanner.best().chain_id == 80001
+    assert scanner.best(137).query_tag == "btc-usd-legacy"
+    assert scanner.best(1) is None
+
+
+def test_scan_table(tmp_path):
+    now = TimeStamp.now().ts
+    path = tmp_path / "autopay_scan.json"
+    scanner = AutopayScanner(autopays=[], output_path=path)
+    scanner.table = {
+        137: [
+            TipOpportunity(137, "btc-usd-legacy", int(10e18), 1.5, now),
+            TipOpportunity(137, "eth-usd-legacy", int(10e18), 3.0, now - 600),
+        ],
+    }
+    scanner.publish()
+    assert len(json.loads(path.read_text())) == 2
+
+    # stale rows are ignored
+    table = ScanTable(path, max_age=60)
+    assert table.best(137).query_tag == "btc-usd-legacy"
+    assert table.best(80001) is None
+
+    assert ScanTable(tmp_path / "missing.json").best() is None
@@ -3,22 +3,19 @@ Tests covering the IntervalReporter class from
 telliot's reporters subpackage.
 """
 import asyncio
-from datetime import datetime
 from unittest import mock
 
 import pytest
 import pytest_asyncio
 from brownie import accounts
 from telliot_core.apps.core import TelliotCore
-from telliot_core.gas.legacy_gas import ethgasstation
 from telliot_core.utils.response import ResponseStatus
 from web3.datastructures import AttributeDict
 
 from telliot_feeds.datafeed import DataFeed
 from telliot_feeds.feeds.eth_usd_feed import eth_usd_median_feed
-from telliot_feeds.reporters import interval
 from telliot_feeds.reporters.interval import IntervalReporter
-from telliot_feeds.sources.etherscan_gas import EtherscanGasPrice
+from telliot_feeds.utils.fee_estimator import FeeEstimate
 
 
 @pytest_asyncio.fixture(scope="function")
@@ -82,13 +79,12 @@ async def test_fetch_datafeed(eth_usd_reporter):
 
 @pytest.mark.asyncio
 async def test_get_fee_info(eth_usd_reporter):
-    info, time = await eth_usd_reporter.get_fee_info()
+    info = await eth_usd_reporter.get_fee_info()
 
-    assert isinstance(time, datetime)
-    assert isinstance(info, EtherscanGasPrice)
-    assert isinstance(info.LastBlock, int)
-    assert info.LastBlock > 0
-    assert isinstance(info.gasUsedRatio, list)
+    assert isinstance(info, FeeEstimate)
+    assert isinstance(info.block_number, int)
+    assert info.block_number > 0
+    assert info.gas_price > 0
 
 
 @pytest.mark.asyncio
@@ -147,7 +143,7 @@ async def test_ensure_profitable(eth_usd_reporter):
 
 @pytest.mark.asyncio
 async def test_fetch_gas_price(eth_usd_reporter):
-    """Test retrieving custom gas price from eth gas station."""
+    """Test retrieving custom gas price from the fee estimator."""
     r = eth_usd_reporter
 
     assert r.gas_price_speed == "safeLow"
@@ -163,12 +159,13 @@ async def test_fetch_gas_price(eth_usd_reporter):
 
 
 @pytest.mark.asyncio
-async def test_ethgasstation_error(eth_usd_reporter):
+async def test_gas_price_error(eth_usd_reporter, monkeypatch):
     async def no_gas_price(speed):
         return None
 
     r = eth_usd_reporter
-    interval.ethgasstation = no_gas_price
+    # The fee estimator is shared by the chain's reporters
+    monkeypatch.setattr(r.fees, "gas_price", no_gas_price)
 
     staked, status = await r.ensure_staked()
     assert not staked
@@ -180,7 +177,6 @@ async def test_ethgasstation_error(eth_usd_reporter):
     tx_receipt, status = await r.report_once()
     assert tx_receipt is None
     assert not status.ok
-    interval.ethgasstation = ethgasstation
     yield
 
 
@@ -320,3 +316,84 @@ async def test_ensure_reporter_lock_check_after_submitval_attempt(
         assert not status.ok
         assert "bingo" in status.error
         assert r.last_submission_timestamp == 0
+
+
+@pytest.mark.asyncio
+async def test_nonce_released_when_signing_fails(eth_usd_reporter, guaranteed_price_source):
+    r = eth_usd_reporter
+    r.fetch_gas_price = gas_price
+    r.ensure_staked = passing_bool_w_status
+    r.ensure_profitable = passing_status
+    r.datafeed.source.sources = [guaranteed_price_source]
+
+    async def num_reports(*args, **kwargs):
+        return 1, ResponseStatus()
+
+    r.get_num_reports_by_id = num_reports
+    nonce = await r.nonces.next_nonce()
+    r.nonces.release(nonce)
+
+    with mock.patch("telliot_feeds.reporters.interval.lazy_unlock_account", side_effect=ValueError("locked")):
+        with pytest.raises(ValueError):
+            await r.report_once()
+    # the nonce is handed out again
+    assert await r.nonces.next_nonce() == nonce
+    r.nonces.release(nonce)
+
+
+@pytest.mark.asyncio
+async def test_failed_check_cancels_datafeed_fetch(eth_usd_reporter):
+    """Test pending datafeed fetch is cancelled when the reporter lock check fails."""
+    r = eth_usd_reporter
+    fetch_started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_fetch_datafeed():
+        fetch_started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def lock_status():
+        await fetch_started.wait()
+        return ResponseStatus(ok=False, error="Current address is in reporter lock.")
+
+    r.ensure_staked = passing_bool_w_status
+    r.check_reporter_lock = lock_status
+    r.fetch_datafeed = slow_fetch_datafeed
+
+    tx_receipt, status = await asyncio.wait_for(r.report_once(), timeout=5)
+
+    assert tx_receipt is None
+    assert status.error == "Current address is in reporter lock."
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_unprofitable_cancels_value_fetch(eth_usd_reporter):
+    """Test speculative value fetch is cancelled when the report isn't profitable."""
+    r = eth_usd_reporter
+    cancelled = asyncio.Event()
+
+    async def slow_fetch_new_datapoint():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def unprofitable(datafeed):
+        return ResponseStatus(ok=False, error="Estimated profitability below threshold.")
+
+    r.ensure_staked = passing_bool_w_status
+    r.check_reporter_lock = passing_status
+    r.ensure_profitable = unprofitable
+
+    with mock.patch.object(r.datafeed.source, "fetch_new_datapoint", slow_fetch_new_datapoint):
+        tx_receipt, status = await asyncio.wait_for(r.report_once(), timeout=5)
+
+    assert tx_receipt is None
+    assert status.error == "Estimated profitability below threshold."
+    assert cancelled.is_set()
@@ -109,7 +109,7 @@ async def test_fetch_gas_price_error(polygon_reporter, caplog):
     r = polygon_reporter
     gp = await r.fetch_gas_price("blah")
     assert gp is None
-    assert "Invalid gas price speed for matic gasstation: blah" in caplog.text
+    assert "Invalid gas price speed: blah" in caplog.text
 
     # Test fetch gas price failure
     async def _fetch_gas_price():
@@ -120,4 +120,4 @@ async def test_fetch_gas_price_error(polygon_reporter, caplog):
     staked, status = await r.ensure_staked()
     assert not staked
     assert not status.ok
-    assert "Unable to fetch matic gas price for staking" in status.error
+    assert "Unable to fetch gas price for staking" in status.error
@@ -0,0 +1,86 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from telliot_core.utils.response import ResponseStatus
+
+from telliot_feeds.feeds import CATALOG_FEEDS
+from telliot_feeds.reporters.autopay_scanner import TipOpportunity
+from telliot_feeds.reporters.scheduler import ReportScheduler
+from telliot_feeds.reporters.staker_cache import StakerInfo
+from telliot_feeds.reporters.tellorflex import reporter_lock_expiry
+from telliot_feeds.reporters.tellorflex import TellorFlexReporter
+
+
+class FakeReporter:
+    def __init__(self, statuses):
+        self.autopay = SimpleNamespace(node=SimpleNamespace(chain_id=80001))
+        self.chain_id = 80001
+        self.gas_limit = 350000
+        self.datafeed = None
+        self.reported = []
+        self.statuses = statuses
+
+    async def report_once(self):
+        self.reported.append(self.datafeed)
+        return None, self.statuses.pop(0)
+
+
+def test_reporter_lock_expiry():
+    # 12 hours for one stake
+    info = StakerInfo(0, int(10e18), 0, 1000, 1)
+    assert reporter_lock_expiry(info) == 1000 + 12 * 3600
+    # 4 hours for three stakes, partial stakes don't count
+    info.staker_balance = int(35e18)
+    assert reporter_lock_expiry(info) == 1000 + 4 * 3600
+
+
+@pytest.mark.asyncio
+async def test_dispatch_falls_back_to_next_candidate():
+    unprofitable = ResponseStatus(ok=False, error="Estimated profitability below threshold.")
+    reporter = FakeReporter([unprofitable, ResponseStatus()])
+    scheduler = ReportScheduler(reporter)
+
+    candidates = [
+        TipOpportunity(80001, "btc-usd-legacy", int(5e18), 2.0, 0),
+        TipOpportunity(80001, "eth-usd-legacy", int(10e18), 5.0, 0),
+        TipOpportunity(80001, "trb-usd-legacy", int(1e18), None, 0),
+    ]
+    for candidate in candidates:
+        scheduler.push(candidate)
+
+    _, status = await scheduler.dispatch()
+
+    assert status.ok
+    assert reporter.reported == [CATALOG_FEEDS["eth-usd-legacy"], CATALOG_FEEDS["btc-usd-legacy"]]
+    assert reporter.datafeed is None
+
+
+@pytest.mark.asyncio
+async def test_next_wakeup():
+    now = time.time()
+
+    async def get_staker_info():
+        return staker_info, ResponseStatus()
+
+    async def next_feed_window():
+        return feed_window
+
+    reporter = SimpleNamespace(
+        staker_cache=SimpleNamespace(get=get_staker_info, ttl=300),
+        next_feed_window=next_feed_window,
+        wait_period=7,
+    )
+
+    # in reporter lock: wake when the lock expires, or to refresh staker info
+    staker_info = StakerInfo(0, int(10e18), 0, int(now) - 12 * 3600 + 100, 1)
+    feed_window = None
+    assert await TellorFlexReporter.next_wakeup(reporter) == pytest.approx(now + 100, abs=2)
+    staker_info.last_report = int(now)
+    assert await TellorFlexReporter.next_wakeup(reporter) == pytest.approx(now + 300, abs=2)
+
+    # out of reporter lock: wake when a feed window opens or the wait period ends
+    staker_info.last_report = 0
+    assert await TellorFlexReporter.next_wakeup(reporter) == pytest.approx(now + 7, abs=2)
+    feed_window = now + 3
+    assert await TellorFlexReporter.next_wakeup(reporter) == pytest.approx(now + 3, abs=2)
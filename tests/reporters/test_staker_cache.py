@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from telliot_core.utils.response import ResponseStatus
+
+from telliot_feeds.reporters.staker_cache import StakerCache
+
+
+ORACLE = "0x41b66dd93b03e89D29114a7613A6f9f0d4F40178"
+STAKER = "0x39E419bA25196794B595B2a595Ea8E527ddC9856"
+
+
+def event(**args):
+    return SimpleNamespace(args=SimpleNamespace(**args))
+
+
+def fake_cache(staker_info):
+    reader = mock.Mock()
+    reader.read = mock.AsyncMock(return_value=(staker_info, ResponseStatus()))
+    oracle = mock.Mock()
+    oracle.address = ORACLE
+    return StakerCache(reader, oracle, STAKER), reader, oracle
+
+
+@pytest.mark.asyncio
+async def test_staker_info_cached():
+    cache, reader, _ = fake_cache([1, int(20e18), 0, 1000, 3])
+
+    for _ in range(3):
+        info, status = await cache.get()
+        assert status.ok
+        assert info.staker_balance == int(20e18)
+        assert info.last_report == 1000
+    reader.read.assert_awaited_once()
+
+    # expired
+    cache.updated_at -= cache.ttl
+    _, status = await cache.get()
+    assert reader.read.await_count == 2
+
+    cache.invalidate()
+    _, status = await cache.get()
+    assert reader.read.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_update_from_receipt():
+    cache, reader, oracle = fake_cache([1, int(10e18), int(5e18), 1000, 3])
+    await cache.get()
+
+    events = oracle.contract.events
+    events.NewStaker.return_value.processReceipt.return_value = [event(_staker=STAKER, _amount=int(10e18))]
+    events.NewReport.return_value.processReceipt.return_value = [
+        event(_reporter=STAKER, _time=2000),
+        event(_reporter=ORACLE, _time=3000),
+    ]
+    receipt = {"status": 1, "logs": [{"address": ORACLE.lower()}]}
+    cache.update_from_receipt(receipt)
+
+    info, _ = await cache.get()
+    assert info.staker_balance == int(20e18)
+    assert info.locked_balance == 0
+    assert info.last_report == 2000
+    assert info.num_reports == 4
+    reader.read.assert_awaited_once()
+
+    # reverted txs & receipts without oracle logs don't change the cache
+    cache.update_from_receipt({"status": 0, "logs": [{"address": ORACLE}]})
+    cache.update_from_receipt({"status": 1, "logs": [{"address": STAKER}]})
+    assert events.NewReport.return_value.processReceipt.call_count == 1
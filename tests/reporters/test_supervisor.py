@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from telliot_feeds.feeds import CATALOG_FEEDS
+from telliot_feeds.reporters.autopay_scanner import ClaimedScanner
+from telliot_feeds.reporters.autopay_scanner import TipOpportunity
+from telliot_feeds.reporters.supervisor import ReporterSupervisor
+
+
+class FakeReporter:
+    def __init__(self, acct_addr, datafeed=None):
+        self.acct_addr = acct_addr
+        self.datafeed = datafeed
+        self.scanner = None
+        self.wait_period = 0
+        self.calls = []
+
+    async def recover_pending_txs(self):
+        self.calls.append("recover_pending_txs")
+
+    async def report_once(self):
+        self.calls.append("report_once")
+        # stop the loop
+        raise asyncio.CancelledError
+
+    async def fetch_datafeed(self):
+        if self.datafeed is None:
+            best = self.scanner.best(80001)
+            if best is not None:
+                self.datafeed = CATALOG_FEEDS[best.query_tag]
+        return self.datafeed
+
+
+class FakeScanner:
+    def __init__(self, tags):
+        self.tags = tags
+
+    def ranked(self):
+        return [TipOpportunity(80001, tag, int(1e18), None, 0) for tag in self.tags]
+
+
+@pytest.mark.asyncio
+async def test_accounts_claim_different_queries():
+    reporters = [FakeReporter(f"0x{i}") for i in range(3)]
+    supervisor = ReporterSupervisor(reporters, scanner=FakeScanner(["eth-usd-legacy", "btc-usd-legacy"]))
+    assert all(isinstance(r.scanner, ClaimedScanner) for r in reporters)
+
+    feeds = [await r.fetch_datafeed() for r in reporters]
+    assert feeds[0] is CATALOG_FEEDS["eth-usd-legacy"]
+    assert feeds[1] is CATALOG_FEEDS["btc-usd-legacy"]
+    assert feeds[2] is None
+
+    supervisor.release("0x0")
+    assert await reporters[2].fetch_datafeed() is CATALOG_FEEDS["eth-usd-legacy"]
+
+
+@pytest.mark.asyncio
+async def test_claimed_datafeed_skipped():
+    eth_usd = CATALOG_FEEDS["eth-usd-legacy"]
+    fixed = FakeReporter("0x0", datafeed=eth_usd)
+    suggested = FakeReporter("0x1")
+    ReporterSupervisor([fixed, suggested])
+    # left over from a previous suggestion
+    suggested.datafeed = eth_usd
+
+    assert await fixed.fetch_datafeed() is eth_usd
+    assert await suggested.fetch_datafeed() is None
+    # only suggested datafeeds are dropped
+    assert fixed.datafeed is eth_usd
+    assert suggested.datafeed is None
+
+
+@pytest.mark.asyncio
+async def test_pending_txs_recovered_before_reporting():
+    reporter = FakeReporter("0x0")
+    supervisor = ReporterSupervisor([reporter])
+
+    with pytest.raises(asyncio.CancelledError):
+        await supervisor.run_reporter(reporter)
+    assert reporter.calls == ["recover_pending_txs", "report_once"]
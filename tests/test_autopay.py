@@ -1,3 +1,7 @@
+import asyncio
+from collections import deque
+from types import SimpleNamespace
+
 import pytest
 from brownie import accounts
 from brownie import chain
@@ -8,9 +12,17 @@ from telliot_core.utils.response import ResponseStatus
 from telliot_core.utils.timestamp import TimeStamp
 from web3 import Web3
 
+from scripts.bench_autopay import bench
+from telliot_feeds.dtypes.datapoint import datetime_now_utc
+from telliot_feeds.feeds import CATALOG_FEEDS
 from telliot_feeds.queries.query_catalog import query_catalog
+from telliot_feeds.reporters.reporter_autopay_utils import _get_feed_suggestion
+from telliot_feeds.reporters.reporter_autopay_utils import _reward_claim_args
 from telliot_feeds.reporters.reporter_autopay_utils import autopay_suggested_report
+from telliot_feeds.reporters.reporter_autopay_utils import AutopayCalls
+from telliot_feeds.reporters.reporter_autopay_utils import FeedDetails
 from telliot_feeds.reporters.reporter_autopay_utils import get_feed_tip
+from telliot_feeds.reporters.reporter_autopay_utils import next_window_start
 
 
 @pytest.mark.asyncio
@@ -253,3 +265,109 @@ async def test_main(
         suggested_qtag, tip = await autopay_suggested_report(flex.autopay)
         assert suggested_qtag is None
         assert tip is None
+
+
+def test_reward_claim_args():
+    """Only the first timestamp in each window needs its claim status checked"""
+    feed_id = "ab" * 32
+    # reward, balance, startTime, interval, window, priceThreshold, feedsWithFundingIndex
+    feed_details = {
+        ("current_feeds", "trb-usd-legacy", feed_id): [1, 10, 1000, 100, 50, 0, 1],
+        ("trb-usd-legacy", 0): 1010,
+        ("trb-usd-legacy", 1): 1020,
+        ("trb-usd-legacy", 2): 1110,
+        ("trb-usd-legacy", 3): 1160,
+        ("current_values", "trb-usd-legacy"): True,
+    }
+    claim_args = _reward_claim_args(feed_details)
+    assert claim_args == [("trb-usd-legacy", feed_id, 1010), ("trb-usd-legacy", feed_id, 1110)]
+    # input isn't mutated
+    assert (0, 0) not in feed_details
+
+
+def test_next_window_start():
+    details = FeedDetails(1, 10, 1000, 100, 50, 0, 1)
+    # before the feed starts
+    assert next_window_start(details, 500) == 1000
+    # in a window & between windows
+    assert next_window_start(details, 1000) == 1100
+    assert next_window_start(details, 1170) == 1200
+
+
+@pytest.mark.asyncio
+async def test_feed_suggestion_price_threshold(monkeypatch):
+    """Threshold feeds for the same query tag share one live price fetch"""
+    fetches = []
+
+    async def fetch_new_datapoint():
+        fetches.append(1)
+        return 110.0, datetime_now_utc()
+
+    source = CATALOG_FEEDS["eth-usd-legacy"].source
+    monkeypatch.setattr(source, "fetch_new_datapoint", fetch_new_datapoint)
+    monkeypatch.setattr(source, "_history", deque())
+
+    now = TimeStamp.now().ts
+    # reward, balance, startTime, interval, window, priceThreshold, feedsWithFundingIndex
+    feeds = {
+        ("eth-usd-legacy", "aa"): [5, 100, now - 10, 100, 50, 500, 1],  # 5% threshold, met
+        ("eth-usd-legacy", "bb"): [7, 100, now - 10, 100, 50, 2000, 2],  # 20% threshold, not met
+        ("eth-usd-legacy", "cc"): [3, 100, now - 10, 100, 50, 0, 3],  # no threshold
+    }
+    current_values = {
+        "eth-usd-legacy": True,
+        ("eth-usd-legacy", "current_price"): 100.0,
+        ("eth-usd-legacy", "timestamp"): 0,
+    }
+    tips = await _get_feed_suggestion(feeds, current_values)
+    assert tips == {"eth-usd-legacy": 8}
+    assert len(fetches) == 1
+
+
+@pytest.mark.asyncio
+async def test_feed_details_error_cancels_current_values():
+    autopay = SimpleNamespace(address="0xfeeddetailserror", node=SimpleNamespace(_web3=None))
+    calls = AutopayCalls(autopay, catalog={b"\x01" * 32: "eth-usd-legacy"})
+    values_started = asyncio.Event()
+
+    async def get_current_feeds(*args, **kwargs):
+        return {("eth-usd-legacy", "feed_ids"): ["aa"]}
+
+    async def get_current_values(*args, **kwargs):
+        values_started.set()
+        await asyncio.sleep(10)
+
+    async def get_feed_details(*args, **kwargs):
+        await values_started.wait()
+        raise ValueError("multicall failed")
+
+    calls.get_current_feeds = get_current_feeds
+    calls.get_current_values = get_current_values
+    calls._get_feed_details = get_feed_details
+
+    tasks = asyncio.all_tasks()
+    with pytest.raises(ValueError):
+        await calls.get_feed_details()
+    await asyncio.sleep(0)
+    assert all(t.done() for t in asyncio.all_tasks() - tasks)
+
+
+@pytest.mark.asyncio
+async def test_synthetic_catalog_scaling():
+    """Multicalls per suggestion don't grow with the number of query ids"""
+    for num_query_ids in (10, 200):
+        results = await bench(
+            num_query_ids=num_query_ids,
+            feeds_per_query=2,
+            reports_per_query=5,
+            threshold_share=0.1,
+            latency=0,
+            rounds=2,
+        )
+        cold, warm = results
+        # one-time tips, current feeds, current values, feed details, claim status
+        assert cold.counter.multicalls == 5
+        assert warm.counter.multicalls == 5
+        assert cold.counter.calls["getCurrentFeeds"] == num_query_ids
+        assert len(cold.tips) == num_query_ids
+        assert warm.tips == cold.tips
@@ -0,0 +1,172 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from eth_account import Account
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+from telliot_feeds.flashbots import flashbot
+from telliot_feeds.flashbots.bundle_sender import BundleSender
+from telliot_feeds.flashbots.bundle_sender import parse_simulation
+from telliot_feeds.flashbots.provider import get_default_endpoints
+from telliot_feeds.reporters.flashbot import FlashbotsReporter
+from telliot_feeds.utils.block_watcher import BlockWatcher
+from telliot_feeds.utils.metrics import RELAY_BUNDLES_INCLUDED
+from telliot_feeds.utils.metrics import RELAY_BUNDLES_REJECTED
+
+
+def fake_relay(uri, sent, reject=False):
+    def make_request(method, params):
+        sent.append((uri, int(params[0]["blockNumber"], 16)))
+        if reject:
+            return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "bundle rejected"}}
+        return {"jsonrpc": "2.0", "id": 1, "result": {"bundleHash": "0xbundle"}}
+
+    return mock.Mock(endpoint_uri=uri, make_request=mock.Mock(side_effect=make_request))
+
+
+def fake_sender(target_blocks=3, included_in=None, reject=(False,)):
+    w3 = mock.Mock()
+    w3.eth.block_number = 100
+    w3.keccak.side_effect = lambda tx: HexBytes(tx)
+    w3.flashbots.send_raw_bundle_munger.side_effect = lambda txs, block: [{"blockNumber": hex(block)}]
+    sent = []
+
+    def get_transaction_receipt(tx_hash):
+        if included_in is None or w3.eth.block_number < included_in:
+            raise TransactionNotFound(tx_hash)
+        return {"blockNumber": included_in, "status": 1}
+
+    w3.eth.get_transaction_receipt.side_effect = get_transaction_receipt
+    relays = [fake_relay(f"https://relay{i}.example", sent, r) for i, r in enumerate(reject)]
+    blocks = BlockWatcher(mock.Mock(_web3=w3), poll_interval=0.01)
+    return BundleSender(w3, blocks, relays, target_blocks), w3, sent
+
+
+async def mine(w3, blocks):
+    for _ in range(blocks):
+        await asyncio.sleep(0.03)
+        w3.eth.block_number += 1
+
+
+@pytest.mark.asyncio
+async def test_sends_for_each_target_block():
+    sender, w3, sent = fake_sender(target_blocks=3, included_in=102)
+    miner = asyncio.create_task(mine(w3, 5))
+
+    receipt = await sender.send([HexBytes("0x01")], 100)
+    assert receipt["blockNumber"] == 102
+    assert sorted(block for _, block in sent) == [101, 102, 103]
+    # stops following blocks once included
+    assert w3.eth.block_number < 104
+    miner.cancel()
+
+
+@pytest.mark.asyncio
+async def test_not_included():
+    sender, w3, _ = fake_sender(target_blocks=2)
+    miner = asyncio.create_task(mine(w3, 5))
+
+    assert await sender.send([HexBytes("0x01")], 100) is None
+    assert w3.eth.block_number == 102
+    miner.cancel()
+
+
+@pytest.mark.asyncio
+async def test_rejected_by_relay():
+    sender, w3, sent = fake_sender(target_blocks=5, reject=(True,))
+    miner = asyncio.create_task(mine(w3, 5))
+
+    assert await sender.send([HexBytes("0x01")], 100) is None
+    # gives up without waiting for the last target block
+    assert w3.eth.block_number == 101
+    assert len(sent) == 5
+    miner.cancel()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_to_relays():
+    sender, w3, sent = fake_sender(target_blocks=2, included_in=101, reject=(False, True))
+    included = RELAY_BUNDLES_INCLUDED.get("relay0.example")
+    rejected = RELAY_BUNDLES_REJECTED.get("relay1.example")
+    miner = asyncio.create_task(mine(w3, 5))
+
+    # a relay rejecting the bundle doesn't stop it being sent to the others
+    assert (await sender.send([HexBytes("0x01")], 100))["blockNumber"] == 101
+    assert sorted(sent) == [
+        ("https://relay0.example", 101),
+        ("https://relay0.example", 102),
+        ("https://relay1.example", 101),
+        ("https://relay1.example", 102),
+    ]
+    assert RELAY_BUNDLES_INCLUDED.get("relay0.example") == included + 1
+    assert RELAY_BUNDLES_INCLUDED.get("relay1.example") == 0
+    assert RELAY_BUNDLES_REJECTED.get("relay1.example") == rejected + 2
+    miner.cancel()
+
+
+CALL_BUNDLE_RESULT = {
+    "bundleHash": "0xbundle",
+    "coinbaseDiff": "2000000000000000",
+    "results": [
+        {"gasUsed": 21000, "gasFees": "1000000000000000", "ethSentToCoinbase": "0"},
+        {"gasUsed": 80000, "gasFees": "1500000000000000", "error": "execution reverted", "revert": "nonce must match"},
+    ],
+}
+
+
+def test_parse_simulation():
+    simulation = parse_simulation("0xbundle", 100, CALL_BUNDLE_RESULT)
+    assert simulation.gas_used == 101000
+    assert simulation.coinbase_diff == 2 * 10**15
+    assert simulation.cost == 25 * 10**14
+    assert simulation.error == "execution reverted: nonce must match"
+
+
+@pytest.mark.asyncio
+async def test_simulation_cached_per_block():
+    sender, w3, _ = fake_sender()
+    w3.flashbots.extrapolate_timestamp.return_value = 1650000000
+    w3.flashbots.call_bundle.return_value = CALL_BUNDLE_RESULT
+
+    first = await sender.simulate([HexBytes("0x01")], 100)
+    assert await sender.simulate([HexBytes("0x01")], 100) is first
+    assert w3.flashbots.call_bundle.call_count == 1
+    w3.flashbots.call_bundle.assert_called_with([HexBytes("0x01")], hex(101), hex(100), 1650000000)
+
+    # a new block or a different bundle is simulated again
+    _ = await sender.simulate([HexBytes("0x01")], 101)
+    _ = await sender.simulate([HexBytes("0x02")], 101)
+    assert w3.flashbots.call_bundle.call_count == 3
+
+    # failed simulations aren't cached
+    w3.flashbots.call_bundle.side_effect = ValueError("relay unavailable")
+    assert await sender.simulate([HexBytes("0x03")], 101) is None
+    assert len(sender.simulations) == 3
+
+
+@pytest.mark.asyncio
+async def test_pending_txs_not_recovered():
+    # Left pending by an earlier non-bundle run with the same account
+    reporter = FlashbotsReporter.__new__(FlashbotsReporter)
+    reporter.nonces = mock.Mock(pending={7: "0xa"})
+    reporter.account = mock.Mock(spec=["address", "sign_transaction"])
+
+    await reporter.recover_pending_txs()
+    assert reporter.nonces.pending == {7: "0xa"}
+
+
+@pytest.mark.parametrize("uris", ["", " , ,"])
+def test_default_relay_when_none_configured(monkeypatch, uris):
+    monkeypatch.setenv("FLASHBOTS_HTTP_PROVIDER_URI", uris)
+    assert get_default_endpoints() == ["https://relay.flashbots.net"]
+
+    providers = flashbot(Web3(), Account.create(), [])
+    assert [p.endpoint_uri for p in providers] == ["https://relay.flashbots.net"]
+
+
+def test_relays_from_env(monkeypatch):
+    monkeypatch.setenv("FLASHBOTS_HTTP_PROVIDER_URI", "https://a.example, https://b.example,")
+    assert get_default_endpoints() == ["https://a.example", "https://b.example"]
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from telliot_feeds.utils.block_index import BlockTimestampIndex
+
+
+def fake_endpoint(n_blocks=100_000):
+    """Chain with block times varying between 1 & 30 seconds."""
+    timestamps = [1000]
+    for n in range(1, n_blocks):
+        timestamps.append(timestamps[-1] + 1 + (n * 7) % 30)
+    endpoint = mock.Mock()
+
+    def get_block(number):
+        if number == "latest":
+            number = len(timestamps) - 1
+        return {"number": number, "timestamp": timestamps[number]}
+
+    endpoint._web3.eth.get_block.side_effect = get_block
+    return endpoint, timestamps
+
+
+def test_block_at():
+    endpoint, timestamps = fake_endpoint()
+    index = BlockTimestampIndex(endpoint)
+
+    for n in [0, 1, 700, 45_000, 99_998]:
+        assert index.block_at(timestamps[n]) == n
+        assert index.block_at(timestamps[n + 1] - 1) == n
+    assert index.block_at(timestamps[-1] + 60) == 99_999
+    assert index.block_at(999) is None
+
+
+def test_lookups_logarithmic():
+    endpoint, timestamps = fake_endpoint()
+    index = BlockTimestampIndex(endpoint)
+
+    for n in range(1000, 100_000, 3797):
+        calls = endpoint._web3.eth.get_block.call_count
+        assert index.block_at(timestamps[n + 1] - 1) == n
+        assert endpoint._web3.eth.get_block.call_count - calls <= 2 * 17
+
+    # repeated lookups don't call the node
+    calls = endpoint._web3.eth.get_block.call_count
+    assert index.block_at(timestamps[1001] - 1) == 1000
+    assert endpoint._web3.eth.get_block.call_count == calls
+
+
+def test_extended_with_new_blocks():
+    endpoint, timestamps = fake_endpoint()
+    index = BlockTimestampIndex(endpoint)
+    assert index.block_at(timestamps[50_000]) == 50_000
+
+    # blocks mined since the last lookup
+    timestamps.extend(timestamps[-1] + 12 * i for i in range(1, 11))
+    assert index.block_at(timestamps[-3]) == len(timestamps) - 3
+    assert index.numbers[-1] == len(timestamps) - 1
+
+
+def test_persisted(tmp_path):
+    path = tmp_path / "block_index" / "1.json"
+    endpoint, timestamps = fake_endpoint()
+    index = BlockTimestampIndex(endpoint, path=path)
+    assert index.block_at(timestamps[12_345]) == 12_345
+
+    endpoint._web3.eth.get_block.reset_mock()
+    index = BlockTimestampIndex(endpoint, path=path)
+    assert index.block_at(timestamps[12_345]) == 12_345
+    assert endpoint._web3.eth.get_block.call_count == 0
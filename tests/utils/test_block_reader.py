@@ -0,0 +1,95 @@
+from unittest import mock
+
+import pytest
+from web3.exceptions import ContractLogicError
+
+from telliot_feeds.utils.block_reader import BlockReader
+
+
+def fake_endpoint(block_number):
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = block_number
+    return endpoint
+
+
+def fake_contract(output):
+    contract = mock.Mock()
+    contract.address = "0x0000000000000000000000000000000000000001"
+    call = contract.contract.get_function_by_name.return_value.return_value.call
+    call.return_value = output
+    return contract, call
+
+
+@pytest.mark.asyncio
+async def test_reads_memoized_per_block():
+    endpoint = fake_endpoint(100)
+    contract, call = fake_contract([1, 2])
+    reader = BlockReader(endpoint)
+
+    assert reader.pin() == 100
+    for _ in range(3):
+        output, status = await reader.read(contract, "getStakerInfo", _staker="0xabc")
+        assert status.ok
+        assert output == [1, 2]
+    call.assert_called_once_with(block_identifier=100)
+
+    # different args aren't memoized together
+    _, status = await reader.read(contract, "getStakerInfo", _staker="0xdef")
+    assert status.ok
+    assert call.call_count == 2
+
+    # new block drops memoized results
+    endpoint._web3.eth.block_number = 101
+    reader.pin()
+    _, status = await reader.read(contract, "getStakerInfo", _staker="0xabc")
+    assert call.call_count == 3
+    call.assert_called_with(block_identifier=101)
+
+
+@pytest.mark.asyncio
+async def test_unpinned_reads_latest():
+    contract, call = fake_contract(5)
+    reader = BlockReader(fake_endpoint(100))
+
+    for _ in range(2):
+        output, status = await reader.read(contract, "getNewValueCountbyQueryId", _queryId=b"\x00")
+        assert output == 5
+    assert call.call_count == 2
+    call.assert_called_with(block_identifier="latest")
+
+
+@pytest.mark.asyncio
+async def test_read_error():
+    contract, call = fake_contract(None)
+    call.side_effect = ValueError("execution reverted")
+    reader = BlockReader(fake_endpoint(100))
+    reader.pin()
+
+    output, status = await reader.read(contract, "getCurrentTip", _queryId=b"\x00")
+    assert output is None
+    assert not status.ok
+    assert "Unable to read getCurrentTip at block 100" in status.error
+
+
+@pytest.mark.asyncio
+async def test_current_tip_revert():
+    contract, call = fake_contract(None)
+    call.side_effect = ContractLogicError("execution reverted")
+    reader = BlockReader(fake_endpoint(100))
+    reader.pin()
+
+    # Autopay reverts for queries without tips
+    tip, status = await reader.get_current_tip(contract, b"\x00")
+    assert tip == 0
+    assert status.ok
+
+    call.side_effect = None
+    call.return_value = 5
+    tip, status = await reader.get_current_tip(contract, b"\x01")
+    assert tip == 5
+    assert status.ok
+
+    call.side_effect = ValueError("connection error")
+    tip, status = await reader.get_current_tip(contract, b"\x02")
+    assert tip is None
+    assert not status.ok
@@ -0,0 +1,49 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from telliot_feeds.utils.block_watcher import BlockWatcher
+
+
+@pytest.mark.asyncio
+async def test_waiters_woken_by_new_block():
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = 10
+    watcher = BlockWatcher(endpoint, poll_interval=0.01)
+
+    waiters = [asyncio.create_task(watcher.wait_for_block(after=10)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+    assert not any(w.done() for w in waiters)
+
+    endpoint._web3.eth.block_number = 11
+    assert await asyncio.gather(*waiters) == [11, 11, 11]
+
+
+@pytest.mark.asyncio
+async def test_block_already_seen():
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = 12
+    watcher = BlockWatcher(endpoint, poll_interval=0.01)
+
+    # next new block after the current one
+    waiter = asyncio.create_task(watcher.wait_for_block())
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+    endpoint._web3.eth.block_number = 13
+    assert await waiter == 13
+
+    # a block newer than the last attempt's was already seen
+    assert await asyncio.wait_for(watcher.wait_for_block(after=12), 0.01) == 13
+
+
+@pytest.mark.asyncio
+async def test_no_polling_without_waiters():
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = 1
+    watcher = BlockWatcher(endpoint, poll_interval=0.01)
+
+    endpoint._web3.eth.block_number = 2
+    assert await watcher.wait_for_block(after=1) == 2
+    await asyncio.sleep(0.05)
+    assert watcher._task.done()
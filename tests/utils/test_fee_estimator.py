@@ -0,0 +1,65 @@
+from unittest import mock
+
+import pytest
+
+from telliot_feeds.utils.fee_estimator import FeeEstimator
+
+
+def fake_endpoint(block_number=100, gas_price=30_000_000_000):
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = block_number
+    endpoint._web3.eth.gas_price = gas_price
+
+    def fee_history(block_count, newest_block, percentiles):
+        rewards = [[int(p * 1e9) for p in percentiles] for _ in range(block_count)]
+        return {"baseFeePerGas": [int(20e9)] * (block_count + 1), "reward": rewards}
+
+    endpoint._web3.eth.fee_history.side_effect = fee_history
+    return endpoint
+
+
+@pytest.mark.asyncio
+async def test_estimate_from_fee_history():
+    estimator = FeeEstimator(fake_endpoint(), block_count=5)
+    estimate = await estimator.estimate()
+
+    assert estimate.block_number == 100
+    assert estimate.base_fee == 20
+    assert estimate.priority_fees == {"safeLow": 10, "average": 50, "fast": 75, "fastest": 90}
+    assert estimate.gas_price == 30
+    assert await estimator.gas_price("fast") == 95
+
+
+@pytest.mark.asyncio
+async def test_only_new_blocks_fetched():
+    endpoint = fake_endpoint()
+    estimator = FeeEstimator(endpoint, block_count=5)
+    first = await estimator.estimate()
+
+    # reused within a block
+    assert await estimator.estimate() is first
+    assert endpoint._web3.eth.fee_history.call_count == 1
+
+    endpoint._web3.eth.block_number = 102
+    second = await estimator.estimate()
+    assert second.block_number == 102
+    assert endpoint._web3.eth.fee_history.call_args.args[:2] == (2, 102)
+    assert len(estimator.rewards) == 5
+
+
+@pytest.mark.asyncio
+async def test_legacy_chain_uses_gas_price():
+    endpoint = fake_endpoint()
+    endpoint._web3.eth.fee_history.side_effect = ValueError("the method eth_feeHistory does not exist")
+    estimator = FeeEstimator(endpoint)
+
+    estimate = await estimator.estimate()
+    assert estimate.base_fee is None
+    assert await estimator.gas_price("safeLow") == 30
+
+
+@pytest.mark.asyncio
+async def test_invalid_speed(caplog):
+    estimator = FeeEstimator(fake_endpoint())
+    assert await estimator.gas_price("blah") is None
+    assert "Invalid gas price speed: blah" in caplog.text
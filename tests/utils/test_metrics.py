@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from telliot_feeds.utils.metrics import Counter
+from telliot_feeds.utils.metrics import Gauge
+from telliot_feeds.utils.metrics import Histogram
+from telliot_feeds.utils.metrics import Registry
+from telliot_feeds.utils.metrics import serve_metrics
+
+
+def test_counter_and_gauge():
+    submissions = Counter("submissions_total", "Reports mined", ["account"])
+    submissions.inc("0xabc")
+    submissions.inc("0xabc", amount=2)
+    assert submissions.get("0xabc") == 3
+    assert submissions.get("0xdef") == 0
+
+    with pytest.raises(ValueError):
+        submissions.inc()
+
+    stake = Gauge("stake_trb", "Staked TRB", ["account"])
+    stake.set("0xabc", value=100)
+    stake.set("0xabc", value=90)
+    assert stake.render() == '# HELP stake_trb Staked TRB\n# TYPE stake_trb gauge\nstake_trb{account="0xabc"} 90.0'
+
+
+def test_histogram():
+    stage = Histogram("stage_seconds", "Stage duration", ["stage"], buckets=[0.1, 1.0])
+    stage.observe("fetch", value=0.05)
+    stage.observe("fetch", value=0.5)
+    with stage.time("confirm"):
+        pass
+
+    assert stage.count("fetch") == 2
+    assert stage.count("confirm") == 1
+    lines = stage.render().splitlines()
+    assert 'stage_seconds_bucket{stage="fetch",le="0.1"} 1' in lines
+    assert 'stage_seconds_bucket{stage="fetch",le="1.0"} 2' in lines
+    assert 'stage_seconds_bucket{stage="fetch",le="+Inf"} 2' in lines
+    assert 'stage_seconds_sum{stage="fetch"} 0.55' in lines
+    assert 'stage_seconds_count{stage="fetch"} 2' in lines
+
+
+@pytest.mark.asyncio
+async def test_serve_metrics():
+    registry = Registry()
+    counter = registry.register(Counter("reverts_total", "Reports reverted"))
+    counter.inc()  # type: ignore
+
+    server = await serve_metrics(0, registry=registry)
+    port = server.sockets[0].getsockname()[1]
+
+    async def get(path: str) -> str:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        response = await reader.read()
+        writer.close()
+        return response.decode()
+
+    response = await get("/metrics")
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert "reverts_total 1.0" in response
+
+    assert (await get("/")).startswith("HTTP/1.1 404")
+
+    server.close()
+    await server.wait_closed()
@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pytest
+
+from telliot_feeds.utils.nonce_manager import is_nonce_error
+from telliot_feeds.utils.nonce_manager import NonceManager
+
+
+ADDRESS = "0x39E419bA25196794B595B2a595Ea8E527ddC9856"
+
+
+def fake_endpoint(confirmed, pending):
+    endpoint = mock.Mock()
+    counts = {"latest": confirmed, "pending": pending}
+    endpoint._web3.eth.get_transaction_count.side_effect = lambda address, block="latest": counts[block]
+    return endpoint, counts
+
+
+@pytest.mark.asyncio
+async def test_nonces_handed_out_locally():
+    endpoint, _ = fake_endpoint(5, 5)
+    nonces = NonceManager(endpoint, ADDRESS)
+
+    assert [await nonces.next_nonce() for _ in range(3)] == [5, 6, 7]
+    # synced once: latest & pending counts
+    assert endpoint._web3.eth.get_transaction_count.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_release_and_resync():
+    endpoint, counts = fake_endpoint(5, 5)
+    nonces = NonceManager(endpoint, ADDRESS)
+
+    # unused last nonce is handed out again
+    nonce = await nonces.next_nonce()
+    nonces.release(nonce)
+    assert await nonces.next_nonce() == 5
+
+    # gap: resync with the node
+    first = await nonces.next_nonce()
+    await nonces.next_nonce()
+    nonces.release(first)
+    assert nonces.next is None
+    counts["pending"] = 7
+    assert await nonces.next_nonce() == 7
+
+    # nonce rejected by node
+    counts["latest"] = counts["pending"] = 9
+    nonces.release(8, ValueError("{'code': -32000, 'message': 'nonce too low'}"))
+    assert await nonces.next_nonce() == 9
+
+
+@pytest.mark.asyncio
+async def test_pending_persisted(tmp_path):
+    path = tmp_path / "nonces.json"
+    endpoint, counts = fake_endpoint(5, 5)
+    nonces = NonceManager(endpoint, ADDRESS, path=path)
+
+    for tx_hash in ("0xa", "0xb", "0xc"):
+        nonces.sent(await nonces.next_nonce(), tx_hash)
+    nonces.confirmed(5)
+    assert nonces.pending == {6: "0xb", 7: "0xc"}
+
+    # restart: nonce 7 was dropped from the mempool
+    counts["latest"], counts["pending"] = 6, 7
+    restarted = NonceManager(endpoint, ADDRESS, path=path)
+    assert restarted.pending == {6: "0xb", 7: "0xc"}
+    assert await restarted.next_nonce() == 7
+    assert restarted.pending == {6: "0xb"}
+
+
+def test_is_nonce_error():
+    assert is_nonce_error("Nonce too low")
+    assert is_nonce_error("already known")
+    assert not is_nonce_error("insufficient funds for gas * price + value")
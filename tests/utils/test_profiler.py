@@ -0,0 +1,98 @@
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from telliot_feeds.utils.profiler import chrome_trace
+from telliot_feeds.utils.profiler import profile_reporter
+from telliot_feeds.utils.profiler import SamplingProfiler
+from telliot_feeds.utils.profiler import top_functions
+from telliot_feeds.utils.tracing import Span
+from telliot_feeds.utils.tracing import span
+
+
+def test_top_functions():
+    stacks = Counter({"main;report_once;encode": 30, "main;report_once;fetch": 60, "main;report_once": 10})
+    assert top_functions(stacks, n=2) == [("fetch", 60, 60), ("encode", 30, 30)]
+    assert ("report_once", 10, 100) in top_functions(stacks)
+
+
+def busy_encode(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampling_profiler():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    busy_encode(0.1)
+    time.sleep(0.1)
+    profiler.stop()
+
+    wall = dict((label.split(" ")[0], weight) for label, weight, _ in top_functions(profiler.wall))
+    assert wall["busy_encode"] > 0
+    assert wall["test_sampling_profiler"] > 0  # sleeping
+
+    if profiler.cpu_supported:
+        cpu = dict((label.split(" ")[0], weight) for label, weight, _ in top_functions(profiler.cpu))
+        # sleeping doesn't use CPU
+        assert cpu["busy_encode"] > cpu.get("test_sampling_profiler", 0)
+
+
+def test_sampling_profiler_threads():
+    worker = threading.Thread(target=busy_encode, args=(0.1,), name="rpc-worker")
+    # idle pool workers aren't sampled
+    executor = ThreadPoolExecutor(thread_name_prefix="idle-pool")
+    executor.submit(lambda: None).result()
+
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    worker.start()
+    worker.join()
+    profiler.stop()
+    executor.shutdown()
+
+    roots = {stack.split(";")[0] for stack in profiler.wall}
+    assert "rpc-worker (thread)" in roots
+    assert "MainThread (thread)" in roots
+    assert not any(root.startswith("idle-pool") or root.startswith("telliot-profiler") for root in roots)
+    assert any(stack.startswith("rpc-worker (thread)") and "busy_encode" in stack for stack in profiler.wall)
+
+
+def test_chrome_trace():
+    spans = [
+        Span("report_once", "t", "a", start_time_unix_nano=1000, end_time_unix_nano=9000, task="Task-1"),
+        Span("rpc.read", "t", "b", "a", start_time_unix_nano=2000, end_time_unix_nano=3000, task="Task-2"),
+    ]
+    events = chrome_trace(spans)["traceEvents"]
+    rows = {e["args"]["name"]: e["tid"] for e in events if e["ph"] == "M"}
+    assert rows == {"Task-1": 1, "Task-2": 2}
+    read = [e for e in events if e["name"] == "rpc.read"][0]
+    assert (read["ts"], read["dur"], read["tid"]) == (2.0, 1.0, 2)
+
+
+@pytest.mark.asyncio
+async def test_profile_reporter(tmp_path):
+    calls = []
+
+    async def report_once():
+        with span("ensure_staked"):
+            await asyncio.sleep(0.01)
+        busy_encode(0.01)
+        calls.append(1)
+        return None, SimpleNamespace(ok=True, error=None)
+
+    reporter = SimpleNamespace(report_once=report_once)
+    paths = await profile_reporter(reporter, 3, str(tmp_path / "profile"), interval=0.001)
+
+    assert len(calls) == 3
+    assert "busy_encode" in paths["wall"].read_text()
+    assert "Wall clock" in paths["summary"].read_text()
+    timeline = json.loads(paths["timeline"].read_text())
+    assert len([e for e in timeline["traceEvents"] if e["name"] == "ensure_staked"]) == 3
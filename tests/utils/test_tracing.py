@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+from telliot_feeds.utils.tracing import configure_tracing
+from telliot_feeds.utils.tracing import FileExporter
+from telliot_feeds.utils.tracing import InMemoryExporter
+from telliot_feeds.utils.tracing import span
+from telliot_feeds.utils.tracing import traced
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    configure_tracing(exporter)
+    yield exporter
+    configure_tracing(None)
+
+
+def test_disabled_by_default():
+    with span("rpc.read") as s:
+        assert s is None
+
+
+@pytest.mark.asyncio
+async def test_child_spans(exporter):
+    @traced("report_once")
+    async def report_once():
+        with span("ensure_staked"):
+            pass
+
+        async def fetch(source):
+            with span("source.fetch", source=source):
+                await asyncio.sleep(0)
+
+        # spans started in tasks are children of the span that spawned them
+        await asyncio.gather(fetch("coingecko"), fetch("coinbase"))
+
+    await report_once()
+
+    spans = {s.name: s for s in exporter.spans}
+    root = spans["report_once"]
+    assert root.parent_span_id is None
+    assert root.attributes["code.function"].endswith("report_once")
+    assert spans["ensure_staked"].parent_span_id == root.span_id
+
+    fetches = [s for s in exporter.spans if s.name == "source.fetch"]
+    assert sorted(s.attributes["source"] for s in fetches) == ["coinbase", "coingecko"]
+    assert all(s.parent_span_id == root.span_id for s in fetches)
+    assert len({s.trace_id for s in exporter.spans}) == 1
+
+    # a new report_once call starts a new trace
+    await report_once()
+    assert len({s.trace_id for s in exporter.spans}) == 2
+
+
+def test_error_status(exporter):
+    with pytest.raises(ValueError):
+        with span("http.get"):
+            raise ValueError("timeout")
+
+    assert exporter.spans[0].status == "ERROR"
+    assert exporter.spans[0].attributes["exception.message"] == "timeout"
+
+
+def test_file_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    configure_tracing(FileExporter(path))
+    try:
+        with span("report_once"):
+            with span("rpc.read", function="getStakerInfo"):
+                pass
+    finally:
+        configure_tracing(None)
+
+    child, root = [json.loads(line) for line in path.read_text().splitlines()]
+    assert child["name"] == "rpc.read"
+    assert child["attributes"] == {"function": "getStakerInfo"}
+    assert child["parent_span_id"] == root["span_id"]
+    assert root["end_time_unix_nano"] >= child["end_time_unix_nano"]
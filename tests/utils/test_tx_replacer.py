@@ -0,0 +1,150 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from hexbytes import HexBytes
+from web3.exceptions import TransactionNotFound
+
+from telliot_feeds.utils.tx_replacer import bump_fees
+from telliot_feeds.utils.tx_replacer import BumpPolicy
+from telliot_feeds.utils.tx_replacer import cancel_tx
+from telliot_feeds.utils.tx_replacer import TxReplacer
+from telliot_feeds.utils.tx_tracker import TxTracker
+
+
+ADDRESS = "0x0000000000000000000000000000000000000001"
+TX = {"nonce": 7, "gas": 350000, "gasPrice": 100, "chainId": 80001, "to": "0xoracle", "value": 0, "data": "0xab"}
+
+
+def test_bump_fees():
+    assert bump_fees(TX, 12.5)["gasPrice"] == 113
+    assert bump_fees(TX, 12.5, fee_ceiling=112) is None
+
+    tx = {"maxFeePerGas": 200, "maxPriorityFeePerGas": 10}
+    assert bump_fees(tx, 10) == {"maxFeePerGas": 220, "maxPriorityFeePerGas": 11}
+    # the original isn't mutated
+    assert tx["maxFeePerGas"] == 200
+
+
+def test_cancel_tx():
+    cancel = cancel_tx(TX, ADDRESS)
+    assert cancel == {
+        "nonce": 7,
+        "gasPrice": 100,
+        "chainId": 80001,
+        "to": ADDRESS,
+        "value": 0,
+        "gas": 21000,
+        "data": "0x",
+    }
+
+
+def fake_replacer(receipts, max_bumps=3):
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = 1
+
+    def get_transaction_receipt(tx_hash):
+        if tx_hash not in receipts:
+            raise TransactionNotFound(tx_hash)
+        return receipts[tx_hash]
+
+    sent = []
+
+    def send_raw_transaction(raw_tx):
+        sent.append(raw_tx)
+        return HexBytes(len(sent))
+
+    endpoint._web3.eth.get_transaction_receipt.side_effect = get_transaction_receipt
+    endpoint._web3.eth.send_raw_transaction.side_effect = send_raw_transaction
+
+    account = mock.Mock(address=ADDRESS)
+    account.sign_transaction.side_effect = lambda tx: mock.Mock(rawTransaction=tx)
+    nonces = mock.Mock()
+    policy = BumpPolicy(interval=0.1, max_bumps=max_bumps)
+    replacer = TxReplacer(endpoint, nonces, TxTracker(endpoint, poll_interval=0.01), policy)
+    return replacer, account, sent
+
+
+@pytest.mark.asyncio
+async def test_stuck_tx_replaced():
+    receipts = {}
+    replacer, account, sent = fake_replacer(receipts)
+    waiter = asyncio.create_task(replacer.wait(account, TX, "0xoriginal"))
+
+    await asyncio.sleep(0.15)
+    assert [tx["gasPrice"] for tx in sent] == [113]
+    replacer.nonces.sent.assert_called_with(7, "0x01")
+
+    receipts["0x01"] = {"status": 1}
+    replacer.endpoint._web3.eth.block_number = 2
+    receipt, cancelled = await waiter
+    assert receipt == {"status": 1}
+    assert not cancelled
+    # other versions are no longer tracked
+    await asyncio.sleep(0.05)
+    assert not replacer.txs.pending
+
+
+@pytest.mark.asyncio
+async def test_bumps_bounded_by_fee_ceiling():
+    replacer, account, sent = fake_replacer({})
+    waiter = asyncio.create_task(replacer.wait(account, TX, "0xoriginal", fee_ceiling=120))
+
+    await asyncio.sleep(0.35)
+    # a second bump would exceed the ceiling
+    assert [tx["gasPrice"] for tx in sent] == [113]
+    waiter.cancel()
+
+
+@pytest.mark.asyncio
+async def test_obsolete_tx_cancelled():
+    receipts = {}
+    replacer, account, sent = fake_replacer(receipts)
+
+    async def is_obsolete():
+        return True
+
+    waiter = asyncio.create_task(replacer.wait(account, TX, "0xoriginal", fee_ceiling=100, is_obsolete=is_obsolete))
+    await asyncio.sleep(0.15)
+    # cancels aren't bound by the fee ceiling
+    assert sent[0]["to"] == ADDRESS
+    assert sent[0]["gas"] == 21000
+    assert sent[0]["gasPrice"] == 113
+
+    receipts["0x01"] = {"status": 1}
+    replacer.endpoint._web3.eth.block_number = 2
+    _, cancelled = await waiter
+    assert cancelled
+
+
+@pytest.mark.asyncio
+async def test_bumping_disabled():
+    receipts = {"0xoriginal": {"status": 1}}
+    replacer, account, sent = fake_replacer(receipts, max_bumps=0)
+
+    receipt, cancelled = await replacer.wait(account, TX, "0xoriginal")
+    assert receipt == {"status": 1}
+    assert not cancelled
+    assert not sent
+
+
+@pytest.mark.asyncio
+async def test_recover_cancels_pending_tx():
+    receipts = {}
+    replacer, account, sent = fake_replacer(receipts)
+    replacer.endpoint.chain_id = 1
+    replacer.endpoint._web3.eth.get_transaction.return_value = {"nonce": 7, "gasPrice": 100}
+    # left pending by a previous run
+    replacer.nonces.sync = mock.AsyncMock()
+    replacer.nonces.pending = {7: "0xoriginal"}
+
+    recovery = asyncio.create_task(replacer.recover(account))
+    await asyncio.sleep(0.15)
+    assert sent[0]["to"] == ADDRESS
+    assert sent[0]["nonce"] == 7
+    assert sent[0]["gasPrice"] == 113
+
+    receipts["0x01"] = {"status": 1}
+    replacer.endpoint._web3.eth.block_number = 2
+    await recovery
+    replacer.nonces.confirmed.assert_called_with(7)
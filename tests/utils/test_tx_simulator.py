@@ -0,0 +1,72 @@
+from unittest import mock
+
+import pytest
+
+from telliot_feeds.utils.tx_simulator import revert_reason
+from telliot_feeds.utils.tx_simulator import TxSimulator
+
+
+QUERY_ID = b"\x01" * 32
+TX = {"nonce": 1, "chainId": 80001, "to": "0xoracle", "data": "0xab", "gas": 350000, "gasPrice": 1, "value": 0}
+# Error("nonce must match timestamp index")
+NONCE_ERROR_DATA = (
+    "0x08c379a0"
+    "0000000000000000000000000000000000000000000000000000000000000020"
+    "0000000000000000000000000000000000000000000000000000000000000020"
+    "6e6f6e6365206d757374206d617463682074696d657374616d7020696e646578"
+)
+
+
+def test_revert_reason():
+    assert revert_reason(ValueError({"code": 3, "message": "execution reverted", "data": NONCE_ERROR_DATA})) == (
+        "nonce must match timestamp index"
+    )
+    assert revert_reason(ValueError("execution reverted: still in reporter time lock, please wait!")) == (
+        "still in reporter time lock, please wait!"
+    )
+    # not a revert
+    assert revert_reason(ValueError({"code": -32000, "message": "header not found"})) is None
+    assert revert_reason(ConnectionError("Connection refused")) is None
+
+
+@pytest.mark.asyncio
+async def test_stale_nonce_cached_for_all_reporters():
+    endpoint = mock.Mock()
+    endpoint._web3.eth.call.side_effect = ValueError({"message": "execution reverted", "data": NONCE_ERROR_DATA})
+    simulator = TxSimulator(endpoint)
+
+    assert await simulator.check(TX, "0xA", QUERY_ID, 3) == "nonce must match timestamp index"
+    call, block = endpoint._web3.eth.call.call_args.args
+    assert block == "pending"
+    assert call["from"] == "0xA"
+    assert "nonce" not in call
+
+    # known bad reports aren't simulated again
+    assert await simulator.check(TX, "0xB", QUERY_ID, 3) == "nonce must match timestamp index"
+    assert endpoint._web3.eth.call.call_count == 1
+    assert simulator.known_revert(QUERY_ID, 4, "0xA") is None
+
+
+@pytest.mark.asyncio
+async def test_reporter_reverts_cached_per_reporter():
+    endpoint = mock.Mock()
+    endpoint._web3.eth.call.side_effect = ValueError("execution reverted: still in reporter time lock, please wait!")
+    simulator = TxSimulator(endpoint)
+
+    assert await simulator.check(TX, "0xA", QUERY_ID, 3) is not None
+    assert simulator.known_revert(QUERY_ID, 3, "0xA") == "still in reporter time lock, please wait!"
+    assert simulator.known_revert(QUERY_ID, 3, "0xB") is None
+
+    # until the ttl passes
+    simulator.reverts[(QUERY_ID, 3, "0xA")] = ("still in reporter time lock, please wait!", 0)
+    assert simulator.known_revert(QUERY_ID, 3, "0xA") is None
+
+
+@pytest.mark.asyncio
+async def test_simulation_failure_doesnt_skip_report():
+    endpoint = mock.Mock()
+    endpoint._web3.eth.call.side_effect = ConnectionError("Connection refused")
+    simulator = TxSimulator(endpoint)
+
+    assert await simulator.check(TX, "0xA", QUERY_ID, 3) is None
+    assert not simulator.reverts
@@ -0,0 +1,55 @@
+from unittest import mock
+
+import pytest
+from web3 import Web3
+
+from telliot_feeds.queries.price.spot_price import SpotPrice
+from telliot_feeds.utils.abi import gorli_playground_abi
+from telliot_feeds.utils.tx_template import submit_template
+from telliot_feeds.utils.tx_template import SubmitValueTemplate
+
+
+ORACLE_ADDRESS = "0x3477EB82263dabb59AC0CAcE47a61292f28A2eA7"
+
+
+@pytest.fixture
+def oracle():
+    oracle = mock.Mock()
+    oracle.address = ORACLE_ADDRESS
+    oracle.contract = Web3().eth.contract(address=ORACLE_ADDRESS, abi=gorli_playground_abi)
+    return oracle
+
+
+@pytest.mark.parametrize("value", [b"", b"\x01" * 32, b"\x02" * 45])
+def test_call_data_matches_web3(oracle, value):
+    query = SpotPrice(asset="eth", currency="usd")
+    template = SubmitValueTemplate.from_contract(oracle, query)
+
+    data = template.data(value, 7)
+    func, args = oracle.contract.decode_function_input(data)
+    assert func.fn_name == "submitValue"
+    assert list(args.values()) == [query.query_id, value, 7, query.query_data]
+    if value:
+        # eth_abi 2 pads empty bytes with a zero word, which the ABI spec doesn't
+        expected = oracle.contract.encodeABI(fn_name="submitValue", args=[query.query_id, value, 7, query.query_data])
+        assert Web3.toHex(data) == expected
+
+
+def test_build(oracle):
+    query = SpotPrice(asset="btc", currency="usd")
+    template = SubmitValueTemplate.from_contract(oracle, query)
+    tx = template.build(b"\x01" * 32, 3, {"nonce": 5, "gas": 350000, "gasPrice": 1, "chainId": 5})
+
+    assert tx["to"] == ORACLE_ADDRESS
+    assert tx["value"] == 0
+    assert tx["nonce"] == 5
+    assert tx["data"].startswith(Web3.toHex(template.selector))
+
+
+def test_templates_shared_per_query(oracle):
+    eth_query = SpotPrice(asset="eth", currency="usd")
+
+    template = submit_template(5, oracle, eth_query)
+    assert submit_template(5, oracle, SpotPrice(asset="eth", currency="usd")) is template
+    assert submit_template(5, oracle, SpotPrice(asset="btc", currency="usd")) is not template
+    assert submit_template(1, oracle, eth_query) is not template
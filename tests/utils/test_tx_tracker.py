@@ -0,0 +1,63 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from web3.exceptions import TimeExhausted
+from web3.exceptions import TransactionNotFound
+
+from telliot_feeds.utils.tx_tracker import TxTracker
+
+
+def fake_endpoint(receipts):
+    endpoint = mock.Mock()
+    endpoint._web3.eth.block_number = 1
+
+    def get_transaction_receipt(tx_hash):
+        if tx_hash not in receipts:
+            raise TransactionNotFound(tx_hash)
+        return receipts[tx_hash]
+
+    endpoint._web3.eth.get_transaction_receipt.side_effect = get_transaction_receipt
+    return endpoint
+
+
+@pytest.mark.asyncio
+async def test_receipts_resolved_in_background():
+    receipts = {}
+    endpoint = fake_endpoint(receipts)
+    tracker = TxTracker(endpoint, poll_interval=0.01)
+    confirmed = []
+
+    first = tracker.track("0xaa", callback=lambda f: confirmed.append(f.result()["status"]))
+    second = tracker.track("0xbb")
+    await asyncio.sleep(0.05)
+    assert not first.done() and not second.done()
+
+    # the event loop isn't blocked while waiting
+    receipts["0xaa"] = {"status": 1}
+    receipts["0xbb"] = {"status": 0}
+    endpoint._web3.eth.block_number = 2
+
+    assert (await tracker.wait("0xbb"))["status"] == 0
+    assert (await first)["status"] == 1
+    assert confirmed == [1]
+    assert not tracker.pending
+
+
+@pytest.mark.asyncio
+async def test_receipts_polled_once_per_block():
+    endpoint = fake_endpoint({})
+    tracker = TxTracker(endpoint, poll_interval=0.01)
+
+    tracker.track("0xaa")
+    await asyncio.sleep(0.1)
+    assert endpoint._web3.eth.get_transaction_receipt.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_timeout():
+    tracker = TxTracker(fake_endpoint({}), poll_interval=0.01)
+
+    with pytest.raises(TimeExhausted):
+        await tracker.wait("0xaa", timeout=0.05)
+    assert not tracker.pending